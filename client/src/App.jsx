@@ -54,6 +54,9 @@ export default function App() {
         state_abbrev: loc.address.state ?? '',
         zip: loc.address.zip ?? '',
         n_simulations: 500,
+        financing: true, // financing card
+        stable_seed: true, // repeat reports hit the simulation cache
+        layout: 'columnar', // SavingsGraph reads savings_by_year columns
       })
       if (panelCfg) {
         params.set('panel_count', panelCfg.panelCount)
@@ -82,6 +85,9 @@ export default function App() {
         state_abbrev: location.address.state ?? '',
         zip: location.address.zip ?? '',
         n_simulations: 500,
+        financing: true, // financing card
+        stable_seed: true, // repeat reports hit the simulation cache
+        layout: 'columnar', // SavingsGraph reads savings_by_year columns
         household_size: householdSize,
         filing_status: filingStatus,
         owners_or_renters: ownerStatus,
@@ -338,9 +344,7 @@ export default function App() {
 
             <FinancingCard
               netCost={report.deterministic?.net_cost}
-              monthlySavings={report.solar?.price_per_kwh && report.solar_production_kwh
-                ? (report.solar_production_kwh * report.solar.price_per_kwh) / 12
-                : null}
+              financing={report.financing}
               className="stagger-6"
             />
 
@@ -8,23 +8,11 @@ const CREDIT_TIERS = [
   { min: 0,   label: 'May not qualify', color: '#ef4444', apr: [24.99, 35.99] },
 ]
 
-const LOAN_TERMS = [10, 15, 20, 25]
-
 function getTier(score) {
   return CREDIT_TIERS.find(t => score >= t.min) ?? CREDIT_TIERS[CREDIT_TIERS.length - 1]
 }
 
-function midpointApr(tier) {
-  return (tier.apr[0] + tier.apr[1]) / 2
-}
-
-function monthlyPayment(principal, annualRate, years) {
-  if (principal <= 0) return 0
-  if (annualRate === 0) return principal / (years * 12)
-  const r = annualRate / 100 / 12
-  const n = years * 12
-  return principal * (r * Math.pow(1 + r, n)) / (Math.pow(1 + r, n) - 1)
-}
+const median = (summary) => summary?.percentiles?.['50']
 
 function CreditGauge({ score }) {
   const tier = getTier(score)
@@ -55,31 +43,37 @@ function CreditGauge({ score }) {
   )
 }
 
-export default function FinancingCard({ netCost, monthlySavings, className = '' }) {
+export default function FinancingCard({ netCost, financing, className = '' }) {
   const [creditScore, setCreditScore] = useState(720)
   const [selectedTerm, setSelectedTerm] = useState(20)
 
   const tier = useMemo(() => getTier(creditScore), [creditScore])
-  const apr = useMemo(() => midpointApr(tier), [tier])
 
   const loanAmount = Math.max(0, netCost ?? 0)
+  const horizonMonths = (financing?.years ?? 0) * 12
 
+  // Loan outcomes come from the server financing engine (one option per term x tier APR)
   const schedules = useMemo(() =>
-    LOAN_TERMS.map(years => {
-      const payment = monthlyPayment(loanAmount, apr, years)
-      const totalPaid = payment * years * 12
-      return { years, payment, totalPaid, totalInterest: totalPaid - loanAmount }
-    }),
-    [loanAmount, apr]
+    (financing?.options ?? [])
+      .filter(o => o.type === 'loan' && o.apr_pct >= tier.apr[0] && o.apr_pct <= tier.apr[1])
+      .map(o => ({
+        years: o.term_years,
+        apr: o.apr_pct,
+        payment: median(o.monthly_payment),
+        positiveMonths: median(o.cash_flow_positive_months),
+        netBenefit: median(o.net_benefit),
+        probPositive: o.prob_positive_benefit,
+      })),
+    [financing, tier]
   )
 
-  const selected = schedules.find(s => s.years === selectedTerm) ?? schedules[2]
-  const cashFlowPositive = monthlySavings != null && selected.payment < monthlySavings
+  const selected = schedules.find(s => s.years === selectedTerm) ?? schedules[Math.min(2, schedules.length - 1)]
+  const cashFlowPositive = selected != null && selected.positiveMonths >= horizonMonths / 2
 
   const money = (n) => n == null ? '—' : `$${Number(n).toLocaleString('en-US', { maximumFractionDigits: 0 })}`
   const moneyMo = (n) => n == null ? '—' : `$${Number(n).toLocaleString('en-US', { minimumFractionDigits: 0, maximumFractionDigits: 0 })}/mo`
 
-  if (!loanAmount) return null
+  if (!loanAmount || !selected) return null
 
   return (
     <div className={`rounded-2xl overflow-hidden ${className || ''}`}
@@ -139,7 +133,7 @@ export default function FinancingCard({ netCost, monthlySavings, className = ''
 
         {/* Term selector */}
         <div className="flex gap-2 mb-4">
-          {LOAN_TERMS.map(years => (
+          {schedules.map(({ years }) => (
             <button
               key={years}
               onClick={() => setSelectedTerm(years)}
@@ -168,44 +162,42 @@ export default function FinancingCard({ netCost, monthlySavings, className = ''
               </p>
             </div>
             <div className="text-right">
-              <p className="text-sm text-slate-500">at {apr.toFixed(2)}% APR</p>
+              <p className="text-sm text-slate-500">at {selected.apr.toFixed(2)}% APR</p>
               <p className="text-sm text-slate-500">{selectedTerm}-year term</p>
             </div>
           </div>
         </div>
 
         {/* Cash flow indicator */}
-        {monthlySavings != null && (
-          <div className="flex items-center gap-3 rounded-xl px-4 py-3 mb-3"
-            style={{
-              background: cashFlowPositive ? 'rgba(16,185,129,0.06)' : 'rgba(249,115,22,0.06)',
-              border: `1px solid ${cashFlowPositive ? 'rgba(16,185,129,0.15)' : 'rgba(249,115,22,0.15)'}`,
-            }}>
-            <svg width="14" height="14" viewBox="0 0 24 24" fill="none"
-              stroke={cashFlowPositive ? '#10b981' : '#f97316'} strokeWidth="2.5" strokeLinecap="round">
-              {cashFlowPositive ? (
-                <><path d="M22 11.08V12a10 10 0 1 1-5.93-9.14" /><polyline points="22 4 12 14.01 9 11.01" /></>
-              ) : (
-                <><circle cx="12" cy="12" r="10" /><path d="M12 8v4M12 16h.01" /></>
-              )}
-            </svg>
-            <div className="flex-1">
-              <p className="text-sm font-semibold" style={{ color: cashFlowPositive ? '#10b981' : '#f97316' }}>
-                {cashFlowPositive ? 'Cash-flow positive from day one' : 'Payment exceeds energy savings'}
-              </p>
-              <p className="text-xs text-slate-500 mt-0.5">
-                Est. savings: ~{moneyMo(monthlySavings)} vs. payment: ~{moneyMo(selected.payment)}
-              </p>
-            </div>
+        <div className="flex items-center gap-3 rounded-xl px-4 py-3 mb-3"
+          style={{
+            background: cashFlowPositive ? 'rgba(16,185,129,0.06)' : 'rgba(249,115,22,0.06)',
+            border: `1px solid ${cashFlowPositive ? 'rgba(16,185,129,0.15)' : 'rgba(249,115,22,0.15)'}`,
+          }}>
+          <svg width="14" height="14" viewBox="0 0 24 24" fill="none"
+            stroke={cashFlowPositive ? '#10b981' : '#f97316'} strokeWidth="2.5" strokeLinecap="round">
+            {cashFlowPositive ? (
+              <><path d="M22 11.08V12a10 10 0 1 1-5.93-9.14" /><polyline points="22 4 12 14.01 9 11.01" /></>
+            ) : (
+              <><circle cx="12" cy="12" r="10" /><path d="M12 8v4M12 16h.01" /></>
+            )}
+          </svg>
+          <div className="flex-1">
+            <p className="text-sm font-semibold" style={{ color: cashFlowPositive ? '#10b981' : '#f97316' }}>
+              {cashFlowPositive ? 'Savings cover the payment most months' : 'Payment exceeds energy savings most months'}
+            </p>
+            <p className="text-xs text-slate-500 mt-0.5">
+              Cash-flow positive in ~{selected.positiveMonths} of {horizonMonths} months (median across simulations)
+            </p>
           </div>
-        )}
+        </div>
 
         {/* Cost breakdown */}
         <div className="grid grid-cols-3 gap-3">
           {[
             { label: 'Loan Amount', value: money(loanAmount) },
-            { label: 'Total Interest', value: money(selected.totalInterest) },
-            { label: 'Total Paid', value: money(selected.totalPaid) },
+            { label: 'Net Benefit', value: money(selected.netBenefit) },
+            { label: 'Chance Ahead', value: `${Math.round(selected.probPositive * 100)}%` },
           ].map(({ label, value }) => (
             <div key={label} className="flex flex-col items-center gap-1 rounded-xl py-3 px-2"
               style={{ background: 'rgba(255,255,255,0.03)', border: '1px solid rgba(255,255,255,0.06)' }}>
@@ -221,7 +213,7 @@ export default function FinancingCard({ netCost, monthlySavings, className = ''
         style={{ borderColor: 'rgba(255,255,255,0.06)', background: 'rgba(0,0,0,0.25)' }}>
         {schedules.map((s, i) => (
           <div key={s.years}
-            className={`flex flex-col items-center py-3 gap-0.5 cursor-pointer transition-colors duration-150 ${i < 3 ? 'border-r' : ''}`}
+            className={`flex flex-col items-center py-3 gap-0.5 cursor-pointer transition-colors duration-150 ${i < schedules.length - 1 ? 'border-r' : ''}`}
             style={{
               borderColor: 'rgba(255,255,255,0.06)',
               background: s.years === selectedTerm ? 'rgba(59,130,246,0.08)' : 'transparent',
@@ -52,7 +52,7 @@ export default function SavingsGraph({ simulation, deterministic, className = ''
     p50: sim.percentiles['50'][i],
     p75: sim.percentiles['75'][i],
     p95: sim.percentiles['95'][i],
-    det: det[i]?.cumulative_savings,
+    det: det.cumulative_savings[i],
   }))
 
   const payback  = simulation?.payback_years?.percentiles?.['50']
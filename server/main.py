@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from routers import energy, incentives, geothermal, wind, simulate, report, solar_proxy, ai_summary
+from routers import energy, incentives, geothermal, wind, simulate, report, solar_proxy, ai_summary, jobs, geocode, emissions
 
 app = FastAPI()
 
@@ -24,6 +24,9 @@ app.include_router(simulate.router, prefix="/api", tags=["simulate"])
 app.include_router(report.router, prefix="/api", tags=["report"])
 app.include_router(solar_proxy.router, prefix="/api", tags=["solar"])
 app.include_router(ai_summary.router, prefix="/api", tags=["ai"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+app.include_router(geocode.router, prefix="/api", tags=["geocode"])
+app.include_router(emissions.router, prefix="/api", tags=["emissions"])
 
 
 @app.get("/")
@@ -0,0 +1,212 @@
+"""Bulk eGRID region and emissions-factor lookup for many zips.
+
+POST /emissions/bulk takes a JSON list of zips (or {"zips": [...]}) or a CSV body with
+one zip per line (an optional header and extra columns are ignored) and answers row for
+row in input order: the normalized zip, its eGRID region and lbs CO2 per MWh,
+blank/null where the zip is not recognized. JSON entries and CSV first fields go
+through the same normalizer, so ZIP+4, quotes and spaces are accepted in both. CSV
+bodies are parsed block by block as they stream in and the CSV answer is streamed back
+in blocks. Zips are resolved with the vectorized zip_region index and CSV rows are
+assembled as byte arrays, so no per-zip Python objects are built.
+"""
+import json
+from typing import Literal
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from utils.columnar import ColumnarResponse
+from utils.zip_region import REGION_CO2_LBS_PER_MWH, get_region_codes
+
+try:
+    import orjson
+except ImportError:  # optional; json.loads gives the same lists
+    orjson = None
+
+router = APIRouter()
+
+MAX_JSON_ZIPS = 1_000_000
+MAX_CSV_ZIPS = 2_000_000
+MAX_CSV_BYTES = 64 << 20  # CSV answers are buffered until the body is read; bound both
+CSV_BLOCK_BYTES = 1 << 20
+CSV_HEADER = b"zip,region,co2_lbs_per_mwh\n"
+_LINE_BYTES = 16  # longer lines and JSON entries are cut; a zip field never needs more
+_POWERS = 10 ** np.arange(4, -1, -1)
+
+
+def _row_suffixes(names: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(codes, width) uint8 matrix of each region's ",REGION,LBS\\n" CSV tail, and lengths."""
+    tails = [b",,\n"] + [
+        f",{name},{REGION_CO2_LBS_PER_MWH[name] if name in REGION_CO2_LBS_PER_MWH else ''}\n".encode()
+        for name in names[1:]
+    ]
+    table = np.array(tails)
+    width = table.dtype.itemsize
+    return table.view(np.uint8).reshape(len(tails), width), np.array([len(tail) for tail in tails])
+
+
+def _digits(numbers: np.ndarray) -> np.ndarray:
+    """(n, 5) ASCII bytes of zero-padded zips."""
+    return (numbers[:, None] // _POWERS % 10 + ord("0")).astype(np.uint8)
+
+
+def _csv_rows(numbers: np.ndarray, valid: np.ndarray) -> bytes:
+    """CSV rows for parsed zips: five digits (empty if invalid) then the region tail."""
+    codes, names = get_region_codes(numbers)
+    codes = np.where(valid, codes, 0)
+    tails, tail_length = _row_suffixes(names)
+    digits = _digits(numbers)
+    zip_length = np.where(valid, 5, 0)
+    row_length = zip_length + tail_length[codes]
+    start = np.cumsum(row_length) - row_length
+
+    out = np.empty(int(row_length.sum()), dtype=np.uint8)
+    in_zip = np.arange(5) < zip_length[:, None]
+    out[(start[:, None] + np.arange(5))[in_zip]] = digits[in_zip]
+    in_tail = np.arange(tails.shape[1]) < tail_length[codes][:, None]
+    out[((start + zip_length)[:, None] + np.arange(tails.shape[1]))[in_tail]] = tails[codes][in_tail]
+    return out.tobytes()
+
+
+def _parse_fields(block: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Zip numbers and validity from a 1-d bytes array (JSON entries or CSV lines): up
+    to a comma, dash (ZIP+4) or line end, with spaces and quotes ignored, 1 to 5 digits
+    zero-padded."""
+    n = len(block)
+    chars = np.ascontiguousarray(block.view(np.uint8).reshape(n, block.dtype.itemsize).T)
+    numbers = np.zeros(n, dtype=np.uint32)  # wraps only past 9 digits, which are invalid anyway
+    count = np.zeros(n, dtype=np.uint8)
+    valid = np.ones(n, dtype=bool)
+    active = np.ones(n, dtype=bool)
+    for column in chars:
+        active &= (column != ord(",")) & (column != ord("-")) & (column != ord("\r")) & (column != 0)
+        digit = column - np.uint8(ord("0"))  # wraps above 9 for anything but 0-9
+        is_digit = active & (digit <= 9)
+        valid &= ~active | is_digit | (column == ord(" ")) | (column == ord('"')) | (column == ord("\t"))
+        numbers *= np.where(is_digit, np.uint32(10), np.uint32(1))
+        numbers += digit * is_digit
+        count += is_digit
+    valid &= (count >= 1) & (count <= 5)
+    return np.where(valid, numbers, 0).astype(np.int64), valid
+
+
+def _parse_csv_lines(lines: list[bytes]) -> tuple[np.ndarray, np.ndarray]:
+    block = np.array(lines, dtype=bytes)
+    return _parse_fields(block if block.dtype.itemsize <= _LINE_BYTES else block.astype(f"S{_LINE_BYTES}"))
+
+
+def _parse_json_zips(zips: list) -> tuple[np.ndarray, np.ndarray]:
+    """_parse_fields over a flat list of zip strings or integers; ValueError otherwise."""
+    if not zips:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+    try:
+        block = np.array(zips, dtype=f"S{_LINE_BYTES}")  # ints are formatted, long entries cut
+    except UnicodeEncodeError:  # non-ASCII entries are never zips; keep them invalid
+        block = np.array([str(z).encode("ascii", "replace") for z in zips], dtype=f"S{_LINE_BYTES}")
+    if block.ndim != 1:
+        raise ValueError("zips must be a flat list")
+    return _parse_fields(block)
+
+
+def _drop_header(lines: list[bytes]) -> list[bytes]:
+    """lines without a header row: a first line whose first field is no zip and has a
+    letter in it (e.g. "zip" or "zip5")."""
+    if not lines:
+        return lines
+    field = lines[0].split(b",", 1)[0]
+    is_header = any(chr(c).isalpha() for c in field) and not _parse_csv_lines([field])[1][0]
+    return lines[1:] if is_header else lines
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=400, detail=f"At most {MAX_CSV_ZIPS} zips or {MAX_CSV_BYTES} bytes per CSV request",
+    )
+
+
+async def _read_csv(request: Request) -> list[bytes]:
+    """CSV rows for a CSV body, resolved block by block as the body streams in. The
+    body is drained before the response starts: a StreamingResponse listens for client
+    disconnects on the same receive channel the body arrives on."""
+    blocks = [CSV_HEADER]
+    pending = b""
+    first = True
+    received = rows = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_CSV_BYTES:
+            raise _too_large()
+        pending += chunk
+        if len(pending) < CSV_BLOCK_BYTES:
+            continue
+        complete, _, pending = pending.rpartition(b"\n")
+        lines = complete.split(b"\n")
+        if first:
+            lines, first = _drop_header(lines), False
+        rows += len(lines)
+        if rows > MAX_CSV_ZIPS:
+            raise _too_large()
+        if lines:
+            blocks.append(_csv_rows(*_parse_csv_lines(lines)))
+    lines = pending.split(b"\n")
+    if lines and not lines[-1].strip():
+        lines.pop()  # trailing newline
+    if first:
+        lines = _drop_header(lines)
+    if rows + len(lines) > MAX_CSV_ZIPS:
+        raise _too_large()
+    if lines:
+        blocks.append(_csv_rows(*_parse_csv_lines(lines)))
+    return blocks
+
+
+def _stream_rows(numbers: np.ndarray, valid: np.ndarray, block: int = 1 << 16):
+    yield CSV_HEADER
+    for start in range(0, len(numbers), block):
+        yield _csv_rows(numbers[start:start + block], valid[start:start + block])
+
+
+@router.post("/emissions/bulk")
+async def bulk_emissions(
+    request: Request,
+    output: Literal["json", "csv"] | None = Query(
+        None,
+        description="Response format; defaults to csv for a text/csv body and json otherwise",
+    ),
+):
+    """eGRID region and lbs CO2/MWh for every zip in a JSON list or CSV body."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("text/csv") or content_type.startswith("text/plain"):
+        if output == "json":
+            raise HTTPException(status_code=400, detail="CSV bodies are answered as CSV")
+        return StreamingResponse(iter(await _read_csv(request)), media_type="text/csv")
+
+    body = await request.body()
+    try:
+        payload = orjson.loads(body) if orjson is not None else json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON list of zips or {\"zips\": [...]}")
+    zips = payload.get("zips") if isinstance(payload, dict) else payload
+    if not isinstance(zips, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON list of zips or {\"zips\": [...]}")
+    if len(zips) > MAX_JSON_ZIPS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_JSON_ZIPS} zips per JSON request; stream CSV for more")
+
+    try:
+        numbers, valid = _parse_json_zips(zips)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="zips must be a flat list of strings or integers")
+    if output == "csv":
+        return StreamingResponse(_stream_rows(numbers, valid), media_type="text/csv")
+
+    codes, names = get_region_codes(numbers)
+    codes = np.where(valid, codes, 0)
+    co2 = np.array([np.nan] + [REGION_CO2_LBS_PER_MWH.get(name, np.nan) for name in names[1:]])
+    normalized = _digits(numbers).view("S5")[:, 0].astype("U5")
+    return ColumnarResponse({
+        "count": len(zips),
+        "zip": np.where(valid, normalized, None),
+        "region": names[codes],
+        "co2_lbs_per_mwh": co2[codes],
+    })
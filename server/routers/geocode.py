@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from utils.gazetteer import MAX_MATCH_DISTANCE_KM, load_gazetteer
+
+router = APIRouter()
+
+
+@router.get("/geocode")
+def geocode(
+    zip_code: str | None = Query(None, alias="zip"),
+    lat: float | None = None,
+    lon: float | None = None,
+):
+    """Offline lookups against the ZIP gazetteer: a zip's centroid, state, county and
+    eGRID region, or the nearest zip to lat/lon (404 beyond MAX_MATCH_DISTANCE_KM)."""
+    if zip_code is None and (lat is None or lon is None):
+        raise HTTPException(status_code=400, detail="Provide zip, or lat and lon")
+    gazetteer = load_gazetteer()
+    if gazetteer is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Gazetteer not built; run `python -m utils.gazetteer build SOURCE`",
+        )
+    if zip_code is not None:
+        entry = gazetteer.centroid(zip_code)
+        if entry is None:
+            raise HTTPException(status_code=404, detail=f"Unknown zip {zip_code}")
+        return entry
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise HTTPException(status_code=400, detail="lat must be within ±90 and lon within ±180")
+    entry = gazetteer.nearest(lat, lon, MAX_MATCH_DISTANCE_KM)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No zip within {MAX_MATCH_DISTANCE_KM:g} km of {lat}, {lon}")
+    return entry
@@ -0,0 +1,100 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from utils.constants import DISCOUNT_RATE
+from utils.jobs import job_manager
+from utils.monte_carlo import DEFAULT_CHUNK_SIZE, SamplingMethod
+from utils.sensitivity import DEFAULT_N_BASE
+
+router = APIRouter()
+
+MAX_JOB_SIMULATIONS = 100_000_000
+MAX_JOB_YEARS = 100
+MAX_JOB_SENSITIVITY_BASE = 1 << 20
+
+
+class SimulationJobRequest(BaseModel):
+    system_size_kw: float
+    solar_production_kwh: Optional[float] = None
+    price_per_kwh: Optional[float] = None
+    flat_rebates: float = 0
+    state_itc_entries: Optional[list[dict]] = None
+    years: int = 20
+    n_simulations: int = 1_000_000
+    seed: Optional[int] = None
+    zip: Optional[str] = None
+    sampling: SamplingMethod = "pseudo"
+    discount_rate: float = DISCOUNT_RATE
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+
+
+class SensitivityJobRequest(BaseModel):
+    system_size_kw: float
+    solar_production_kwh: Optional[float] = None
+    price_per_kwh: Optional[float] = None
+    flat_rebates: float = 0
+    state_itc_entries: Optional[list[dict]] = None
+    years: int = 20
+    method: Literal["sobol", "tornado"] = "sobol"
+    n_base: int = DEFAULT_N_BASE
+    seed: Optional[int] = None
+    zip: Optional[str] = None
+
+
+def _check_years(years: int) -> None:
+    if not 1 <= years <= MAX_JOB_YEARS:
+        raise HTTPException(status_code=400, detail=f"years must be between 1 and {MAX_JOB_YEARS}")
+
+
+def _accepted(record: dict) -> dict:
+    return {"job_id": record["id"], "kind": record["kind"], "status": record["status"]}
+
+
+@router.post("/jobs/simulate", status_code=202)
+def submit_simulation_job(req: SimulationJobRequest):
+    """Queue a streaming Monte Carlo run of up to MAX_JOB_SIMULATIONS paths. Poll
+    GET /jobs/{job_id} for progress and partial percentiles."""
+    _check_years(req.years)
+    if not 1 <= req.n_simulations <= MAX_JOB_SIMULATIONS:
+        raise HTTPException(status_code=400, detail=f"n_simulations must be between 1 and {MAX_JOB_SIMULATIONS}")
+    params = req.model_dump(exclude={"n_simulations", "zip"})
+    params.update(n=req.n_simulations, zip_code=req.zip, chunk_size=max(1, req.chunk_size))
+    return _accepted(job_manager().submit("simulation", params))
+
+
+@router.post("/jobs/sensitivity", status_code=202)
+def submit_sensitivity_job(req: SensitivityJobRequest):
+    """Queue a Sobol or tornado sensitivity analysis too large for /simulate/sensitivity."""
+    _check_years(req.years)
+    if not 2 <= req.n_base <= MAX_JOB_SENSITIVITY_BASE:
+        raise HTTPException(status_code=400, detail=f"n_base must be between 2 and {MAX_JOB_SENSITIVITY_BASE}")
+    params = req.model_dump(exclude={"zip"})
+    params.update(zip_code=req.zip)
+    return _accepted(job_manager().submit("sensitivity", params))
+
+
+@router.get("/jobs")
+def list_jobs():
+    """Every stored job without results, newest first."""
+    return job_manager().store.list()
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status and progress; "partial" holds the running summary while a simulation job
+    runs and "result" the final one once it has succeeded."""
+    try:
+        return job_manager().store.read(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Cancel a queued or running job. Finished jobs are returned unchanged."""
+    try:
+        return job_manager().cancel(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
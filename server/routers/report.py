@@ -1,19 +1,27 @@
 import asyncio
-from fastapi import APIRouter, Query
+from typing import Literal
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query
 
 from routers.energy import get_price_and_usage
 from routers.incentives import get_incentives
 from routers.wind import get_wind
 from routers.geothermal import get_geothermal
-from utils.monte_carlo import run_simulation
+from utils.sim_cache import cached_run_simulation, stable_simulation_seed
+from utils.surrogate import predict_simulation
 from utils.calculations import (
     calculate_gross_cost,
     calculate_net_cost,
-    calculate_payback,
-    calculate_savings_over_time,
-    calculate_carbon_offset,
+    calculate_exact_payback,
+    calculate_savings_over_time_array,
+    calculate_carbon_offset_closed_form,
 )
+from utils.financing import run_financing
+from utils.gazetteer import MAX_MATCH_DISTANCE_KM, reverse_geocode, state_for_zip, zip_centroid
+from utils.portfolio import run_portfolio_simulation
 from utils.charts import plot_savings_fan_chart
+from utils.columnar import ColumnarResponse, to_rows
 from utils.constants import DEFAULT_ANNUAL_USAGE_KWH, DEFAULT_UTILITY_RATE
 
 router = APIRouter()
@@ -69,12 +77,62 @@ async def _fetch_geothermal(lat: float, lon: float) -> dict:
         return GEOTHERMAL_FALLBACK
 
 
+def _resolve_location(
+    lat: float | None,
+    lon: float | None,
+    state_abbrev: str | None,
+    zip_code: str | None,
+) -> dict:
+    """Fill whichever of lat/lon, state and zip the client left out from the offline
+    gazetteer (state also from the zip prefix). 400 if something is still missing, or
+    if lat/lon is farther than MAX_MATCH_DISTANCE_KM from any zip."""
+    derived = []
+    entry = None
+    distance_km = None
+    if zip_code is None and lat is not None and lon is not None:
+        entry = reverse_geocode(lat, lon, max_distance_km=None)
+        if entry is not None:
+            if entry["distance_km"] > MAX_MATCH_DISTANCE_KM:
+                raise HTTPException(
+                    status_code=400,
+                    detail=(
+                        f"No US zip within {MAX_MATCH_DISTANCE_KM:g} km of {lat}, {lon} (nearest is "
+                        f"{entry['zip']}, {entry['distance_km']:g} km away); provide zip and state_abbrev"
+                    ),
+                )
+            zip_code, distance_km = entry["zip"], entry["distance_km"]
+            derived.append("zip")
+    if (lat is None or lon is None) and zip_code is not None:
+        entry = zip_centroid(zip_code)
+        if entry is not None:
+            lat, lon = entry["lat"], entry["lon"]
+            derived.append("lat_lon")
+    if state_abbrev is None and zip_code is not None:
+        state_abbrev = (entry or {}).get("state_abbrev") or state_for_zip(zip_code)
+        if state_abbrev is not None:
+            derived.append("state_abbrev")
+
+    missing = [
+        name for name, value in (("lat", lat), ("lon", lon), ("state_abbrev", state_abbrev), ("zip", zip_code))
+        if value is None
+    ]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing {', '.join(missing)}; provide them or a zip / lat and lon the gazetteer knows",
+        )
+    return {
+        "lat": lat, "lon": lon, "state_abbrev": state_abbrev, "zip": zip_code, "derived": derived,
+        "distance_km": distance_km,
+    }
+
+
 @router.get("/report")
 async def generate_report(
-    lat: float,
-    lon: float,
-    state_abbrev: str,
-    zip_code: str = Query(..., alias="zip"),
+    lat: float | None = None,
+    lon: float | None = None,
+    state_abbrev: str | None = None,
+    zip_code: str | None = Query(None, alias="zip"),
     panel_count: int | None = Query(
         None,
         description="Number of solar panels selected in the frontend configurator",
@@ -93,7 +151,34 @@ async def generate_report(
     owners_or_renters: str = "homeowner",
     years: int = 20,
     n_simulations: int = 1000,
+    seed: int | None = Query(None, description="Monte Carlo seed; shared by the simulation, financing and portfolio"),
+    stable_seed: bool = Query(
+        False,
+        description="Use a server-chosen seed derived from the inputs so repeat reports hit the simulation cache",
+    ),
+    exact: bool = Query(
+        False,
+        description="Always run the Monte Carlo engine, even when the fitted surrogate covers the inputs",
+    ),
+    include_financing: bool = Query(
+        False,
+        alias="financing",
+        description="Also price cash, loan, lease and PPA options on the simulation's draws",
+    ),
+    include_portfolio: bool = Query(
+        False,
+        alias="portfolio",
+        description="Also simulate solar+wind / solar+GSHP portfolios on the simulation's draws (always runs the engine)",
+    ),
+    layout: Literal["columnar", "rows"] = Query(
+        "rows",
+        description='"columnar" returns deterministic savings_by_year as one array per column instead of '
+        "the legacy list of per-year objects",
+    ),
 ):
+    location = _resolve_location(lat, lon, state_abbrev, zip_code)
+    lat, lon, state_abbrev, zip_code = location["lat"], location["lon"], location["state_abbrev"], location["zip"]
+
     solar_data, incentives_data, wind_data, geothermal_data = await asyncio.gather(
         _fetch_solar(state_abbrev),
         _fetch_incentives(zip_code, income, household_size, filing_status, owners_or_renters),
@@ -122,12 +207,12 @@ async def generate_report(
     else:
         system_size_kw = 8.0
 
-    # Deterministic single-point estimates
+    # Deterministic single-point estimates (payback and carbon in closed form)
     gross = calculate_gross_cost(system_size_kw)
     net = calculate_net_cost(gross, flat_rebates, state_itc_entries=state_itc_entries)
-    payback = calculate_payback(net, solar_production_kwh, price_per_kwh)
-    savings = calculate_savings_over_time(net, solar_production_kwh, price_per_kwh, years)
-    carbon = calculate_carbon_offset(solar_production_kwh, years, zip_code=zip_code)
+    payback = float(calculate_exact_payback(net, solar_production_kwh, price_per_kwh))
+    savings = calculate_savings_over_time_array(net, solar_production_kwh, price_per_kwh, years)
+    carbon = float(calculate_carbon_offset_closed_form(solar_production_kwh, years, zip_code=zip_code))
 
     deterministic = {
         "gross_cost": round(gross, 2),
@@ -137,20 +222,68 @@ async def generate_report(
         "carbon_offset_tons": carbon,
     }
 
-    # Monte Carlo distributions
-    simulation = await asyncio.to_thread(
-        run_simulation,
-        system_size_kw=system_size_kw,
-        solar_production_kwh=solar_production_kwh,
-        price_per_kwh=price_per_kwh,
-        flat_rebates=flat_rebates,
-        state_itc_entries=state_itc_entries,
-        years=years,
-        n=min(n_simulations, 10000),
-        zip_code=zip_code,
-    )
+    # Monte Carlo distributions: the surrogate when it covers the inputs, else the engine
+    sim_inputs = {
+        "system_size_kw": system_size_kw,
+        "solar_production_kwh": solar_production_kwh,
+        "price_per_kwh": price_per_kwh,
+        "flat_rebates": flat_rebates,
+        "state_itc_entries": state_itc_entries,
+        "years": years,
+        "zip_code": zip_code,
+    }
+    n = min(n_simulations, 10000)
+    if seed is None and (include_financing or include_portfolio):
+        # financing and portfolios run on the simulation's draws, so they need its seed
+        # now, even when the surrogate answers the simulation itself
+        if stable_seed:
+            seed = stable_simulation_seed(n=n, **sim_inputs)
+        else:
+            seed = int(np.random.default_rng().integers(2**63))
+    # (portfolios pair their paths with the engine's, so they always use it)
+    simulation = None if exact or include_portfolio else predict_simulation(**sim_inputs)
+    if simulation is None:
+        simulation = await asyncio.to_thread(
+            cached_run_simulation,
+            stable_seed=stable_seed,
+            n=n,
+            seed=seed,
+            **sim_inputs,
+        )
+        seed = simulation.get("seed", seed)
+
+    financing = portfolio = None
+    if include_financing:
+        financing = await asyncio.to_thread(
+            run_financing,
+            system_size_kw=system_size_kw,
+            solar_production_kwh=solar_production_kwh,
+            price_per_kwh=price_per_kwh,
+            flat_rebates=flat_rebates,
+            state_itc_entries=state_itc_entries,
+            years=years,
+            n=n,
+            seed=seed,
+        )
+
+    if include_portfolio:
+        # Solar next to wind and GSHP on the simulation's draws; solar alone is the
+        # simulation itself, so its entry reuses the (possibly cached) result
+        portfolio = await asyncio.to_thread(
+            run_portfolio_simulation,
+            n=n,
+            seed=seed,
+            avg_wind_speed_ms=(wind_data or {}).get("avg_wind_speed_ms"),
+            hvac_savings_pct_low=(geothermal_data or {}).get("hvac_savings_pct_low"),
+            hvac_savings_pct_high=(geothermal_data or {}).get("hvac_savings_pct_high"),
+            **sim_inputs,
+        )
+        for entry in portfolio["portfolios"]:
+            if entry["portfolio"] == "solar":
+                entry["simulation"] = {key: simulation[key] for key in entry["simulation"]}
 
     report_data = {
+        "location": location,
         "panel_count": panel_count,
         "panel_capacity_watts": panel_capacity_watts,
         "system_size_kw": round(system_size_kw, 2),
@@ -160,10 +293,15 @@ async def generate_report(
         "wind": wind_data,
         "geothermal": geothermal_data,
         "deterministic": deterministic,
+        "seed": seed,
         "simulation": simulation,
+        "financing": financing,
+        "portfolio": portfolio,
     }
 
     charts = await asyncio.to_thread(plot_savings_fan_chart, report_data)
 
     report_data["charts"] = {"savings_fan": charts}
-    return report_data
+    if layout == "rows":
+        deterministic["savings_by_year"] = to_rows(savings)
+    return ColumnarResponse(report_data)
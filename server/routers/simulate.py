@@ -1,9 +1,85 @@
-from fastapi import APIRouter, Body
+import os
+from typing import Literal, Optional
 
-from utils.monte_carlo import run_simulation
+from fastapi import APIRouter, Body, HTTPException
+from pydantic import BaseModel
+
+from utils.columnar import ColumnarResponse
+from utils.constants import DISCOUNT_RATE
+from utils.financing import financing_options, run_financing
+from utils.monte_carlo import DEFAULT_CHUNK_SIZE, SamplingMethod, run_batch_simulation
+from utils.portfolio import GSHP_INSTALLED_COST, WIND_TURBINE_KW, run_portfolio_simulation
+from utils.sensitivity import DEFAULT_N_BASE, sobol_indices, tornado
+from utils.sim_cache import cached_run_simulation, simulation_cache
 
 router = APIRouter()
 
+MAX_SIMULATIONS = 10_000
+MAX_STREAMING_SIMULATIONS = 5_000_000
+MAX_BATCH_CONFIGS = 200
+MAX_BATCH_PATHS = 2_000_000
+MAX_SENSITIVITY_BASE = 8192
+MAX_FINANCING_OPTIONS = 100
+MAX_PORTFOLIOS = 7
+
+
+class SimulationConfig(BaseModel):
+    system_size_kw: float
+    solar_production_kwh: Optional[float] = None
+    price_per_kwh: Optional[float] = None
+    flat_rebates: float = 0
+    state_itc_entries: Optional[list[dict]] = None
+    label: Optional[str] = None
+
+
+class BatchSimulationRequest(BaseModel):
+    configs: list[SimulationConfig]
+    years: int = 20
+    n_simulations: int = 1000
+    seed: Optional[int] = None
+    zip: Optional[str] = None
+    sampling: SamplingMethod = "pseudo"
+    baseline: int = 0
+    discount_rate: float = DISCOUNT_RATE
+
+
+class FinancingRequest(BaseModel):
+    system_size_kw: float
+    solar_production_kwh: Optional[float] = None
+    price_per_kwh: Optional[float] = None
+    flat_rebates: float = 0
+    state_itc_entries: Optional[list[dict]] = None
+    years: int = 20
+    n_simulations: int = 1000
+    seed: Optional[int] = None
+    discount_rate: float = DISCOUNT_RATE
+    loan_terms: Optional[list[int]] = None
+    loan_aprs: Optional[list[float]] = None
+    lease_monthly_payment: Optional[float] = None
+    ppa_rate: Optional[float] = None
+    options: Optional[list[dict]] = None
+
+
+class PortfolioRequest(BaseModel):
+    system_size_kw: float
+    solar_production_kwh: Optional[float] = None
+    price_per_kwh: Optional[float] = None
+    flat_rebates: float = 0
+    state_itc_entries: Optional[list[dict]] = None
+    years: int = 20
+    n_simulations: int = 1000
+    seed: Optional[int] = None
+    zip: Optional[str] = None
+    sampling: SamplingMethod = "pseudo"
+    avg_wind_speed_ms: Optional[float] = None
+    turbine_kw: float = WIND_TURBINE_KW
+    hvac_savings_pct_low: Optional[float] = None
+    hvac_savings_pct_high: Optional[float] = None
+    hvac_annual_cost: Optional[float] = None
+    gshp_cost: float = GSHP_INSTALLED_COST
+    portfolios: Optional[list[str]] = None
+    discount_rate: float = DISCOUNT_RATE
+
 
 @router.post("/simulate")
 def simulate(
@@ -14,13 +90,139 @@ def simulate(
     state_itc_entries: list[dict] | None = Body(default=None),
     years: int = 20,
     n_simulations: int = 1000,
+    streaming: bool = False,
+    workers: int | None = None,
+    sampling: SamplingMethod = "pseudo",
+    target_ci_width: float | None = None,
+    discount_rate: float = DISCOUNT_RATE,
+    seed: int | None = None,
+    stable_seed: bool = False,
+):
+    kwargs = {
+        "system_size_kw": system_size_kw,
+        "solar_production_kwh": solar_production_kwh,
+        "price_per_kwh": price_per_kwh,
+        "flat_rebates": flat_rebates,
+        "state_itc_entries": state_itc_entries,
+        "years": years,
+        "seed": seed,
+        "sampling": sampling,
+        "discount_rate": discount_rate,
+    }
+    if target_ci_width is not None:
+        kwargs.update(n=min(n_simulations, MAX_SIMULATIONS), target_ci_width=target_ci_width)
+    elif streaming:
+        kwargs.update(n=min(n_simulations, MAX_STREAMING_SIMULATIONS), chunk_size=DEFAULT_CHUNK_SIZE)
+    else:
+        kwargs.update(n=min(n_simulations, MAX_SIMULATIONS))
+    if workers is not None and target_ci_width is None:
+        kwargs["workers"] = max(1, min(workers, os.cpu_count() or 1))
+    try:
+        return ColumnarResponse(cached_run_simulation(stable_seed=stable_seed, **kwargs))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/simulate/cache")
+def simulation_cache_stats():
+    """Hit/miss counters and byte usage of the simulation result cache."""
+    return simulation_cache.stats()
+
+
+@router.post("/simulate/sensitivity")
+def simulate_sensitivity(
+    system_size_kw: float,
+    solar_production_kwh: float | None = None,
+    price_per_kwh: float | None = None,
+    flat_rebates: float = 0,
+    state_itc_entries: list[dict] | None = Body(default=None),
+    years: int = 20,
+    method: Literal["sobol", "tornado"] = "sobol",
+    n_base: int = DEFAULT_N_BASE,
+    seed: int | None = None,
 ):
-    return run_simulation(
-        system_size_kw=system_size_kw,
-        solar_production_kwh=solar_production_kwh,
-        price_per_kwh=price_per_kwh,
-        flat_rebates=flat_rebates,
-        state_itc_entries=state_itc_entries,
-        years=years,
-        n=min(n_simulations, 10000),
-    )
+    """Which uncertainty drives the spread: Sobol indices or a one-at-a-time tornado
+    for each DISTRIBUTIONS entry."""
+    kwargs = {
+        "system_size_kw": system_size_kw,
+        "solar_production_kwh": solar_production_kwh,
+        "price_per_kwh": price_per_kwh,
+        "flat_rebates": flat_rebates,
+        "state_itc_entries": state_itc_entries,
+        "years": years,
+    }
+    if method == "tornado":
+        return tornado(**kwargs)
+    return sobol_indices(**kwargs, n_base=max(2, min(n_base, MAX_SENSITIVITY_BASE)), seed=seed)
+
+
+@router.post("/simulate/batch")
+def simulate_batch(req: BatchSimulationRequest):
+    """Simulate every configuration against the same draws and report paired differences
+    against the baseline configuration."""
+    if not req.configs:
+        raise HTTPException(status_code=400, detail="configs must not be empty")
+    if len(req.configs) > MAX_BATCH_CONFIGS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_CONFIGS} configs per batch")
+    if not 0 <= req.baseline < len(req.configs):
+        raise HTTPException(status_code=400, detail="baseline must index into configs")
+
+    n = min(req.n_simulations, MAX_SIMULATIONS, MAX_BATCH_PATHS // len(req.configs))
+    try:
+        result = run_batch_simulation(
+            configs=[cfg.model_dump() for cfg in req.configs],
+            years=req.years,
+            n=n,
+            seed=req.seed,
+            zip_code=req.zip,
+            sampling=req.sampling,
+            baseline=req.baseline,
+            discount_rate=req.discount_rate,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ColumnarResponse(result)
+
+
+@router.post("/simulate/financing")
+def simulate_financing(req: FinancingRequest):
+    """Cash, loan (every term x APR), lease and PPA outcomes over the Monte Carlo savings
+    paths. options, when given, replaces the generated option list."""
+    try:
+        options = req.options or financing_options(
+            req.system_size_kw, req.loan_terms, req.loan_aprs, req.lease_monthly_payment, req.ppa_rate,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid financing option: {exc}")
+    if len(options) > MAX_FINANCING_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_FINANCING_OPTIONS} financing options")
+    try:
+        result = run_financing(
+            system_size_kw=req.system_size_kw,
+            solar_production_kwh=req.solar_production_kwh,
+            price_per_kwh=req.price_per_kwh,
+            flat_rebates=req.flat_rebates,
+            state_itc_entries=req.state_itc_entries,
+            years=req.years,
+            n=min(req.n_simulations, MAX_SIMULATIONS),
+            seed=req.seed,
+            options=options,
+            discount_rate=req.discount_rate,
+        )
+    except (KeyError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid financing option: {exc}")
+    return ColumnarResponse(result)
+
+
+@router.post("/simulate/portfolio")
+def simulate_portfolio(req: PortfolioRequest):
+    """Solar, wind and GSHP combinations evaluated against one shared set of draws, with
+    paired differences against solar alone."""
+    if req.portfolios is not None and len(req.portfolios) > MAX_PORTFOLIOS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PORTFOLIOS} portfolios")
+    kwargs = req.model_dump(exclude={"n_simulations", "zip"})
+    try:
+        result = run_portfolio_simulation(**kwargs, n=min(req.n_simulations, MAX_SIMULATIONS), zip_code=req.zip)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return ColumnarResponse(result)
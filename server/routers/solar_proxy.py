@@ -1,8 +1,14 @@
 import os
+from typing import Optional
+
 import requests
 from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import Response
 from dotenv import load_dotenv
+from pydantic import BaseModel
+
+from utils.constants import DISCOUNT_RATE
+from utils.panel_optimizer import score_panel_configs
 
 load_dotenv()
 
@@ -47,3 +53,59 @@ async def proxy_geotiff(url: str = Query(...)):
         media_type="image/tiff",
         headers={"Cache-Control": "public, max-age=3600"},
     )
+
+
+class PanelOptimizationRequest(BaseModel):
+    # Either the configs, a raw buildingInsights response, or a location to fetch one for
+    solar_panel_configs: Optional[list[dict]] = None
+    building_insights: Optional[dict] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    panel_capacity_watts: Optional[float] = None
+    price_per_kwh: Optional[float] = None
+    flat_rebates: float = 0
+    state_itc_entries: Optional[list[dict]] = None
+    years: int = 20
+    zip: Optional[str] = None
+    discount_rate: float = DISCOUNT_RATE
+
+
+def _fetch_building_insights(latitude: float, longitude: float) -> dict:
+    params = {"location.latitude": latitude, "location.longitude": longitude, "key": _api_key()}
+    resp = requests.get(f"{SOLAR_BASE}/buildingInsights:findClosest", params=params, timeout=10)
+    if not resp.ok:
+        raise HTTPException(status_code=resp.status_code, detail="Building insights fetch failed")
+    return resp.json()
+
+
+@router.post("/solar/optimize")
+def optimize_panel_configs(req: PanelOptimizationRequest):
+    """Score every solarPanelConfigs entry; return the Pareto frontier over net cost,
+    savings and carbon and the NPV-optimal panel count."""
+    configs = req.solar_panel_configs
+    capacity = req.panel_capacity_watts
+    insights = req.building_insights
+    if configs is None and insights is None:
+        if req.latitude is None or req.longitude is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Provide solar_panel_configs, building_insights, or latitude and longitude",
+            )
+        insights = _fetch_building_insights(req.latitude, req.longitude)
+    if configs is None:
+        potential = insights.get("solarPotential") or {}
+        configs = potential.get("solarPanelConfigs") or []
+        capacity = capacity or potential.get("panelCapacityWatts")
+    if not configs:
+        raise HTTPException(status_code=400, detail="No solar panel configurations to score")
+
+    return score_panel_configs(
+        configs,
+        panel_capacity_watts=capacity,
+        price_per_kwh=req.price_per_kwh,
+        flat_rebates=req.flat_rebates,
+        state_itc_entries=req.state_itc_entries,
+        years=req.years,
+        zip_code=req.zip,
+        discount_rate=req.discount_rate,
+    )
@@ -6,6 +6,8 @@ import requests
 from fastapi import APIRouter, HTTPException
 from dotenv import load_dotenv
 
+from utils.wind_grid import local_wind, parse_srw_speeds
+
 load_dotenv()
 router = APIRouter()
 
@@ -39,36 +41,23 @@ def _parse_srw(text: str) -> float:
       Row 3: units
       Rows 4+: hourly data
     """
-    lines = text.strip().splitlines()
-
-    # Find the header row — it contains "windspeed" or "wind speed"
-    header_idx = None
-    for i, line in enumerate(lines[:6]):
-        if "windspeed" in line.lower() or "wind speed" in line.lower() or "speed" in line.lower():
-            header_idx = i
-            break
-
-    if header_idx is None:
-        raise ValueError("Could not locate wind speed column header in SRW response")
+    return statistics.mean(parse_srw_speeds(text).tolist())
 
-    headers = [h.strip().lower() for h in lines[header_idx].split(",")]
-    speed_col = next((i for i, h in enumerate(headers) if "speed" in h), None)
-    if speed_col is None:
-        raise ValueError(f"No speed column found in header: {headers}")
 
-    speeds = []
-    for row in lines[header_idx + 2:]:  # +2 to skip header and units row
-        cols = row.split(",")
-        if len(cols) > speed_col:
-            try:
-                speeds.append(float(cols[speed_col]))
-            except ValueError:
-                continue
-
-    if not speeds:
-        raise ValueError("No wind speed data rows parsed from SRW file")
-
-    return statistics.mean(speeds)
+def _wind_result(avg_speed: float, source: str, weibull: dict | None = None) -> dict:
+    label, feasible, note = _classify(avg_speed)
+    data = {
+        "avg_wind_speed_ms": round(avg_speed, 2),
+        "hub_height_m": HUB_HEIGHT,
+        "classification": label,
+        "feasible": feasible,
+        "note": note,
+        "source": source,
+    }
+    if weibull and "weibull_k" in weibull:
+        data["weibull_k"] = round(weibull["weibull_k"], 3)
+        data["weibull_c"] = round(weibull["weibull_c"], 3)
+    return {"status": "ok", "data": data}
 
 
 @router.get("/wind")
@@ -77,7 +66,13 @@ def get_wind(lat: float, lon: float):
     Returns wind feasibility for a location using NREL Wind Toolkit data.
     Hub height is 40m — lowest available in NREL, closest to residential scale.
     Feasible if annual average wind speed >= 5 m/s.
+    Answered from the local wind grid (utils.wind_grid) where it covers the point,
+    otherwise from a live NREL SRW download.
     """
+    local = local_wind(lat, lon)
+    if local is not None:
+        return _wind_result(local["avg_wind_speed_ms"], "grid", local)
+
     if not NREL_API_KEY:
         raise HTTPException(status_code=500, detail="NREL_API_KEY is not configured")
 
@@ -103,18 +98,7 @@ def get_wind(lat: float, lon: float):
     except ValueError as e:
         raise HTTPException(status_code=502, detail=f"Failed to parse wind data: {e}")
 
-    label, feasible, note = _classify(avg_speed)
-
-    return {
-        "status": "ok",
-        "data": {
-            "avg_wind_speed_ms": round(avg_speed, 2),
-            "hub_height_m": HUB_HEIGHT,
-            "classification": label,
-            "feasible": feasible,
-            "note": note,
-        },
-    }
+    return _wind_result(avg_speed, "nrel")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+"""Tests for server.utils.battery (vectorized dispatch and battery economics)."""
+import numpy as np
+import pytest
+from server.utils.battery import (
+    BATTERY_POWER_RATIO,
+    dispatch_battery,
+    evaluate_battery_sizes,
+)
+from server.utils.constants import FEDERAL_ITC
+from server.utils.hourly import EXAMPLE_TOU_SCHEDULE, load_profile, production_profile, rate_vector
+
+
+def _reference_self_consumption(surplus, rates, credit, capacity, rte):
+    """Hour-by-hour scalar dispatch for one scenario and one size."""
+    power, soc, value = capacity * BATTERY_POWER_RATIO, 0.0, 0.0
+    for s, rate, export_credit in zip(surplus.tolist(), rates.tolist(), credit.tolist()):
+        if s > 0:
+            stored = min(s * rte, power * rte, capacity - soc)
+            soc += stored
+            value -= stored / rte * export_credit
+        elif s < 0:
+            out = min(-s, power, soc)
+            soc -= out
+            value += out * rate
+    return value
+
+
+@pytest.fixture(scope="module")
+def profiles():
+    production = production_profile(37.0, np.array([8_000.0, 11_000.0, 14_000.0]))
+    return production, load_profile(10_500)
+
+
+def test_dispatch_matches_scalar_reference(profiles):
+    production, load = profiles
+    rates = rate_vector(EXAMPLE_TOU_SCHEDULE)
+    out = dispatch_battery(production, load, rates, [5.0, 13.5], export_rule="net_billing", export_rate=0.05)
+    assert out["annual_savings"].shape == (2, 3)
+    surplus = production[1] - load
+    expected = _reference_self_consumption(surplus, rates, np.full(rates.size, 0.05), 13.5, 0.9)
+    assert out["annual_savings"][1, 1] == pytest.approx(expected)
+
+
+def test_dispatch_value_grows_with_capacity_under_net_billing(profiles):
+    production, load = profiles
+    out = dispatch_battery(production, load, rate_vector(0.16), [0.0, 5.0, 10.0, 20.0], export_rule="net_billing")
+    savings = out["annual_savings"]
+    assert (savings[0] == 0).all()
+    assert (np.diff(savings, axis=0) >= 0).all()
+    assert (out["equivalent_cycles"][1:] > 100).all()
+
+
+def test_flat_net_metering_makes_self_consumption_lose_money(profiles):
+    production, load = profiles
+    out = dispatch_battery(production, load, rate_vector(0.16), [10.0])
+    # exports already earn retail, so storing them only adds round-trip losses; the
+    # oversized arrays' bills are floored at zero either way
+    assert out["annual_savings"][0, 0] < 0
+    assert (out["annual_savings"][0, 1:] == 0).all()
+
+
+def test_tou_arbitrage_charges_from_grid(profiles):
+    production, load = profiles
+    rates = rate_vector(EXAMPLE_TOU_SCHEDULE)
+    arbitrage = dispatch_battery(
+        production, load, rates, [13.5], strategy="tou_arbitrage", export_rule="net_billing",
+    )
+    assert (arbitrage["grid_charged_kwh"] > 0).all()
+    assert (arbitrage["annual_savings"] > 0).all()
+    with pytest.raises(ValueError):
+        dispatch_battery(production, load, rates, [13.5], strategy="peak_shaving")
+
+
+def test_evaluate_battery_sizes_applies_itc_and_rebates(profiles):
+    production, load = profiles
+    out = evaluate_battery_sizes(
+        production, load, rate_vector(EXAMPLE_TOU_SCHEDULE), [0.0, 10.0],
+        flat_rebates=1_000, strategy="tou_arbitrage", years=15,
+    )
+    assert out["net_cost"][0].tolist() == [0.0, 0.0, 0.0]
+    assert out["net_cost"][1, 0] == pytest.approx((10 * 1000 + 2000 - 1_000) * (1 - FEDERAL_ITC))
+    assert out["cumulative_savings"].shape == (2, 3, 15)
+    assert out["payback_years"].shape == (2, 3)
+    assert np.isfinite(out["npv"]).all()
@@ -93,3 +93,119 @@ def test_calculate_carbon_offset():
     assert isinstance(result, (int, float)) and result >= 0
     result_10 = calculate_carbon_offset(solar_production_kwh=10_000, years=10)
     assert result_10 >= 0
+
+
+def _loop_savings(net, production, rate, years, degradation, inflation):
+    """The original per-year loop, kept as an independent reference."""
+    cumulative, rows = -net, []
+    for year in range(1, years + 1):
+        annual = production * (1 - degradation) ** year * (rate * (1 + inflation) ** year)
+        cumulative += annual
+        rows.append((year, annual, cumulative))
+    return rows
+
+
+def test_array_versions_broadcast_and_match_scalar_loop():
+    import numpy as np
+    from server.utils.calculations import (
+        SAVINGS_COLUMNS,
+        calculate_gross_cost_array,
+        calculate_net_cost_array,
+        calculate_savings_over_time_array,
+    )
+
+    sizes = np.array([4.0, 8.0, 12.0])[:, None, None]
+    rates = np.array([0.12, 0.18])[None, :, None]
+    degradation = np.array([0.004, 0.006, 0.008, 0.01])[None, None, :]
+    entries = [{"pct": 0.10, "cap": 1500}, {"pct": 0.05}]
+
+    net = calculate_net_cost_array(calculate_gross_cost_array(sizes), 1000, state_itc_entries=entries)
+    columns = calculate_savings_over_time_array(net, 11_000, rates, 15, degradation, 0.03)
+    assert tuple(columns) == SAVINGS_COLUMNS
+    assert columns["cumulative_savings"].shape == (3, 2, 4, 15)
+
+    for i, j, k in np.ndindex(3, 2, 4):
+        scalar_net = calculate_net_cost(calculate_gross_cost(float(sizes[i, 0, 0])), 1000, state_itc_entries=entries)
+        assert net[i, 0, 0] == scalar_net
+        expected = _loop_savings(scalar_net, 11_000, float(rates[0, j, 0]), 15, float(degradation[0, 0, k]), 0.03)
+        rows = zip(columns["year"].tolist(), *(columns[key][i, j, k].tolist() for key in SAVINGS_COLUMNS[1:]))
+        assert list(rows) == expected
+
+
+def test_power_table_matches_python_pow_bit_for_bit():
+    import numpy as np
+    from server.utils.calculations import _power_table
+
+    rng = np.random.default_rng(0)
+    bases = np.concatenate([1 + rng.normal(0.025, 0.01, 8000), 1 - np.abs(rng.normal(0.005, 0.001, 8000))])
+    table = _power_table(bases, 25)
+    expected = [[b ** float(y) for y in range(1, 26)] for b in bases.tolist()]
+    assert table.tolist() == expected
+
+
+def test_calculate_net_cost_array_stacks_itc_entries():
+    import numpy as np
+    from server.utils.calculations import calculate_net_cost_array
+
+    gross = np.array([10_000.0, 30_000.0, 60_000.0])
+    entries = [{"pct": 0.15, "cap": 1000}, {"pct": np.array([0.0, 0.05, 0.1])}]
+    out = calculate_net_cost_array(gross, state_itc_entries=entries)
+    expected = [calculate_net_cost(g, state_itc_entries=[entries[0], {"pct": p}]) for g, p in zip(gross, [0.0, 0.05, 0.1])]
+    assert out.tolist() == expected
+
+
+def test_calculate_payback_and_carbon_arrays():
+    import numpy as np
+    from server.utils.calculations import calculate_carbon_offset_array, calculate_payback_array
+
+    production = np.array([0.0, 8_000.0, 12_000.0])
+    assert calculate_payback_array(20_000, production, 0.16).tolist() == [
+        calculate_payback(20_000, p, 0.16) for p in production
+    ]
+    carbon = calculate_carbon_offset_array(production[:, None], 20, np.array([0.004, 0.006]))
+    assert carbon.shape == (3, 2)
+    assert carbon[2, 1] == calculate_carbon_offset(12_000, 20, panel_degradation=0.006)
+
+
+@pytest.mark.parametrize("net, production, rate, degradation, inflation", [
+    (20_000, 10_000, 0.16, 0.005, 0.03),
+    (35_000, 8_000, 0.12, 0.01, 0.0),
+    (15_000, 12_000, 0.20, 0.0, 0.0),
+    (90_000, 6_000, 0.10, 0.02, 0.0),
+])
+def test_closed_form_matches_iterative(net, production, rate, degradation, inflation):
+    import numpy as np
+    from server.utils.calculations import (
+        calculate_carbon_offset_closed_form,
+        calculate_cumulative_savings_closed_form,
+        calculate_exact_payback,
+    )
+
+    rows = calculate_savings_over_time(net, production, rate, 30, degradation, inflation)
+    iterative = np.array([row["cumulative_savings"] for row in rows])
+    closed = calculate_cumulative_savings_closed_form(net, production, rate, np.arange(1, 31), degradation, inflation)
+    assert np.allclose(closed, iterative, rtol=1e-12, atol=1e-6)
+
+    for years in (1, 10, 20, 30):
+        assert calculate_carbon_offset_closed_form(production, years, degradation) == pytest.approx(
+            calculate_carbon_offset(production, years, panel_degradation=degradation), abs=0.01,
+        )
+
+    payback = float(calculate_exact_payback(net, production, rate, degradation, inflation))
+    crossing = next((row["year"] for row in rows if row["cumulative_savings"] >= 0), None)
+    if crossing is None:
+        assert payback > 30
+    else:
+        assert crossing - 1 < payback <= crossing
+        assert float(calculate_cumulative_savings_closed_form(
+            net, production, rate, payback, degradation, inflation,
+        )) == pytest.approx(0, abs=1e-6)
+
+
+def test_exact_payback_edge_cases():
+    from server.utils.calculations import calculate_exact_payback
+
+    assert calculate_exact_payback(0, 10_000, 0.16) == 0
+    assert calculate_exact_payback(20_000, 0, 0.16) == float("inf")
+    # savings decay faster than they can repay the cost
+    assert calculate_exact_payback(1_000_000, 10_000, 0.16, 0.05, 0.0) == float("inf")
@@ -0,0 +1,64 @@
+"""Tests for server.utils.columnar (columnar results and JSON encoding)."""
+import json
+
+import numpy as np
+import server.utils.columnar as columnar
+from server.utils.calculations import calculate_savings_over_time, calculate_savings_over_time_array
+from server.utils.columnar import dumps, to_rows
+
+
+def test_to_rows_rebuilds_legacy_savings_rows():
+    columns = calculate_savings_over_time_array(17_000, 11_000, 0.16, 20)
+    assert to_rows(columns) == calculate_savings_over_time(17_000, 11_000, 0.16, 20)
+
+
+def test_dumps_encodes_numpy_at_any_depth(monkeypatch):
+    payload = {
+        "bands": {"50": np.arange(3, dtype=np.float64) / 4},
+        "strided": np.arange(6.0).reshape(2, 3)[:, 1],
+        "count": np.int64(7),
+        "rows": [{"mean": np.float64(1.5)}],
+        "gaps": np.array([1.0, np.nan]),
+    }
+    expected = {
+        "bands": {"50": [0.0, 0.25, 0.5]}, "strided": [1.0, 4.0], "count": 7, "rows": [{"mean": 1.5}],
+        "gaps": [1.0, None],
+    }
+    assert json.loads(dumps(payload)) == expected
+    monkeypatch.setattr(columnar, "orjson", None)
+    assert json.loads(dumps(payload)) == expected
+
+
+def test_dumps_writes_non_finite_floats_as_null(monkeypatch):
+    from server.utils.calculations import calculate_payback
+
+    payload = {
+        "payback_years": calculate_payback(17_000, 0),  # no savings, no payback
+        "nan": float("nan"),
+        "scalars": [np.float64("-inf"), np.float32("inf")],
+        "columns": np.array([1.0, np.inf]),
+    }
+    assert payload["payback_years"] == float("inf")
+    expected = {"payback_years": None, "nan": None, "scalars": [None, None], "columns": [1.0, None]}
+    assert json.loads(dumps(payload)) == expected
+    monkeypatch.setattr(columnar, "orjson", None)
+    assert json.loads(dumps(payload)) == expected
+
+
+def test_report_layout_defaults_to_rows(client, monkeypatch):
+    import sys
+
+    report = sys.modules["routers.report"]  # the module instance the app's router uses
+
+    async def none(*args):
+        return None
+
+    for fetch in ("_fetch_solar", "_fetch_incentives", "_fetch_wind", "_fetch_geothermal"):
+        monkeypatch.setattr(report, fetch, none)
+    monkeypatch.setattr(report, "plot_savings_fan_chart", lambda data: "")
+    params = {"lat": 39.75, "lon": -104.99, "state_abbrev": "CO", "zip": "80202", "n_simulations": 100}
+
+    rows = client.get("/api/report", params=params).json()["deterministic"]["savings_by_year"]
+    columns = client.get("/api/report", params={**params, "layout": "columnar"}).json()["deterministic"]["savings_by_year"]
+    assert rows[0]["year"] == 1 and len(rows) == 20
+    assert [row["cumulative_savings"] for row in rows] == columns["cumulative_savings"]
@@ -0,0 +1,62 @@
+"""Tests for server.utils.draw_bank (memory-mapped draw bank and bank sampling)."""
+import numpy as np
+import pytest
+from server.utils.columnar import dumps
+from server.utils.draw_bank import build_draw_bank, load_draw_bank, take_window
+from server.utils.monte_carlo import run_simulation
+
+
+@pytest.fixture
+def bank(tmp_path, monkeypatch):
+    path = build_draw_bank(tmp_path / "bank.npy", size=50_000, seed=3)
+    monkeypatch.setenv("SIMULATION_DRAW_BANK", str(path))
+    return path
+
+
+def test_build_draw_bank_is_standard_normal(bank):
+    draws = load_draw_bank(bank)
+    assert draws.shape == (50_000,)
+    assert abs(draws.mean()) < 0.02
+    assert draws.std() == pytest.approx(1.0, abs=0.02)
+
+
+def test_take_window_wraps_around(bank):
+    draws = load_draw_bank(bank)
+    window = take_window(draws, 49_990, 20)
+    assert np.array_equal(window, np.concatenate([draws[49_990:], draws[:10]]))
+
+
+def test_run_simulation_bank_sampling_is_seeded(bank):
+    out = run_simulation(8.0, n=500, seed=6, sampling="bank")
+    assert out["sampling"] == "bank"
+    assert dumps(run_simulation(8.0, n=500, seed=6, sampling="bank")) == dumps(out)
+    assert dumps(run_simulation(8.0, n=500, seed=7, sampling="bank")) != dumps(out)
+
+
+def test_run_simulation_bank_sampling_requires_bank(tmp_path, monkeypatch):
+    monkeypatch.setenv("SIMULATION_DRAW_BANK", str(tmp_path / "missing.npy"))
+    with pytest.raises(ValueError):
+        run_simulation(8.0, n=10, sampling="bank")
+
+
+def test_bank_sampling_never_reuses_draws(bank, monkeypatch):
+    from server.utils import monte_carlo
+    with pytest.raises(ValueError, match="draw bank holds"):
+        run_simulation(8.0, n=3000, seed=6, sampling="bank")  # 3000 * 23 draws > 50k
+    sampler = monte_carlo._Sampler(np.random.default_rng(0), 20, "bank")
+    sampler.normals(2000)
+    with pytest.raises(ValueError, match="draw bank holds"):
+        sampler.normals(200)
+
+    # shards take adjacent windows, so the sharded run is the same for any worker count
+    monkeypatch.setattr(monte_carlo, "SHARD_SIZE", 500)
+    out = run_simulation(8.0, n=1500, seed=6, sampling="bank")
+    assert dumps(run_simulation(8.0, n=1500, seed=6, sampling="bank", workers=2)) == dumps(out)
+
+
+def test_simulate_endpoints_report_missing_bank(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("SIMULATION_DRAW_BANK", str(tmp_path / "missing.npy"))
+    r = client.post("/api/simulate", params={"system_size_kw": 8.0, "sampling": "bank", "n_simulations": 10})
+    assert r.status_code == 400 and "utils.draw_bank build" in r.json()["detail"]
+    r = client.post("/api/simulate/batch", json={"configs": [{"system_size_kw": 8.0}], "sampling": "bank"})
+    assert r.status_code == 400 and "utils.draw_bank build" in r.json()["detail"]
@@ -0,0 +1,62 @@
+"""Tests for /api/emissions/bulk: JSON and streamed CSV bodies."""
+from server.utils.zip_region import REGION_CO2_LBS_PER_MWH, get_region
+
+
+def test_bulk_json(client):
+    r = client.post("/api/emissions/bulk", json={"zips": ["80202", 2139, "abc", "123456", "02139-1234", " 2139"]})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == 6
+    assert data["zip"] == ["80202", "02139", None, None, "02139", "02139"]
+    assert data["region"] == ["RMPA", get_region("02139"), None, None, get_region("02139"), get_region("02139")]
+    assert data["co2_lbs_per_mwh"][0] == REGION_CO2_LBS_PER_MWH["RMPA"]
+    assert data["co2_lbs_per_mwh"][2:4] == [None, None]
+
+
+def test_bulk_csv_body(client):
+    body = 'zip,name\n80202,a\n"02139"\n10001-1234,b\nxyz\n  2139\n'
+    r = client.post("/api/emissions/bulk", content=body, headers={"content-type": "text/csv"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    lines = r.text.splitlines()
+    assert lines[0] == "zip,region,co2_lbs_per_mwh"
+    assert lines[1] == f"80202,RMPA,{REGION_CO2_LBS_PER_MWH['RMPA']}"
+    assert lines[2].startswith("02139,") and lines[3].startswith("10001,")
+    assert lines[4] == ",,"
+    assert lines[5] == lines[2]
+
+    # a header with digits in it is still a header; a first row that is a zip is not
+    r = client.post("/api/emissions/bulk", content="zip5\n80202\n", headers={"content-type": "text/csv"})
+    assert r.text.splitlines()[1:] == [lines[1]]
+    r = client.post("/api/emissions/bulk", content="80202\n", headers={"content-type": "text/csv"})
+    assert r.text.splitlines()[1:] == [lines[1]]
+
+
+def test_bulk_json_as_csv_matches_single_lookups(client):
+    zips = [str(z).zfill(5) for z in range(0, 100_000, 97)]
+    r = client.post("/api/emissions/bulk", json=zips, params={"output": "csv"})
+    rows = [line.split(",") for line in r.text.splitlines()[1:]]
+    assert len(rows) == len(zips)
+    assert [region or None for _, region, _ in rows] == [get_region(z) for z in zips]
+
+
+def test_bulk_rejects_bad_bodies(client):
+    assert client.post("/api/emissions/bulk", content=b"not json").status_code == 400
+    assert client.post("/api/emissions/bulk", json={"zip": "80202"}).status_code == 400
+    assert client.post("/api/emissions/bulk", json=[["02139"], ["10001"]]).status_code == 400
+    assert client.post("/api/emissions/bulk", json=[["02139"], "10001"]).status_code == 400
+    assert client.post(
+        "/api/emissions/bulk", content="80202\n", headers={"content-type": "text/csv"}, params={"output": "json"}
+    ).status_code == 400
+
+
+def test_bulk_csv_is_size_limited(client, monkeypatch):
+    import sys
+
+    emissions = sys.modules["routers.emissions"]  # the module instance the app's router uses
+    monkeypatch.setattr(emissions, "MAX_CSV_ZIPS", 3)
+    headers = {"content-type": "text/csv"}
+    assert client.post("/api/emissions/bulk", content="zip\n1\n2\n3\n", headers=headers).status_code == 200
+    assert client.post("/api/emissions/bulk", content="1\n2\n3\n4\n", headers=headers).status_code == 400
+    monkeypatch.setattr(emissions, "MAX_CSV_BYTES", 10)
+    assert client.post("/api/emissions/bulk", content="80202\n" * 3, headers=headers).status_code == 400
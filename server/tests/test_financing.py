@@ -0,0 +1,79 @@
+"""Tests for server.utils.financing (financing options over Monte Carlo savings paths)."""
+import numpy as np
+import pytest
+from server.utils.financing import (
+    CREDIT_TIERS,
+    LOAN_TERMS,
+    evaluate_financing,
+    financing_options,
+    run_financing,
+)
+
+
+def _paths(n=4, years=20):
+    rng = np.random.default_rng(0)
+    net = rng.uniform(15_000, 25_000, n)
+    production = rng.uniform(9_000, 11_000, (n, years))
+    return net, production, production * 0.16
+
+
+def test_loan_payment_matches_amortization_formula():
+    net, production, savings = _paths()
+    out = evaluate_financing(net, production, savings, [{"type": "loan", "term_years": 15, "apr_pct": 7.5}])
+    r, m = 0.075 / 12, 180
+    expected = net * r * (1 + r) ** m / ((1 + r) ** m - 1)
+    assert out["monthly_payment"][0] == pytest.approx(expected)
+    assert out["net_benefit"][0] == pytest.approx(savings.sum(axis=1) - 12 * 15 * expected)
+
+
+def test_long_loan_charges_remaining_balance_at_horizon():
+    net, production, savings = _paths(years=10)
+    out = evaluate_financing(net, production, savings, [{"type": "loan", "term_years": 20, "apr_pct": 0.0}])
+    # interest-free: half the principal is still owed after 10 of 20 years
+    assert out["monthly_payment"][0] == pytest.approx(net / 240)
+    assert out["net_benefit"][0] == pytest.approx(savings.sum(axis=1) - net)
+
+
+def test_options_keep_caller_order_and_cash_matches_savings():
+    net, production, savings = _paths()
+    options = [
+        {"type": "ppa", "rate_per_kwh": 0.1, "escalator": 0.0, "term_years": 20},
+        {"type": "cash"},
+        {"type": "lease", "monthly_payment": 100.0, "escalator": 0.0, "term_years": 20},
+    ]
+    out = evaluate_financing(net, production, savings, options)
+    assert out["net_benefit"][1] == pytest.approx(savings.sum(axis=1) - net)
+    assert out["monthly_payment"][0] == pytest.approx(production[:, 0] * 0.1 / 12)
+    assert (out["monthly_payment"][2] == 100.0).all()
+    assert (out["cash_flow_positive_months"][1] == 240).all()
+    with pytest.raises(ValueError):
+        evaluate_financing(net, production, savings, [{"type": "balloon"}])
+
+
+def test_run_financing_default_grid():
+    result = run_financing(8.0, 11_000, 0.16, n=200, seed=3)
+    options = result["options"]
+    assert len(options) == 1 + len(LOAN_TERMS) * len(CREDIT_TIERS) + 2
+    assert len(financing_options(8.0)) == len(options)
+    cash = options[0]
+    assert cash["prob_positive_benefit"] == 1.0
+    loans = [o for o in options if o["type"] == "loan"]
+    # cheaper money leaves more of the savings with the homeowner
+    assert loans[0]["net_benefit"]["mean"] > loans[len(CREDIT_TIERS) - 1]["net_benefit"]["mean"]
+    assert run_financing(8.0, 11_000, 0.16, n=200, seed=3) == result
+
+
+def test_invalid_loans_are_rejected(client):
+    net, production, savings = _paths()
+    for bad in ({"term_years": 0, "apr_pct": 6.0}, {"term_years": 10, "apr_pct": -1.0}):
+        with pytest.raises(ValueError):
+            evaluate_financing(net, production, savings, [{"type": "loan", **bad}])
+    with pytest.raises(ValueError):
+        financing_options(8.0, loan_terms=[0])
+    r = client.post("/api/simulate/financing", json={"system_size_kw": 8.0, "loan_terms": [0], "n_simulations": 50})
+    assert r.status_code == 400
+    r = client.post(
+        "/api/simulate/financing",
+        json={"system_size_kw": 8.0, "options": [{"type": "loan", "term_years": 10, "apr_pct": -2}], "n_simulations": 50},
+    )
+    assert r.status_code == 400
@@ -0,0 +1,84 @@
+import sys
+
+import numpy as np
+import pytest
+
+from server.utils.gazetteer import Gazetteer, read_source, state_for_zip
+
+SOURCE = (
+    "GEOID\tALAND\tAWATER\tALAND_SQMI\tAWATER_SQMI\tINTPTLAT\tINTPTLONG      \n"
+    "80202\t3000000\t0\t1.2\t0\t39.7525\t-104.9995\n"
+    "10001\t1600000\t0\t0.6\t0\t40.7506\t-73.9972\n"
+    "02139\t4700000\t0\t1.8\t0\t42.3647\t-71.1042\n"
+    "94103\t5800000\t0\t2.2\t0\t37.7725\t-122.4147\n"
+)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "zcta.txt"
+    path.write_text(SOURCE)
+    return path
+
+
+def test_state_for_zip_from_prefix():
+    assert state_for_zip("80202") == "CO"
+    assert state_for_zip("2139") == "MA"
+    assert state_for_zip("73301") == "TX"
+    assert state_for_zip("96201") is None  # military
+    assert state_for_zip("abc") is None
+
+
+def test_nearest_and_centroid(source, tmp_path):
+    gazetteer = read_source(source)
+    near = gazetteer.nearest(39.70, -105.00)
+    assert near["zip"] == "80202" and near["state_abbrev"] == "CO" and near["region"] == "RMPA"
+    assert near["distance_km"] == pytest.approx(5.8, abs=0.1)
+    assert gazetteer.nearest(39.70, -105.00, max_distance_km=5.0) is None
+
+    index, distance = gazetteer.nearest_many(np.array([40.7, 37.8]), np.array([-74.0, -122.4]))
+    assert gazetteer.zips[index].tolist() == ["10001", "94103"]
+    assert np.all(distance < 10)
+
+    assert gazetteer.centroid("2139")["lat"] == 42.3647
+    assert gazetteer.centroid("99999") is None
+
+    gazetteer.save(tmp_path / "gazetteer.npz")
+    loaded = Gazetteer.load(tmp_path / "gazetteer.npz")
+    assert loaded.nearest(39.70, -105.00) == near
+
+
+def test_read_source_requires_coordinates(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("zip,state\n80202,CO\n")
+    with pytest.raises(ValueError, match="lat, lon"):
+        read_source(path)
+
+
+def test_geocode_endpoint_and_report_location(client, source, tmp_path, monkeypatch):
+    from fastapi import HTTPException
+
+    monkeypatch.setenv("GAZETTEER_PATH", str(tmp_path / "missing.npz"))
+    assert client.get("/api/geocode", params={"zip": "80202"}).status_code == 503
+
+    read_source(source).save(tmp_path / "gazetteer.npz")
+    monkeypatch.setenv("GAZETTEER_PATH", str(tmp_path / "gazetteer.npz"))
+    assert client.get("/api/geocode", params={"zip": "80202"}).json()["lon"] == -104.9995
+    assert client.get("/api/geocode", params={"lat": 42.36, "lon": -71.1}).json()["zip"] == "02139"
+    assert client.get("/api/geocode", params={"zip": "99999"}).status_code == 404
+    assert client.get("/api/geocode", params={"lat": 19.43, "lon": -99.13}).status_code == 404  # Mexico City
+    assert client.get("/api/geocode").status_code == 400
+
+    resolve = sys.modules["routers.report"]._resolve_location
+    assert resolve(None, None, None, "80202") == {
+        "lat": 39.7525, "lon": -104.9995, "state_abbrev": "CO", "zip": "80202", "derived": ["lat_lon", "state_abbrev"],
+        "distance_km": None,
+    }
+    derived = resolve(40.75, -74.0, None, None)
+    assert derived["zip"] == "10001" and derived["distance_km"] == pytest.approx(0.3, abs=0.1)
+    with pytest.raises(HTTPException) as offshore:
+        resolve(38.0, -70.0, None, None)
+    assert offshore.value.status_code == 400 and "km" in offshore.value.detail
+    assert resolve(1.0, 2.0, "NY", "10001")["derived"] == []
+    with pytest.raises(HTTPException):
+        resolve(None, None, None, "99999")
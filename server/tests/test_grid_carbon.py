@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from server.utils.calculations import (
+    calculate_carbon_offset,
+    calculate_carbon_offset_closed_form,
+    get_co2_lbs_per_kwh,
+)
+from server.utils.grid_carbon import (
+    MAX_TABLE_YEARS,
+    NATIONAL,
+    carbon_region,
+    cumulative_carbon_weight,
+    emission_trajectory,
+)
+
+
+def _direct_weight(zip_code, degradation, years):
+    production = (1 - degradation) ** np.arange(1, years + 1)
+    return float(production @ emission_trajectory(zip_code, years))
+
+
+def test_trajectory_starts_at_region_factor_and_declines():
+    for zip_code in ("80202", None):
+        trajectory = emission_trajectory(zip_code, 20)
+        assert trajectory.shape == (20,)
+        assert trajectory[0] == pytest.approx(get_co2_lbs_per_kwh(zip_code))
+        assert np.all(np.diff(trajectory) < 0)
+    assert carbon_region(None) == NATIONAL
+    assert carbon_region("00000") == NATIONAL
+    # horizons past the table continue the same curve
+    long = emission_trajectory("80202", MAX_TABLE_YEARS + 10)
+    assert np.allclose(long[:MAX_TABLE_YEARS], emission_trajectory("80202", MAX_TABLE_YEARS))
+
+
+@pytest.mark.parametrize("degradation", [0.0, 0.005, 0.00525, 0.0137, 0.03])
+@pytest.mark.parametrize("years", [1, 20, 30])
+def test_weight_table_matches_direct_sum(degradation, years):
+    weight = float(cumulative_carbon_weight("80202", degradation, years))
+    # linear interpolation between 0.05% buckets is off by a few parts per million
+    assert weight == pytest.approx(_direct_weight("80202", degradation, years), rel=1e-5)
+
+
+def test_weight_outside_table_uses_geometric_series():
+    degradation = np.array([0.005, 0.05, 0.005])
+    years = np.array([60.0, 20.0, 12.5])
+    weight = cumulative_carbon_weight(None, degradation, years)
+    assert weight[0] == pytest.approx(_direct_weight(None, 0.005, 60), rel=1e-12)
+    assert weight[1] == pytest.approx(_direct_weight(None, 0.05, 20), rel=1e-12)
+    assert _direct_weight(None, 0.005, 12) < weight[2] < _direct_weight(None, 0.005, 13)
+
+
+def test_carbon_offset_follows_decarbonizing_grid():
+    static = 10_000 * sum((1 - 0.005) ** y for y in range(1, 21)) * get_co2_lbs_per_kwh("80202") / 2000
+    carbon = calculate_carbon_offset(10_000, 20, zip_code="80202")
+    assert carbon < static
+    assert float(calculate_carbon_offset_closed_form(10_000, 20, zip_code="80202")) == pytest.approx(carbon, abs=0.01)
@@ -0,0 +1,77 @@
+"""Tests for server.utils.hourly (8760 profiles and TOU billing)."""
+import numpy as np
+import pytest
+from server.utils.calculations import calculate_savings_over_time
+from server.utils.hourly import (
+    EXAMPLE_TOU_SCHEDULE,
+    HOURS_PER_YEAR,
+    hourly_bill,
+    hourly_savings,
+    load_profile,
+    production_profile,
+    rate_vector,
+)
+
+
+def test_profiles_hit_annual_and_monthly_totals():
+    annual = np.array([8_000.0, 12_000.0])
+    production = production_profile(35.0, annual)
+    assert production.shape == (2, HOURS_PER_YEAR)
+    assert production.sum(axis=1) == pytest.approx(annual)
+    # no output at midnight, most around solar noon
+    assert production[:, ::24].max() == 0
+    monthly = [400, 500, 700, 900, 1000, 1100, 1100, 1000, 800, 600, 450, 350]
+    assert production_profile(35.0, monthly_kwh=monthly).sum() == pytest.approx(sum(monthly))
+    assert load_profile(10_500).sum() == pytest.approx(10_500)
+
+
+def test_monthly_profile_spreads_months_without_sun():
+    from server.utils.hourly import MONTH
+
+    monthly = np.full(12, 100.0)
+    with np.errstate(all="raise"):
+        production = production_profile(75.0, monthly_kwh=monthly)  # no sun in December
+    assert np.isfinite(production).all()
+    assert np.bincount(MONTH - 1, weights=production, minlength=12) == pytest.approx(monthly)
+    december = production[MONTH == 12]
+    assert december == pytest.approx(np.full(december.size, 100.0 / december.size))
+
+
+def test_rate_vector_applies_tou_periods():
+    rates = rate_vector(EXAMPLE_TOU_SCHEDULE)
+    assert rates.shape == (HOURS_PER_YEAR,)
+    peak = EXAMPLE_TOU_SCHEDULE["periods"][0]["rate"]
+    assert rates[17] == peak  # Monday Jan 1, 5pm
+    assert rates[5 * 24 + 17] == EXAMPLE_TOU_SCHEDULE["default"]  # Saturday
+    assert rates[12] == EXAMPLE_TOU_SCHEDULE["default"]
+    with pytest.raises(ValueError):
+        rate_vector(np.ones(24))
+
+
+def test_net_metering_at_flat_rate_matches_annual_product():
+    production = production_profile(40.0, 8_000)
+    bill = hourly_bill(production, load_profile(10_500), rate_vector(0.16))
+    assert bill["annual_savings"] == pytest.approx(8_000 * 0.16)
+    assert bill["self_consumed_kwh"] + bill["exported_kwh"] == pytest.approx(8_000)
+
+
+def test_net_billing_and_tou_value_exports_less():
+    production = production_profile(40.0, np.array([6_000.0, 10_000.0, 14_000.0]))
+    load = load_profile(10_500)
+    metering = hourly_bill(production, load, rate_vector(0.16), "net_metering")
+    billing = hourly_bill(production, load, rate_vector(0.16), "net_billing")
+    assert (billing["annual_savings"] < metering["annual_savings"]).all()
+    # solar peaks before the evening TOU window, so its energy is worth less than flat
+    tou = hourly_bill(production, load, rate_vector(EXAMPLE_TOU_SCHEDULE), "net_metering")
+    assert (tou["annual_savings"] < metering["annual_savings"]).all()
+    with pytest.raises(ValueError):
+        hourly_bill(production, load, rate_vector(0.16), "feed_in")
+
+
+def test_hourly_savings_feed_savings_over_time():
+    first_year = float(hourly_savings(40.0, 9_000, 10_500, EXAMPLE_TOU_SCHEDULE, "net_billing"))
+    rows = calculate_savings_over_time(20_000, years=10, hourly_savings=first_year)
+    assert len(rows) == 10
+    for row in rows:
+        assert row["annual_savings"] == pytest.approx(first_year * (0.995 * 1.03) ** row["year"])
+    assert rows[-1]["cumulative_savings"] == pytest.approx(-20_000 + sum(row["annual_savings"] for row in rows))
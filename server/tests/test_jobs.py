@@ -0,0 +1,102 @@
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from server.utils import jobs
+from server.utils.columnar import dumps
+from server.utils.jobs import JobManager, JobStore, execute_job
+from server.utils.monte_carlo import run_simulation
+
+PARAMS = {"system_size_kw": 8.0, "years": 20, "n": 3000, "seed": 3, "chunk_size": 1000}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        yield JobManager(JobStore(tmp_path), executor)
+
+
+def test_simulation_job_matches_streaming_run_and_persists(manager, tmp_path):
+    record = manager.submit("simulation", PARAMS)
+    assert record["status"] == "queued"
+    done = manager.wait(record["id"], timeout=60)
+    assert done["status"] == "succeeded"
+    assert done["progress"] == 1.0 and done["paths_done"] == 3000
+
+    expected = json.loads(dumps(run_simulation(8.0, years=20, n=3000, seed=3, chunk_size=1000)))
+    assert done["result"] == expected
+    # a fresh store over the same directory (e.g. after a restart) still has it
+    assert JobStore(tmp_path).read(record["id"])["result"] == expected
+    assert [entry["id"] for entry in JobStore(tmp_path).list()] == [record["id"]]
+
+
+def test_cancel_mid_run_keeps_partial_percentiles(tmp_path, monkeypatch):
+    store = JobStore(tmp_path)
+    record = {"id": "job-1", "kind": "simulation", "status": "queued", "params": PARAMS, **jobs._owner_fields(),
+              "created_at": 0.0, "partial": None, "result": None}
+    store.write(record)
+    checks = iter([False, False, True])
+    monkeypatch.setattr(jobs, "PROGRESS_INTERVAL", 0.0)
+    monkeypatch.setattr(JobStore, "cancel_requested", lambda self, job_id: next(checks, True))
+
+    assert execute_job(str(tmp_path), "job-1") == "cancelled"
+    stored = json.loads((tmp_path / "job-1.json").read_bytes())
+    assert stored["status"] == "cancelled"
+    assert stored["paths_done"] == 1000 and stored["progress"] == pytest.approx(1 / 3, abs=1e-4)
+    assert stored["partial"]["n_simulations"] == 1000
+    assert set(stored["partial"]["net_cost"]) == {"mean", "std", "percentiles", "percentile_error"}
+    assert stored["result"] is None
+
+
+def test_job_of_dead_owner_reads_as_interrupted(tmp_path):
+    child = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    store = JobStore(tmp_path)
+    store.write({"id": "orphan", "kind": "simulation", "status": "running", "owner_pid": int(child.stdout),
+                 "created_at": 0.0})
+    assert store.read("orphan")["status"] == "interrupted"
+    with pytest.raises(KeyError):
+        store.read("../orphan")
+
+
+def test_job_of_restarted_or_reused_pid_reads_as_interrupted(tmp_path):
+    store = JobStore(tmp_path)
+    owner = jobs._owner_fields()
+    store.write({"id": "mine", "kind": "simulation", "status": "running", **owner, "created_at": 0.0})
+    assert store.read("mine")["status"] == "running"
+    # same PID, earlier process (a restarted container's PID 1)
+    store.write({"id": "restarted", "kind": "simulation", "status": "running", **owner,
+                 "owner_token": "previous-boot", "created_at": 0.0})
+    assert store.read("restarted")["status"] == "interrupted"
+    # a live PID now belonging to a different process than the one that wrote the record
+    if jobs._process_started(os.getppid()) is not None:
+        store.write({"id": "reused", "kind": "simulation", "status": "running", "owner_pid": os.getppid(),
+                     "owner_token": "other", "owner_started": -1, "created_at": 0.0})
+        assert store.read("reused")["status"] == "interrupted"
+
+
+def test_jobs_endpoints(client, tmp_path, monkeypatch):
+    app_jobs = sys.modules["utils.jobs"]  # the module instance the app's router uses
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        manager = app_jobs.JobManager(app_jobs.JobStore(tmp_path), executor)
+        monkeypatch.setattr(app_jobs, "_manager", manager)
+
+        r = client.post("/api/jobs/simulate", json={"system_size_kw": 6.0, "n_simulations": 2000, "seed": 1})
+        assert r.status_code == 202
+        job_id = r.json()["job_id"]
+        manager.wait(job_id, timeout=60)
+
+        data = client.get(f"/api/jobs/{job_id}").json()
+        assert data["status"] == "succeeded"
+        assert data["result"]["n_simulations"] == 2000
+        assert client.post(f"/api/jobs/{job_id}/cancel").json()["status"] == "succeeded"
+        assert client.get("/api/jobs").json()[0]["id"] == job_id
+        for path, body in (("simulate", {"n_simulations": 0}), ("sensitivity", {"n_base": 1})):
+            r = client.post(f"/api/jobs/{path}", json={"system_size_kw": 6.0, **body})
+            assert r.status_code == 400
+
+        assert client.get("/api/jobs/missing").status_code == 404
+        assert client.post("/api/jobs/simulate", json={"system_size_kw": 6.0, "years": 0}).status_code == 400
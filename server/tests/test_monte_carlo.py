@@ -1,5 +1,6 @@
 """Tests for server.utils.monte_carlo (unit, deterministic with seed)."""
 import pytest
+from server.utils.columnar import dumps
 from server.utils.monte_carlo import run_simulation
 
 
@@ -19,3 +20,263 @@ def test_run_simulation_shape():
     assert "total_savings_20yr" in out
     assert "savings_by_year" in out
     assert len(out["savings_by_year"]["mean"]) == 15
+
+
+def _reference_paths(system_size_kw, production, rate, flat_rebates, state_itc_entries, years, n, seed, zip_code):
+    """Per-path loop in plain Python floats, as run_simulation was originally written. It
+    calls none of the calculations functions (those now wrap the array code), so it is
+    an independent reference for the vectorized kernel."""
+    import numpy as np
+    from server.utils.constants import COST_PER_WATT, FEDERAL_ITC, PERMIT_COST
+    from server.utils.grid_carbon import emission_trajectory
+    from server.utils.monte_carlo import DISTRIBUTIONS, _sample
+
+    rng = np.random.default_rng(seed)
+    inflation = _sample(rng, DISTRIBUTIONS["utility_inflation"], (n,)).tolist()
+    degradation = _sample(rng, DISTRIBUTIONS["panel_degradation"], (n,)).tolist()
+    overrun = _sample(rng, DISTRIBUTIONS["cost_overrun_pct"], (n,)).tolist()
+    prod_mult = _sample(rng, DISTRIBUTIONS["production_variability"], (n, years)).tolist()
+    co2 = emission_trajectory(zip_code, years).tolist()
+
+    gross = system_size_kw * 1000 * COST_PER_WATT + PERMIT_COST
+    net_costs, paybacks, carbons, cumulative = [], [], [], []
+    for i in range(n):
+        cost_basis = max(gross * (1 + overrun[i]) - flat_rebates, 0)
+        state_credit = sum(
+            min(cost_basis * entry["pct"], entry["cap"] if entry.get("cap") is not None else float("inf"))
+            for entry in state_itc_entries or []
+        )
+        net = cost_basis - cost_basis * FEDERAL_ITC - state_credit
+
+        balance, balances, annuals, kwh = -net, [], [], []
+        for year in range(1, years + 1):
+            produced = production * (1 - degradation[i]) ** year * prod_mult[i][year - 1]
+            annual = produced * (rate * (1 + inflation[i]) ** year)
+            balance += annual
+            balances.append(balance)
+            annuals.append(annual)
+            kwh.append(produced)
+
+        net_costs.append(net)
+        cumulative.append(balances)
+        # the kernel takes this dot product with BLAS, so its summation order is not the loop's
+        carbons.append(round(float(np.dot(kwh, co2)) / 2000, 2))
+        crossing = next((y for y, b in enumerate(balances) if b >= 0), None)
+        if crossing is None:
+            paybacks.append(years + 1)
+        else:
+            before = balances[crossing - 1] if crossing else -net
+            paybacks.append(max(crossing + -before / annuals[crossing], 0.0))
+    return {
+        "net_cost": np.array(net_costs),
+        "payback_years": np.array(paybacks, dtype=float),
+        "carbon_offset_tons": np.array(carbons),
+        "cumulative_savings": np.array(cumulative),
+    }
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(system_size_kw=8.0, production=10_000, rate=0.16, flat_rebates=0, state_itc_entries=None,
+         years=20, n=200, seed=42, zip_code=None),
+    dict(system_size_kw=10.0, production=12_000, rate=0.18, flat_rebates=2000,
+         state_itc_entries=[{"pct": 0.10, "cap": 1000}, {"pct": 0.05}],
+         years=15, n=150, seed=7, zip_code="80202"),
+])
+def test_vectorized_paths_match_scalar_loop(kwargs):
+    import numpy as np
+    from server.utils.calculations import calculate_gross_cost
+    from server.utils.grid_carbon import emission_trajectory
+    from server.utils.monte_carlo import _draw_samples, _simulate_paths
+
+    expected = _reference_paths(**kwargs)
+    samples = _draw_samples(np.random.default_rng(kwargs["seed"]), kwargs["n"], kwargs["years"])
+    paths = _simulate_paths(
+        samples,
+        gross_cost=calculate_gross_cost(kwargs["system_size_kw"]),
+        production=kwargs["production"],
+        rate=kwargs["rate"],
+        flat_rebates=kwargs["flat_rebates"],
+        state_itc_entries=kwargs["state_itc_entries"],
+        years=kwargs["years"],
+        co2_by_year=emission_trajectory(kwargs["zip_code"], kwargs["years"]),
+    )
+    for key, values in expected.items():
+        assert np.array_equal(paths[key], values), key
+
+
+def test_run_simulation_reports_financial_metrics():
+    out = run_simulation(8.0, n=500, seed=5)
+    for key in ("npv", "irr_pct", "lcoe_cents_per_kwh"):
+        assert set(out[key]) == {"mean", "std", "percentiles"}
+    # payback is interpolated within the crossing year rather than snapped to it
+    assert out["payback_years"]["percentiles"]["50"] != round(out["payback_years"]["percentiles"]["50"])
+    # a higher discount rate lowers NPV and raises LCOE; IRR does not depend on it
+    steep = run_simulation(8.0, n=500, seed=5, discount_rate=0.10)
+    assert steep["npv"]["mean"] < out["npv"]["mean"]
+    assert steep["lcoe_cents_per_kwh"]["mean"] > out["lcoe_cents_per_kwh"]["mean"]
+    assert steep["irr_pct"] == out["irr_pct"]
+
+
+def test_solve_irr_zeroes_npv():
+    import numpy as np
+    from server.utils.monte_carlo import IRR_BRACKET, _solve_irr
+
+    rng = np.random.default_rng(0)
+    savings = rng.uniform(500, 3000, (200, 20))
+    net = rng.uniform(5_000, 60_000, 200)
+    net[0] = 0.0
+    irr = _solve_irr(net, savings)
+    discounted = (savings[1:] * (1 + irr[1:, None]) ** -np.arange(1, 21)).sum(axis=1)
+    assert np.allclose(discounted, net[1:], rtol=1e-8)
+    assert irr[0] == IRR_BRACKET[1]
+    assert np.array_equal(irr[1:] < 0, savings[1:].sum(axis=1) < net[1:])
+
+
+def test_solve_irr_blocks_match_one_pass(monkeypatch):
+    import numpy as np
+    from server.utils import monte_carlo
+
+    rng = np.random.default_rng(1)
+    savings = rng.uniform(500, 3000, (3, 150, 20))
+    net = rng.uniform(5_000, 60_000, (3, 150))
+    whole = monte_carlo._solve_irr(net, savings)
+    monkeypatch.setattr(monte_carlo, "IRR_BLOCK", 64)
+    blocked = monte_carlo._solve_irr(net, savings)
+    assert blocked.shape == (3, 150)
+    assert np.allclose(blocked, whole, rtol=0, atol=1e-9)
+
+
+def test_percentiles_match_numpy():
+    import numpy as np
+    from server.utils.monte_carlo import PERCENTILES, _percentiles
+
+    rng = np.random.default_rng(2)
+    for shape, axis in (((4, 999), -1), ((3, 500, 20), -2), ((1, 1), -1)):
+        arr = rng.normal(size=shape) * 1000
+        assert np.array_equal(_percentiles(arr, axis), np.percentile(arr, PERCENTILES, axis=axis))
+    arr = rng.normal(size=(2, 50))
+    arr[1, 7] = np.nan
+    assert np.isnan(_percentiles(arr)[:, 1]).all() and not np.isnan(_percentiles(arr)[:, 0]).any()
+
+
+def test_run_simulation_streaming_shape_and_accuracy():
+    exact = run_simulation(8.0, n=4000, seed=3)
+    streamed = run_simulation(8.0, n=4000, seed=3, chunk_size=4000)
+    assert streamed["n_simulations"] == 4000
+    assert streamed["streaming"]["chunk_size"] == 4000
+    # one chunk consumes the RNG exactly like the in-memory path
+    assert streamed["net_cost"]["mean"] == pytest.approx(exact["net_cost"]["mean"], abs=0.01)
+    for p, value in exact["total_savings_20yr"]["percentiles"].items():
+        error = streamed["total_savings_20yr"]["percentile_error"][p]
+        assert streamed["total_savings_20yr"]["percentiles"][p] == pytest.approx(value, abs=error + 50)
+    assert len(streamed["savings_by_year"]["percentile_error"]["50"]) == 20
+
+
+def test_run_simulation_streaming_deterministic_with_seed():
+    a = run_simulation(8.0, n=2500, seed=9, chunk_size=1000)
+    b = run_simulation(8.0, n=2500, seed=9, chunk_size=1000)
+    assert dumps(a) == dumps(b)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 400])
+def test_run_simulation_sharded_independent_of_worker_count(monkeypatch, chunk_size):
+    from server.utils import monte_carlo
+    monkeypatch.setattr(monte_carlo, "SHARD_SIZE", 500)
+    default = run_simulation(8.0, n=1600, seed=11, chunk_size=chunk_size)
+    single = run_simulation(8.0, n=1600, seed=11, chunk_size=chunk_size, workers=1)
+    pooled = run_simulation(8.0, n=1600, seed=11, chunk_size=chunk_size, workers=2)
+    assert dumps(default) == dumps(single) == dumps(pooled)
+    assert single["n_simulations"] == 1600
+
+
+def test_run_simulation_progress_spans_shards(monkeypatch):
+    from server.utils import monte_carlo
+    monkeypatch.setattr(monte_carlo, "SHARD_SIZE", 500)
+    counts = []
+    out = run_simulation(8.0, n=1600, seed=11, chunk_size=300, progress=lambda summary: counts.append(summary.count))
+    assert counts == sorted(counts) and counts[-1] == 1600
+    assert dumps(out) == dumps(run_simulation(8.0, n=1600, seed=11, chunk_size=300, workers=2))
+
+
+@pytest.mark.parametrize("sampling", ["antithetic", "lhs", "sobol"])
+def test_run_simulation_sampling_methods(sampling):
+    out = run_simulation(8.0, n=256, seed=4, sampling=sampling)
+    assert out["sampling"] == sampling
+    assert out["n_simulations"] == 256
+    assert dumps(run_simulation(8.0, n=256, seed=4, sampling=sampling)) == dumps(out)
+
+
+def test_run_simulation_antithetic_pairs_cancel_overrun():
+    from server.utils.monte_carlo import DISTRIBUTIONS, _Sampler
+    import numpy as np
+
+    samples = _Sampler(np.random.default_rng(0), 20, "antithetic").draw(100)
+    overrun = samples["cost_overrun_pct"]
+    assert overrun[:50] + overrun[50:] == pytest.approx(2 * DISTRIBUTIONS["cost_overrun_pct"]["mean"])
+
+
+def test_run_simulation_rejects_unknown_sampling():
+    with pytest.raises(ValueError):
+        run_simulation(8.0, n=10, sampling="halton")
+
+
+def test_run_simulation_target_ci_width_stops_early():
+    out = run_simulation(8.0, n=10_000, seed=2, sampling="sobol", target_ci_width=0.05, batch_size=128)
+    convergence = out["convergence"]
+    assert convergence["converged"] is True
+    assert out["n_simulations"] == convergence["history"][-1]["n"] < 10_000
+    last = convergence["history"][-1]
+    assert last["total_savings_20yr"]["relative_width"] <= 0.05
+
+
+def test_run_simulation_target_ci_width_respects_budget():
+    out = run_simulation(8.0, n=300, seed=2, target_ci_width=1e-6, batch_size=128)
+    assert out["convergence"]["converged"] is False
+    assert out["n_simulations"] == 300
+    assert [row["n"] for row in out["convergence"]["history"]] == [128, 256, 300]
+
+
+def test_run_batch_simulation_matches_single_runs_with_common_draws():
+    from server.utils.monte_carlo import run_batch_simulation
+    configs = [
+        {"system_size_kw": 6.0, "solar_production_kwh": 8_000},
+        {"system_size_kw": 8.0, "solar_production_kwh": 10_500, "flat_rebates": 1000},
+        {"system_size_kw": 10.0, "price_per_kwh": 0.2, "state_itc_entries": [{"pct": 0.1, "cap": 500}]},
+    ]
+    out = run_batch_simulation(configs, n=300, seed=8)
+    assert out["n_simulations"] == 300
+    assert len(out["configurations"]) == 3
+    for cfg, entry in zip(configs, out["configurations"]):
+        assert dumps(entry["simulation"]) == dumps(run_simulation(**cfg, n=300, seed=8))
+    assert "paired_difference" not in out["configurations"][0]
+    diff = out["configurations"][1]["paired_difference"]
+    assert set(diff) >= {"net_cost", "total_savings_20yr", "prob_higher_savings"}
+
+
+def test_run_batch_simulation_shared_flows_match_single_runs():
+    from server.utils.monte_carlo import run_batch_simulation
+    configs = [
+        {"system_size_kw": 6.0},
+        {"system_size_kw": 8.0, "solar_production_kwh": 9_000},
+        {"system_size_kw": 8.0, "flat_rebates": 500},
+        {"system_size_kw": 10.0, "solar_production_kwh": 9_000, "state_itc_entries": [{"pct": 0.1}]},
+    ]
+    out = run_batch_simulation(configs, n=200, seed=5, baseline=1)
+    for cfg, entry in zip(configs, out["configurations"]):
+        assert dumps(entry["simulation"]) == dumps(run_simulation(**cfg, n=200, seed=5))
+
+
+def test_run_batch_simulation_paired_differences_are_tighter():
+    from server.utils.monte_carlo import run_batch_simulation
+    configs = [{"system_size_kw": 8.0}, {"system_size_kw": 8.5, "solar_production_kwh": 10_600}]
+    out = run_batch_simulation(configs, n=2000, seed=3)
+    a, b = (entry["simulation"]["total_savings_20yr"]["std"] for entry in out["configurations"])
+    paired = out["configurations"][1]["paired_difference"]["total_savings_20yr"]["std"]
+    # independent draws would give a spread of about sqrt(a^2 + b^2)
+    assert paired < 0.5 * (a ** 2 + b ** 2) ** 0.5
+
+
+def test_run_batch_simulation_rejects_bad_baseline():
+    from server.utils.monte_carlo import run_batch_simulation
+    with pytest.raises(ValueError):
+        run_batch_simulation([{"system_size_kw": 8.0}], baseline=2)
@@ -0,0 +1,56 @@
+"""Tests for server.utils.panel_optimizer and POST /api/solar/optimize."""
+import numpy as np
+import pytest
+from server.utils.calculations import (
+    calculate_carbon_offset,
+    calculate_gross_cost,
+    calculate_net_cost,
+    calculate_savings_over_time,
+)
+from server.utils.panel_optimizer import pareto_frontier, score_panel_configs
+
+CONFIGS = [{"panelsCount": k, "yearlyEnergyDcKwh": k * 420.0 * (1 - 0.002 * k)} for k in range(4, 64, 2)]
+
+
+def test_score_panel_configs_matches_scalar_calculations():
+    out = score_panel_configs(CONFIGS, panel_capacity_watts=400, price_per_kwh=0.18, flat_rebates=500)
+    assert len(out["configs"]) == len(CONFIGS)
+    row = out["configs"][5]
+    config = CONFIGS[5]
+    net = calculate_net_cost(calculate_gross_cost(config["panelsCount"] * 0.4), 500)
+    savings = calculate_savings_over_time(net, config["yearlyEnergyDcKwh"], 0.18, 20)
+    assert row["net_cost"] == round(net, 2)
+    assert row["total_savings"] == pytest.approx(savings[-1]["cumulative_savings"], abs=0.01)
+    assert row["carbon_offset_tons"] == pytest.approx(calculate_carbon_offset(config["yearlyEnergyDcKwh"]), abs=0.01)
+
+
+def test_score_panel_configs_npv_optimum_and_frontier():
+    shaded = {"panelsCount": 30, "yearlyEnergyDcKwh": 4_000.0}
+    out = score_panel_configs(CONFIGS + [shaded], panel_capacity_watts=400)
+    npvs = [row["npv"] for row in out["configs"]]
+    assert out["npv_optimal"]["npv"] == max(npvs)
+    # same cost as the unshaded 30-panel config but less energy, so dominated
+    assert out["configs"][-1]["pareto"] is False
+    assert out["pareto_frontier"] == [row["panel_count"] for row in out["configs"] if row["pareto"]]
+
+
+def test_pareto_frontier_masks_dominated_points():
+    net = np.array([10.0, 12.0, 9.0, 10.0])
+    savings = np.array([5.0, 4.0, 3.0, 5.0])
+    carbon = np.array([1.0, 1.0, 2.0, 0.5])
+    # 1 is beaten by 0 everywhere; 3 ties 0 but has less carbon
+    assert pareto_frontier(net, savings, carbon).tolist() == [True, False, True, False]
+
+
+def test_optimize_endpoint_reads_building_insights(client):
+    insights = {"solarPotential": {"panelCapacityWatts": 400, "solarPanelConfigs": CONFIGS}}
+    r = client.post("/api/solar/optimize", json={"building_insights": insights, "price_per_kwh": 0.2})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["panel_capacity_watts"] == 400
+    assert len(data["configs"]) == len(CONFIGS)
+    assert data["npv_optimal"]["panel_count"] in [c["panelsCount"] for c in CONFIGS]
+
+
+def test_optimize_endpoint_requires_configs_or_location(client):
+    assert client.post("/api/solar/optimize", json={}).status_code == 400
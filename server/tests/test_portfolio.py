@@ -0,0 +1,72 @@
+"""Tests for server.utils.portfolio (joint solar, wind and GSHP simulation)."""
+import pytest
+from server.utils.columnar import dumps
+from server.utils.monte_carlo import run_simulation
+from server.utils.portfolio import run_portfolio_simulation, wind_capacity_factor
+
+INPUTS = {"system_size_kw": 8.0, "solar_production_kwh": 11_000, "price_per_kwh": 0.16}
+
+
+def test_solar_only_portfolio_matches_run_simulation():
+    result = run_portfolio_simulation(**INPUTS, n=300, seed=5, avg_wind_speed_ms=5.5)
+    assert result["baseline"] == "solar"
+    assert dumps(result["portfolios"][0]["simulation"]) == dumps(run_simulation(**INPUTS, n=300, seed=5))
+
+
+def test_portfolios_add_up_technologies():
+    result = run_portfolio_simulation(
+        **INPUTS, n=300, seed=5, avg_wind_speed_ms=6.0, portfolios=["solar", "wind", "solar+wind", "gshp"],
+    )
+    by_label = {p["portfolio"]: p for p in result["portfolios"]}
+    combined = by_label["solar+wind"]["simulation"]["net_cost"]["mean"]
+    parts = sum(by_label[k]["simulation"]["net_cost"]["mean"] for k in ("solar", "wind"))
+    assert combined == pytest.approx(parts, abs=0.02)
+    assert by_label["gshp"]["simulation"]["lcoe_cents_per_kwh"] is None
+    assert by_label["gshp"]["simulation"]["carbon_offset_tons"]["mean"] == 0
+    assert by_label["solar+wind"]["paired_difference"]["net_cost"]["mean"] > 0
+
+
+def test_default_portfolios_skip_wind_without_speed():
+    result = run_portfolio_simulation(**INPUTS, n=100, seed=1)
+    assert [p["portfolio"] for p in result["portfolios"]] == ["solar", "solar+gshp"]
+    with pytest.raises(ValueError):
+        run_portfolio_simulation(**INPUTS, n=100, portfolios=["solar+wind"])
+    with pytest.raises(ValueError):
+        run_portfolio_simulation(**INPUTS, n=100, portfolios=["solar+hydro"])
+
+
+def test_wind_capacity_factor_rises_with_speed():
+    factors = [wind_capacity_factor(v) for v in (3.0, 5.0, 7.0)]
+    assert factors == sorted(factors)
+    assert 0.1 < wind_capacity_factor(5.0) < 0.25
+    assert wind_capacity_factor(0) == 0.0
+
+
+def test_report_financing_and_portfolio_are_opt_in_and_share_the_seed(client, monkeypatch):
+    import sys
+
+    report = sys.modules["routers.report"]  # the module instance the app's router uses
+
+    async def none(*args):
+        return None
+
+    for fetch in ("_fetch_solar", "_fetch_incentives", "_fetch_wind", "_fetch_geothermal"):
+        monkeypatch.setattr(report, fetch, none)
+    monkeypatch.setattr(report, "plot_savings_fan_chart", lambda data: "")
+    params = {"lat": 39.75, "lon": -104.99, "state_abbrev": "CO", "zip": "80202", "n_simulations": 200, "exact": True}
+
+    plain = client.get("/api/report", params=params).json()
+    assert plain["financing"] is None and plain["portfolio"] is None
+
+    compared = client.get("/api/report", params={**params, "portfolio": True, "seed": 7}).json()
+    assert compared["seed"] == 7 and compared["financing"] is None
+    solar = next(p for p in compared["portfolio"]["portfolios"] if p["portfolio"] == "solar")
+    assert solar["simulation"] == {key: compared["simulation"][key] for key in solar["simulation"]}
+
+    financed = client.get("/api/report", params={**params, "financing": True, "stable_seed": True}).json()
+    assert financed["portfolio"] is None and isinstance(financed["seed"], int)
+    again = client.get("/api/report", params={**params, "financing": True, "stable_seed": True}).json()
+    assert again["seed"] == financed["seed"] and again["financing"] == financed["financing"]
+
+    unseeded = client.get("/api/report", params={**params, "financing": True}).json()
+    assert isinstance(unseeded["seed"], int)
@@ -0,0 +1,38 @@
+"""Tests for server.utils.sensitivity (Sobol indices and tornado analysis)."""
+import pytest
+from server.utils.sensitivity import FACTOR_NAMES, sobol_indices, tornado
+
+
+def test_sobol_indices_shape_and_ranking():
+    out = sobol_indices(8.0, n_base=512, seed=1)
+    assert out["n_evaluations"] == 512 * (len(FACTOR_NAMES) + 2)
+    savings = out["outputs"]["total_savings_20yr"]["factors"]
+    assert set(savings) == set(FACTOR_NAMES)
+    # utility inflation compounds over 20 years and dominates the savings spread
+    assert max(savings, key=lambda name: savings[name]["total"]) == "utility_inflation"
+    assert sum(f["first_order"] for f in savings.values()) == pytest.approx(1.0, abs=0.15)
+
+
+def test_sobol_indices_net_cost_only_depends_on_overrun():
+    factors = sobol_indices(8.0, n_base=256, seed=2)["outputs"]["net_cost"]["factors"]
+    assert factors["cost_overrun_pct"]["total"] == pytest.approx(1.0, abs=0.05)
+    for name in ("utility_inflation", "panel_degradation", "production_variability"):
+        assert factors[name]["total"] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_sobol_indices_chunks_match_one_pass(monkeypatch):
+    from server.utils import sensitivity
+
+    whole = sobol_indices(8.0, n_base=300, seed=3)
+    monkeypatch.setattr(sensitivity, "SOBOL_CHUNK", 64)
+    assert sobol_indices(8.0, n_base=300, seed=3) == whole
+
+
+def test_tornado_sorted_by_swing():
+    out = tornado(8.0)
+    bars = out["outputs"]["total_savings_20yr"]["factors"]
+    swings = [bar["swing"] for bar in bars]
+    assert swings == sorted(swings, reverse=True)
+    assert {bar["factor"] for bar in bars} == set(FACTOR_NAMES)
+    overrun = next(bar for bar in out["outputs"]["net_cost"]["factors"] if bar["factor"] == "cost_overrun_pct")
+    assert overrun["high"] > out["outputs"]["net_cost"]["base"] > overrun["low"]
@@ -0,0 +1,73 @@
+"""Tests for server.utils.sim_cache (content-keyed simulation cache)."""
+from server.utils.columnar import dumps
+from server.utils.draw_bank import build_draw_bank
+from server.utils.monte_carlo import run_simulation
+from server.utils.sim_cache import SimulationCache, cached_run_simulation, simulation_cache_key
+
+
+def test_cache_hit_returns_same_result():
+    cache = SimulationCache()
+    first = cached_run_simulation(cache=cache, system_size_kw=8.0, n=100, seed=1)
+    second = cached_run_simulation(cache=cache, system_size_kw=8.0, n=100, seed=1)
+    assert dumps(first) == dumps(second) == dumps(run_simulation(8.0, n=100, seed=1))
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+
+
+def test_cached_result_is_not_shared_by_reference():
+    cache = SimulationCache()
+    first = cached_run_simulation(cache=cache, system_size_kw=8.0, n=50, seed=1)
+    first["net_cost"]["mean"] = -1
+    assert cached_run_simulation(cache=cache, system_size_kw=8.0, n=50, seed=1)["net_cost"]["mean"] != -1
+
+
+def test_key_normalizes_defaults_and_itc_order():
+    a = simulation_cache_key(8.0, solar_production_kwh=None, state_itc_entries=[{"pct": 0.1}, {"pct": 0.05, "cap": 500}], seed=1)
+    b = simulation_cache_key(8, solar_production_kwh=10_000, state_itc_entries=[{"pct": 0.05, "cap": 500}, {"pct": 0.1, "cap": None}], seed=1)
+    assert a == b
+    assert a != simulation_cache_key(8.0, seed=2)
+    assert a != simulation_cache_key(8.0, seed=1, sampling="sobol")
+
+
+def test_key_ignores_workers():
+    assert simulation_cache_key(8.0, n=100, seed=1) == simulation_cache_key(8.0, n=100, seed=1, workers=4)
+    assert simulation_cache_key(8.0, n=100, seed=1, workers=2) == simulation_cache_key(8.0, n=100, seed=1, workers=8)
+
+
+def test_bank_key_changes_when_bank_is_rebuilt(tmp_path, monkeypatch):
+    path = build_draw_bank(tmp_path / "bank.npy", size=1_000, seed=0)
+    monkeypatch.setenv("SIMULATION_DRAW_BANK", str(path))
+    before = simulation_cache_key(8.0, seed=1, sampling="bank")
+    assert before == simulation_cache_key(8.0, seed=1, sampling="bank")
+
+    build_draw_bank(path, size=1_000, seed=1)
+    assert simulation_cache_key(8.0, seed=1, sampling="bank") != before
+
+
+def test_unseeded_calls_bypass_cache_unless_stable_seed():
+    cache = SimulationCache()
+    cached_run_simulation(cache=cache, system_size_kw=8.0, n=50)
+    assert cache.stats()["entries"] == 0
+
+    a = cached_run_simulation(cache=cache, stable_seed=True, system_size_kw=8.0, n=50)
+    b = cached_run_simulation(cache=cache, stable_seed=True, system_size_kw=8.0, n=50)
+    assert dumps(a) == dumps(b)
+    assert isinstance(a["seed"], int)
+    assert cache.stats()["hits"] == 1
+
+
+def test_lru_eviction_respects_byte_budget():
+    probe = SimulationCache()
+    cached_run_simulation(cache=probe, system_size_kw=8.0, n=20, seed=0)
+    entry_bytes = probe.stats()["bytes"]
+
+    cache = SimulationCache(max_bytes=int(entry_bytes * 2.5))
+    for seed in range(3):
+        cached_run_simulation(cache=cache, system_size_kw=8.0, n=20, seed=seed)
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= cache.max_bytes
+    # seed 0 was least recently used and is gone
+    cached_run_simulation(cache=cache, system_size_kw=8.0, n=20, seed=0)
+    assert cache.stats()["misses"] == 4
@@ -45,3 +45,88 @@ def test_simulate_caps_n_simulations():
     )
     assert r.status_code == 200
     assert r.json()["n_simulations"] == 10000
+
+
+def test_simulate_streaming_allows_more_paths():
+    r = client.post(
+        "/api/simulate",
+        params={"system_size_kw": 6.0, "n_simulations": 25_000, "streaming": True},
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["n_simulations"] == 25_000
+    assert "percentile_error" in data["total_savings_20yr"]
+
+
+def test_simulate_batch_endpoint():
+    r = client.post(
+        "/api/simulate/batch",
+        json={
+            "configs": [
+                {"system_size_kw": 6.0},
+                {"system_size_kw": 8.0, "flat_rebates": 500, "label": "8 kW"},
+            ],
+            "n_simulations": 100,
+            "seed": 1,
+        },
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["n_simulations"] == 100
+    assert len(data["configurations"]) == 2
+    assert data["configurations"][1]["config"]["label"] == "8 kW"
+    assert "paired_difference" in data["configurations"][1]
+
+
+def test_simulate_batch_rejects_empty_configs():
+    r = client.post("/api/simulate/batch", json={"configs": []})
+    assert r.status_code == 400
+
+
+def test_simulate_cache_stats_endpoint():
+    params = {"system_size_kw": 7.0, "n_simulations": 20, "seed": 123}
+    before = client.get("/api/simulate/cache").json()
+    client.post("/api/simulate", params=params)
+    client.post("/api/simulate", params=params)
+    after = client.get("/api/simulate/cache").json()
+    assert after["hits"] >= before["hits"] + 1
+
+
+def test_simulate_sensitivity_endpoint():
+    r = client.post("/api/simulate/sensitivity", params={"system_size_kw": 8.0, "n_base": 128, "seed": 1})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["method"] == "sobol"
+    assert "utility_inflation" in data["outputs"]["payback_years"]["factors"]
+
+    r = client.post("/api/simulate/sensitivity", params={"system_size_kw": 8.0, "method": "tornado"})
+    assert r.status_code == 200
+    assert r.json()["method"] == "tornado"
+
+
+def test_simulate_financing_endpoint():
+    r = client.post(
+        "/api/simulate/financing",
+        json={"system_size_kw": 8.0, "n_simulations": 100, "seed": 1, "loan_terms": [10, 20], "loan_aprs": [6.0]},
+    )
+    assert r.status_code == 200
+    options = r.json()["options"]
+    assert [o["type"] for o in options] == ["cash", "loan", "loan", "lease", "ppa"]
+    assert "50" in options[1]["cash_flow_positive_months"]["percentiles"]
+
+    r = client.post("/api/simulate/financing", json={"system_size_kw": 8.0, "options": [{"type": "balloon"}]})
+    assert r.status_code == 400
+
+
+def test_simulate_portfolio_endpoint():
+    r = client.post(
+        "/api/simulate/portfolio",
+        json={"system_size_kw": 8.0, "n_simulations": 100, "seed": 1, "avg_wind_speed_ms": 5.5},
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert [p["portfolio"] for p in data["portfolios"]] == ["solar", "solar+wind", "solar+gshp", "solar+wind+gshp"]
+    assert "paired_difference" in data["portfolios"][2]
+
+    r = client.post("/api/simulate/portfolio", json={"system_size_kw": 8.0, "portfolios": ["solar+wind"]})
+    assert r.status_code == 400
@@ -0,0 +1,51 @@
+"""Tests for server.utils.sketches (running moments and quantile sketches)."""
+import numpy as np
+import pytest
+from server.utils.sketches import QuantileSketch, RunningMoments
+
+
+def test_running_moments_match_numpy_across_chunks():
+    values = np.random.default_rng(0).normal(500, 200, (5000, 3))
+    moments = RunningMoments(3)
+    for chunk in np.array_split(values, 7):
+        moments.add(chunk)
+    assert moments.count == 5000
+    assert moments.mean == pytest.approx(values.mean(axis=0))
+    assert moments.std == pytest.approx(values.std(axis=0))
+
+
+def test_running_moments_merge_equals_single_pass():
+    values = np.random.default_rng(1).normal(0, 1, 1000)
+    a, b, whole = RunningMoments(), RunningMoments(), RunningMoments()
+    a.add(values[:300])
+    b.add(values[300:])
+    whole.add(values)
+    a.merge(b)
+    assert a.count == whole.count
+    assert a.mean == pytest.approx(whole.mean)
+    assert a.std == pytest.approx(whole.std)
+
+
+def test_quantile_sketch_within_error_bound():
+    values = np.random.default_rng(2).normal(1000, 3000, (20_000, 2))
+    sketch = QuantileSketch(2)
+    sketch.add(values)
+    estimates = sketch.quantiles([5, 50, 95])
+    exact = np.percentile(values, [5, 50, 95], axis=0)
+    # allow one order statistic of slack for interpolation between neighbours
+    assert np.all(np.abs(estimates - exact) <= sketch.error_bounds(estimates) + 5)
+
+
+def test_quantile_sketch_merge_is_exact():
+    values = np.random.default_rng(3).normal(0, 50, 4000)
+    a, b, whole = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    a.add(values[:1000])
+    b.add(values[1000:])
+    whole.add(values)
+    a.merge(b)
+    assert np.array_equal(a.quantiles([5, 25, 50, 75, 95]), whole.quantiles([5, 25, 50, 75, 95]))
+
+
+def test_quantile_sketch_rejects_mismatched_merge():
+    with pytest.raises(ValueError):
+        QuantileSketch(relative_accuracy=0.01).merge(QuantileSketch(relative_accuracy=0.02))
@@ -0,0 +1,58 @@
+"""Tests for server.utils.surrogate (offline-fitted surrogate for simulation summaries)."""
+import pytest
+from server.utils.columnar import dumps
+from server.utils.constants import FEDERAL_ITC
+from server.utils.monte_carlo import run_simulation
+from server.utils.surrogate import Surrogate, build_surrogate, load_surrogate
+
+SMALL_GRID = {
+    "system_size_kw": [6, 10],
+    "solar_production_kwh": [8_000, 12_000],
+    "price_per_kwh": [0.12, 0.20],
+    "flat_rebates": [0, 2_000],
+    "itc_pct": [FEDERAL_ITC, FEDERAL_ITC + 0.1],
+}
+
+
+@pytest.fixture(scope="module")
+def surrogate():
+    return build_surrogate(SMALL_GRID, n=300, seed=1, n_validation=8)
+
+
+def test_surrogate_reproduces_grid_points(surrogate):
+    kwargs = dict(
+        system_size_kw=10, solar_production_kwh=8_000, price_per_kwh=0.2,
+        flat_rebates=2_000, state_itc_entries=[{"pct": 0.1}],
+    )
+    predicted = surrogate.predict(**kwargs)
+    actual = run_simulation(**kwargs, n=300, seed=1)
+    assert predicted.pop("surrogate")["error_bound"].keys() >= {"net_cost", "payback_years"}
+    assert dumps(predicted) == dumps(actual)
+
+
+def test_surrogate_interpolates_within_error_bound(surrogate):
+    kwargs = dict(system_size_kw=7.5, solar_production_kwh=10_000, price_per_kwh=0.15, flat_rebates=500)
+    predicted = surrogate.predict(**kwargs)
+    actual = run_simulation(**kwargs, n=300, seed=1)
+    bound = predicted["surrogate"]["error_bound"]
+    # linear in cost and rate, so the held-out bound is tight away from kinks
+    assert predicted["net_cost"]["mean"] == pytest.approx(actual["net_cost"]["mean"], abs=bound["net_cost"] + 1)
+    assert predicted["carbon_offset_tons"]["mean"] == pytest.approx(actual["carbon_offset_tons"]["mean"], abs=0.05)
+
+
+def test_surrogate_falls_back_outside_domain(surrogate):
+    assert surrogate.predict(system_size_kw=30) is None
+    assert surrogate.predict(system_size_kw=8, years=25, solar_production_kwh=10_000, price_per_kwh=0.15) is None
+    assert surrogate.predict(
+        system_size_kw=8, solar_production_kwh=10_000, price_per_kwh=0.15,
+        state_itc_entries=[{"pct": 0.1, "cap": 500}],
+    ) is None
+
+
+def test_surrogate_round_trips_through_disk(surrogate, tmp_path):
+    path = tmp_path / "surrogate.npz"
+    surrogate.save(path)
+    loaded = load_surrogate(path)
+    assert isinstance(loaded, Surrogate)
+    kwargs = dict(system_size_kw=8, solar_production_kwh=9_000, price_per_kwh=0.18, zip_code="10001")
+    assert dumps(loaded.predict(**kwargs)) == dumps(surrogate.predict(**kwargs))
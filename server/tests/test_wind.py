@@ -1,5 +1,6 @@
 """Tests for /api/wind: _parse_srw unit test + endpoint with mocked NREL."""
 import pytest
+import numpy as np
 from unittest.mock import patch, MagicMock
 from server.routers.wind import _parse_srw, _classify
 
@@ -33,3 +34,65 @@ def test_wind_endpoint_mock(mock_get):
     assert "data" in data
     assert data["data"]["feasible"] is True
     assert "avg_wind_speed_ms" in data["data"]
+
+
+def _srw(lat, lon, speeds):
+    rows = "\n".join(f"2012,1,1,{h},0,10.0,1.0,{s},180" for h, s in enumerate(speeds))
+    return (
+        "SiteID,Latitude,Longitude,Elevation\n"
+        f"1,{lat},{lon},1600\n"
+        "Year,Month,Day,Hour,Minute,temperature,pressure,windspeed,winddirection\n"
+        "-,-,-,-,-,C,atm,m/s,deg\n" + rows
+    )
+
+
+@pytest.fixture
+def wind_grid(tmp_path, monkeypatch):
+    from server.utils import wind_grid
+
+    srw_dir = tmp_path / "srw"
+    srw_dir.mkdir()
+    # four corners of one 0.5 degree cell around Denver, speeds 4, 5, 6, 7 m/s
+    for n, (lat, lon) in enumerate([(39.5, -105.0), (39.5, -104.5), (40.0, -105.0), (40.0, -104.5)]):
+        (srw_dir / f"site{n}.srw").write_text(_srw(lat, lon, [3.0 + n, 5.0 + n]))
+    (srw_dir / "40.0_-100.0.srw").write_text(
+        "city,state\nx,y\nwindspeed\nm/s\n9.0\n"  # location from the file name
+    )
+    (srw_dir / "broken.srw").write_text("no data\n")
+    grid, skipped = wind_grid.build_wind_grid(srw_dir, resolution=0.5)
+    assert skipped == 1
+    path = grid.save(tmp_path / "wind_grid.bin")
+    monkeypatch.setenv("WIND_GRID_PATH", str(path))
+    return wind_grid
+
+
+def test_wind_grid_bilinear_lookup(wind_grid):
+    grid = wind_grid.load_wind_grid()
+    assert isinstance(grid.values, np.memmap)
+    assert grid.lookup(39.5, -105.0)["avg_wind_speed_ms"] == pytest.approx(4.0)
+    center = grid.lookup(39.75, -104.75)
+    assert center["avg_wind_speed_ms"] == pytest.approx(5.5)
+    assert center["weibull_k"] > 1 and center["weibull_c"] > 5.5
+    assert grid.lookup(39.5, -104.8)["avg_wind_speed_ms"] == pytest.approx(4.4)
+    # a lone covered cell answers only on itself; off-grid points have no answer
+    assert grid.lookup(40.0, -100.0)["avg_wind_speed_ms"] == pytest.approx(9.0)
+    assert grid.lookup(40.1, -100.0) is None
+    assert grid.lookup(10.0, -105.0) is None
+    speeds = grid.interpolate_many([39.5, 40.0, 45.0], [-105.0, -104.5, -90.0])[0]
+    assert speeds[:2] == pytest.approx([4.0, 7.0]) and np.isnan(speeds[2])
+
+
+@patch("server.routers.wind.requests.get")
+def test_wind_endpoint_uses_grid_then_nrel(mock_get, wind_grid, client):
+    mock_get.return_value = MagicMock(
+        raise_for_status=MagicMock(),
+        text="city,state,windspeed\n-, -, -\n1,2,3.0\n1,2,3.2",
+    )
+    data = client.get("/api/wind", params={"lat": 39.75, "lon": -104.75}).json()["data"]
+    assert data["source"] == "grid" and data["avg_wind_speed_ms"] == 5.5
+    assert data["classification"] == "Good"
+    mock_get.assert_not_called()
+
+    data = client.get("/api/wind", params={"lat": 45.0, "lon": -90.0}).json()["data"]
+    assert data["source"] == "nrel" and data["avg_wind_speed_ms"] == 3.1
+    mock_get.assert_called_once()
@@ -0,0 +1,64 @@
+"""Tests for server.utils.zip_region (dense zip-to-eGRID-region index)."""
+import numpy as np
+
+from server.utils.zip_region import (
+    REGION_CO2_LBS_PER_MWH,
+    get_co2_emissions_lbs_mwh,
+    get_co2_emissions_lbs_mwh_many,
+    get_region,
+    get_regions,
+    regions,
+    zips,
+)
+
+
+def test_index_matches_csv():
+    sample = np.random.default_rng(0).choice(len(zips), 500, replace=False)
+    assert all(get_region(zips[i]) == regions[i] for i in sample)
+    assert get_regions(zips).tolist() == regions.tolist()
+
+
+def test_get_region_normalizes_like_zfill():
+    assert get_region("80202") == get_region(80202) == "RMPA"
+    assert get_region("2139") == get_region("02139")
+    for bad in ("", "123456", "8020a", "-1234", "99999x"):
+        assert get_region(bad) is None
+
+
+def test_bulk_lookup_matches_single():
+    queries = ["80202", "2139", "123456", "abcde", "", "00001", "99999", "10001"]
+    assert get_regions(queries).tolist() == [get_region(q) for q in queries]
+    assert get_regions(np.array([80202, 2139, -1, 100_000])).tolist() == [
+        get_region("80202"), get_region("02139"), None, None,
+    ]
+    # full-width strings take the fast path; mixed widths the general one
+    assert get_regions(np.array(["80202", "02139"])).tolist() == get_regions(["80202", "2139"]).tolist()
+
+    co2 = get_co2_emissions_lbs_mwh_many(queries)
+    expected = [get_co2_emissions_lbs_mwh(q) for q in queries]
+    assert np.array_equal(co2, np.array([np.nan if e is None else e for e in expected]), equal_nan=True)
+    assert co2[0] == REGION_CO2_LBS_PER_MWH["RMPA"]
+    assert get_regions(np.array([["80202"], ["10001"]])).shape == (2, 1)
+
+
+def test_binary_index_round_trips_and_detects_stale_csv(tmp_path, monkeypatch):
+    from server.utils import zip_region
+    from server.utils.zip_region import _CSV_PATH, _load_artifact, build_zip_index
+
+    path = build_zip_index(tmp_path / "zip_region.bin")
+    names, index = _load_artifact(path, _CSV_PATH)
+    assert isinstance(index, np.memmap) and not index.flags.writeable
+    expected_names, expected_index = zip_region._index_from_csv(_CSV_PATH)
+    assert names.tolist() == expected_names.tolist()
+    assert np.array_equal(index, expected_index)
+
+    monkeypatch.setenv("ZIP_REGION_INDEX", str(path))
+    monkeypatch.setattr(zip_region, "_index", None)
+    assert get_region("80202") == "RMPA"
+    assert isinstance(zip_region._index[1], np.memmap)
+
+    # an artifact compiled from a different CSV is ignored
+    edited = tmp_path / "edited.csv"
+    edited.write_bytes(_CSV_PATH.read_bytes() + b"99998,RMPA\n")
+    assert _load_artifact(build_zip_index(tmp_path / "edited.bin", edited), _CSV_PATH) is None
+    assert _load_artifact(tmp_path / "missing.bin", _CSV_PATH) is None
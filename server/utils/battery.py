@@ -0,0 +1,202 @@
+"""Home battery dispatch over hourly profiles, and what a battery is worth.
+
+State of charge is sequential in time, so dispatch loops over the 8760 hours and
+vectorizes across everything else: every (battery size, scenario) pair is one element
+of a (sizes, scenarios) state array updated with a few in-place ops per hour. The
+tariff (rates and export credit) is shared by all scenarios, so per-hour decisions
+such as "is this a peak hour" are plain Python scalars.
+
+The battery's first-year savings feed calculate_savings_over_time through
+hourly_savings and its cost goes through calculate_net_cost_array, the same way solar
+does.
+"""
+from typing import Literal
+
+import numpy as np
+
+from utils.calculations import (
+    calculate_exact_payback,
+    calculate_net_cost_array,
+    calculate_npv_closed_form,
+    calculate_savings_over_time_array,
+)
+from utils.constants import DISCOUNT_RATE, FEDERAL_ITC, UTILITY_INFLATION
+from utils.hourly import NET_BILLING_EXPORT_RATE, ExportRule
+
+BATTERY_COST_PER_KWH = 1000
+BATTERY_INSTALL_COST = 2000
+BATTERY_POWER_RATIO = 0.5  # continuous kW per kWh of capacity
+BATTERY_ROUND_TRIP_EFFICIENCY = 0.9
+BATTERY_DEGRADATION = 0.02  # capacity fade per year
+
+DispatchStrategy = Literal["self_consumption", "tou_arbitrage"]
+
+
+def _baseline_bill(surplus: np.ndarray, rates: np.ndarray, credit: np.ndarray) -> np.ndarray:
+    """Unfloored solar-only bill per scenario: imports at retail, exports at credit."""
+    return np.maximum(-surplus, 0) @ rates - np.maximum(surplus, 0) @ credit
+
+
+def dispatch_battery(
+    production: np.ndarray,
+    load: np.ndarray,
+    rates: np.ndarray,
+    capacities_kwh: list[float] | np.ndarray,
+    power_kw: list[float] | np.ndarray | None = None,
+    round_trip_efficiency: float = BATTERY_ROUND_TRIP_EFFICIENCY,
+    strategy: DispatchStrategy = "self_consumption",
+    export_rule: ExportRule = "net_metering",
+    export_rate: float | np.ndarray | None = None,
+) -> dict[str, np.ndarray]:
+    """Dispatch every battery size against every scenario for one year.
+
+    production and load are 8760 rows or (scenarios, 8760) matrices; rates is one 8760
+    tariff shared by all scenarios. self_consumption charges from solar surplus and
+    discharges into any deficit. tou_arbitrage only discharges in hours above the mean
+    rate and also charges from the grid in the cheapest-rate hours when the spread beats
+    the round-trip loss. Losses are taken on charge.
+
+    Returns (sizes, scenarios) arrays: the solar-only and with-battery bills (same
+    export rules as utils.hourly.hourly_bill), the battery's annual_savings, and the
+    energy it moved."""
+    if strategy not in ("self_consumption", "tou_arbitrage"):
+        raise ValueError(f"Unknown strategy {strategy!r}")
+    if export_rule not in ("net_metering", "net_billing"):
+        raise ValueError(f"Unknown export_rule {export_rule!r}")
+
+    surplus = np.atleast_2d(np.asarray(production, dtype=np.float64) - load)
+    rates = np.asarray(rates, dtype=np.float64)
+    if rates.shape != surplus.shape[-1:]:
+        raise ValueError("rates must be a single 8760 vector shared by all scenarios")
+    if export_rule == "net_metering":
+        credit = rates
+    else:
+        credit = np.broadcast_to(
+            np.asarray(export_rate if export_rate is not None else NET_BILLING_EXPORT_RATE, dtype=np.float64),
+            rates.shape,
+        )
+
+    capacity = np.asarray(capacities_kwh, dtype=np.float64)[:, None]
+    power = capacity * BATTERY_POWER_RATIO if power_kw is None else np.asarray(power_kw, dtype=np.float64)[:, None]
+    shape = (capacity.shape[0], surplus.shape[0])
+    rte = round_trip_efficiency
+
+    # Hour-major copies so each step reads one contiguous row. State is kept in stored
+    # kWh, so solar charging is pre-scaled by the round-trip efficiency.
+    stored_source = np.ascontiguousarray(np.maximum(surplus, 0).T) * rte
+    deficit = np.ascontiguousarray(np.maximum(-surplus, 0).T)
+    stored_power = power * rte
+    has_source = stored_source.any(axis=1).tolist()
+    has_deficit = deficit.any(axis=1).tolist()
+    if strategy == "tou_arbitrage":
+        peak = (rates > rates.mean()).tolist()
+        cheapest = rates.min()
+        grid_charge = ((rates == cheapest) & (cheapest < rte * rates.max())).tolist()
+    else:
+        peak = [True] * rates.size
+        grid_charge = [False] * rates.size
+
+    # Energy is accumulated per distinct rate (a tariff has only a few), and priced once
+    # after the loop instead of multiplying every hour.
+    rate_values, rate_class = np.unique(rates, return_inverse=True)
+    credit_values, credit_class = np.unique(credit, return_inverse=True)
+    rate_class, credit_class = rate_class.tolist(), credit_class.tolist()
+    discharged_by_rate = np.zeros((len(rate_values),) + shape)
+    grid_by_rate = np.zeros((len(rate_values),) + shape)
+    stored_by_credit = np.zeros((len(credit_values),) + shape)
+
+    soc = np.zeros(shape)
+    room = np.empty(shape)
+    move = np.empty(shape)
+
+    for h in range(rates.size):
+        if has_source[h]:
+            np.subtract(capacity, soc, out=room)
+            np.minimum(stored_source[h], stored_power, out=move)
+            np.minimum(move, room, out=move)
+            soc += move
+            stored_by_credit[credit_class[h]] += move
+
+        if grid_charge[h]:
+            np.subtract(capacity, soc, out=room)
+            np.minimum(stored_power, room, out=move)
+            soc += move
+            grid_by_rate[rate_class[h]] += move
+
+        if peak[h] and has_deficit[h]:
+            np.minimum(deficit[h], power, out=move)
+            np.minimum(move, soc, out=move)
+            soc -= move
+            discharged_by_rate[rate_class[h]] += move
+
+    # stored kWh came from rte-times as much input energy
+    value = (
+        np.tensordot(rate_values, discharged_by_rate, axes=1)
+        - np.tensordot(credit_values, stored_by_credit, axes=1) / rte
+        - np.tensordot(rate_values, grid_by_rate, axes=1) / rte
+    )
+    discharged = discharged_by_rate.sum(axis=0)
+    grid_charged = grid_by_rate.sum(axis=0) / rte
+
+    baseline = _baseline_bill(surplus, rates, credit)
+    with_battery = baseline - value
+    if export_rule == "net_metering":
+        baseline = np.maximum(baseline, 0)
+        with_battery = np.maximum(with_battery, 0)
+    baseline = np.broadcast_to(baseline, shape)
+    return {
+        "bill_with_solar": baseline,
+        "bill_with_battery": with_battery,
+        "annual_savings": baseline - with_battery,
+        "discharged_kwh": discharged,
+        "grid_charged_kwh": grid_charged,
+        "equivalent_cycles": np.divide(discharged, capacity, out=np.zeros(shape), where=capacity > 0),
+    }
+
+
+def calculate_battery_gross_cost(
+    capacity_kwh: float | np.ndarray,
+    cost_per_kwh: float = BATTERY_COST_PER_KWH,
+    install_cost: float = BATTERY_INSTALL_COST,
+) -> np.ndarray:
+    capacity = np.asarray(capacity_kwh, dtype=np.float64)
+    return np.where(capacity > 0, capacity * cost_per_kwh + install_cost, 0.0)
+
+
+def evaluate_battery_sizes(
+    production: np.ndarray,
+    load: np.ndarray,
+    rates: np.ndarray,
+    capacities_kwh: list[float] | np.ndarray,
+    flat_rebates: float = 0,
+    state_itc_entries: list[dict] | None = None,
+    years: int = 20,
+    strategy: DispatchStrategy = "self_consumption",
+    export_rule: ExportRule = "net_metering",
+    export_rate: float | np.ndarray | None = None,
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict[str, np.ndarray]:
+    """Net cost (battery incentives and the federal ITC), dispatch savings and their
+    lifetime value for each size, per scenario. Year-over-year the savings fade with
+    BATTERY_DEGRADATION and grow with utility inflation, as solar savings do."""
+    dispatch = dispatch_battery(
+        production, load, rates, capacities_kwh, strategy=strategy,
+        export_rule=export_rule, export_rate=export_rate,
+    )
+    gross = calculate_battery_gross_cost(capacities_kwh)
+    net = calculate_net_cost_array(gross, flat_rebates, FEDERAL_ITC, state_itc_entries)
+    net = np.where(gross > 0, net, 0.0)[:, None]
+    first_year = dispatch["annual_savings"]
+
+    savings = calculate_savings_over_time_array(
+        net, years=years, panel_degradation=BATTERY_DEGRADATION, hourly_savings=first_year,
+    )
+    return {
+        **dispatch,
+        "net_cost": np.broadcast_to(net, first_year.shape),
+        "cumulative_savings": savings["cumulative_savings"],
+        "payback_years": calculate_exact_payback(net, first_year, 1.0, BATTERY_DEGRADATION, UTILITY_INFLATION),
+        "npv": calculate_npv_closed_form(
+            net, first_year, 1.0, years, BATTERY_DEGRADATION, UTILITY_INFLATION, discount_rate,
+        ),
+    }
@@ -1,3 +1,5 @@
+import numpy as np
+
 from utils.constants import (
     COST_PER_WATT,
     PERMIT_COST,
@@ -8,9 +10,278 @@ from utils.constants import (
     DEFAULT_ANNUAL_USAGE_KWH,
     DEFAULT_SOLAR_PRODUCTION_KWH,
     CO2_LBS_PER_KWH,
+    DISCOUNT_RATE,
 )
+from utils.columnar import to_rows
+from utils.grid_carbon import cumulative_carbon_weight, emission_trajectory
 from utils.zip_region import get_co2_emissions_lbs_mwh
 
+SAVINGS_COLUMNS = ("year", "annual_savings", "cumulative_savings")
+
+
+# Array-native versions. Every parameter may be a scalar or an array; parameters
+# broadcast against each other (e.g. sizes[:, None] x rates[None, :]), and yearly
+# outputs add a trailing years axis. Arithmetic follows the scalar functions operation
+# for operation, so a 0-d call reproduces them exactly.
+
+def _power_table(base: np.ndarray, years: int) -> np.ndarray:
+    """base ** year for year = 1..years, shape base.shape + (years,).
+    np.float_power evaluates libm pow element by element, so the table matches the
+    scalar loops' Python float pow bit for bit; np.power's SIMD kernels can differ in
+    the last ulp (tests/test_calculations.py checks the parity)."""
+    exponents = np.arange(1, years + 1, dtype=np.float64)
+    return np.float_power(np.asarray(base, dtype=np.float64)[..., None], exponents)
+
+
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    """Element-wise round(v, 2) with Python's correctly rounded semantics.
+    np.round scales by 100 first, which can tip values lying within an ulp of a half
+    cent; those few are re-rounded in Python so results match round() exactly."""
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    near_half = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) <= 2 * np.spacing(np.abs(scaled))
+    if near_half.any():
+        rounded[near_half] = [round(v, 2) for v in values[near_half].tolist()]
+    return rounded
+
+
+def _yearly_production(
+    production: float | np.ndarray,
+    degradation_factors: np.ndarray,
+    production_multipliers: np.ndarray | None = None,
+) -> np.ndarray:
+    """kWh per year; all arguments already carry the trailing years axis."""
+    yearly = production * degradation_factors
+    if production_multipliers is not None:
+        yearly = yearly * production_multipliers
+    return yearly
+
+
+def _cumulative_savings(net_cost: np.ndarray, annual_savings: np.ndarray) -> np.ndarray:
+    """Running balance starting at -net_cost; accumulate is sequential, like the loop."""
+    net_cost = np.asarray(net_cost, dtype=np.float64)
+    shape = np.broadcast_shapes(net_cost.shape, annual_savings.shape[:-1])
+    start = np.broadcast_to(-net_cost, shape)[..., None]
+    annual_savings = np.broadcast_to(annual_savings, shape + annual_savings.shape[-1:])
+    return np.cumsum(np.concatenate([start, annual_savings], axis=-1), axis=-1)[..., 1:]
+
+
+def calculate_gross_cost_array(
+    system_size_kw: float | np.ndarray,
+    cost_per_watt: float | np.ndarray = COST_PER_WATT,
+    permit_cost: float | np.ndarray = PERMIT_COST,
+) -> np.ndarray:
+    return np.asarray(system_size_kw, dtype=np.float64) * 1000 * cost_per_watt + permit_cost
+
+
+def calculate_net_cost_array(
+    gross_cost: float | np.ndarray,
+    flat_rebates: float | np.ndarray = 0,
+    federal_itc: float | np.ndarray = FEDERAL_ITC,
+    state_itc_entries: list[dict] | None = None,
+) -> np.ndarray:
+    """State ITC entries are stacked on a trailing axis (uncapped entries get an infinite
+    cap) and applied in one min/sum; entry pct and cap values may themselves be arrays."""
+    cost_basis = np.maximum(np.asarray(gross_cost, dtype=np.float64) - flat_rebates, 0)
+    federal_credit = cost_basis * federal_itc
+
+    state_credit = 0.0
+    if state_itc_entries:
+        pct = np.stack(np.broadcast_arrays(*[
+            np.asarray(entry["pct"], dtype=np.float64) for entry in state_itc_entries
+        ]), axis=-1)
+        cap = np.stack(np.broadcast_arrays(*[
+            np.asarray(entry["cap"] if entry.get("cap") is not None else np.inf, dtype=np.float64)
+            for entry in state_itc_entries
+        ]), axis=-1)
+        state_credit = np.minimum(cost_basis[..., None] * pct, cap).sum(axis=-1)
+
+    return cost_basis - federal_credit - state_credit
+
+
+def calculate_payback_array(
+    net_cost: float | np.ndarray,
+    solar_production_kwh: float | np.ndarray | None = None,
+    price_per_kwh: float | np.ndarray | None = None,
+) -> np.ndarray:
+    production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
+    rate = price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE
+    annual_savings = np.asarray(production, dtype=np.float64) * rate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(annual_savings == 0, np.inf, np.asarray(net_cost, dtype=np.float64) / annual_savings)
+
+
+def calculate_savings_over_time_array(
+    net_cost: float | np.ndarray,
+    solar_production_kwh: float | np.ndarray | None = None,
+    price_per_kwh: float | np.ndarray | None = None,
+    years: int = 20,
+    panel_degradation: float | np.ndarray = PANEL_DEGRADATION,
+    utility_inflation: float | np.ndarray = UTILITY_INFLATION,
+    production_multipliers: np.ndarray | None = None,
+    hourly_savings: float | np.ndarray | None = None,
+) -> dict[str, np.ndarray]:
+    """SAVINGS_COLUMNS as separate arrays: "year" is (years,), the savings columns have
+    shape broadcast(inputs) + (years,). production_multipliers, if given, broadcasts
+    against that shape.
+
+    hourly_savings, if given, is the first-year dollar value from the hourly TOU engine
+    (utils.hourly) and replaces solar_production_kwh x price_per_kwh as the savings
+    source; degradation, inflation and multipliers still apply year over year."""
+    base_production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
+    rate = price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE
+    if hourly_savings is not None:
+        base_production, rate = hourly_savings, 1.0
+
+    production = _yearly_production(
+        np.asarray(base_production, dtype=np.float64)[..., None],
+        _power_table(1 - np.asarray(panel_degradation, dtype=np.float64), years),
+        production_multipliers,
+    )
+    effective_rate = np.asarray(rate, dtype=np.float64)[..., None] * _power_table(
+        1 + np.asarray(utility_inflation, dtype=np.float64), years,
+    )
+    annual_savings = production * effective_rate
+    cumulative = _cumulative_savings(net_cost, annual_savings)
+
+    return {
+        "year": np.arange(1, years + 1),
+        "annual_savings": np.broadcast_to(annual_savings, cumulative.shape),
+        "cumulative_savings": cumulative,
+    }
+
+
+def calculate_carbon_offset_array(
+    solar_production_kwh: float | np.ndarray | None = None,
+    years: int = 20,
+    panel_degradation: float | np.ndarray = PANEL_DEGRADATION,
+    production_multipliers: np.ndarray | None = None,
+    zip_code: str | None = None,
+    co2_lbs_per_kwh: float | np.ndarray | None = None,
+) -> np.ndarray:
+    """Yearly production times the zip's declining grid emission trajectory.
+    co2_lbs_per_kwh, if given, overrides it with a static factor (or array of factors)."""
+    base_production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
+
+    production = _yearly_production(
+        np.asarray(base_production, dtype=np.float64)[..., None],
+        _power_table(1 - np.asarray(panel_degradation, dtype=np.float64), years),
+        production_multipliers,
+    )
+    if co2_lbs_per_kwh is None:
+        return _round_cents(production @ emission_trajectory(zip_code, years) / 2000)
+    total_kwh = np.cumsum(production, axis=-1)[..., -1]
+    return _round_cents(total_kwh * co2_lbs_per_kwh / 2000)
+
+
+# Closed form. Without per-year variability, yearly savings are a geometric series:
+# production * rate * q^y with q = (1 - degradation) * (1 + inflation), and yearly
+# production is production * g^y with g = 1 - degradation. Partial sums are evaluated
+# directly, so any year costs O(1) regardless of the horizon. All functions broadcast.
+
+def _geometric_sum(ratio_minus_one: np.ndarray, log_ratio: np.ndarray, year: np.ndarray) -> np.ndarray:
+    """sum_{y=1..year} q^y = q * (q^year - 1) / (q - 1), via expm1 so q near 1 stays
+    accurate; exactly year when q == 1. year may be fractional."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        partial = (1 + ratio_minus_one) * np.expm1(year * log_ratio) / ratio_minus_one
+    return np.where(ratio_minus_one == 0, year, partial)
+
+
+def _savings_ratio(panel_degradation, utility_inflation) -> tuple[np.ndarray, np.ndarray]:
+    """q - 1 and ln q for q = (1 - d)(1 + i), expanded so small rates do not cancel."""
+    d = np.asarray(panel_degradation, dtype=np.float64)
+    i = np.asarray(utility_inflation, dtype=np.float64)
+    ratio_minus_one = i - d - d * i
+    return ratio_minus_one, np.log1p(ratio_minus_one)
+
+
+def calculate_cumulative_savings_closed_form(
+    net_cost: float | np.ndarray,
+    solar_production_kwh: float | np.ndarray | None = None,
+    price_per_kwh: float | np.ndarray | None = None,
+    year: float | np.ndarray = 20,
+    panel_degradation: float | np.ndarray = PANEL_DEGRADATION,
+    utility_inflation: float | np.ndarray = UTILITY_INFLATION,
+) -> np.ndarray:
+    """Cumulative savings after `year` years, matching calculate_savings_over_time's
+    cumulative_savings at integer years."""
+    production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
+    rate = price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE
+    ratio_minus_one, log_ratio = _savings_ratio(panel_degradation, utility_inflation)
+    first_year = np.asarray(production, dtype=np.float64) * rate
+    return first_year * _geometric_sum(ratio_minus_one, log_ratio, np.asarray(year, dtype=np.float64)) - net_cost
+
+
+def calculate_npv_closed_form(
+    net_cost: float | np.ndarray,
+    solar_production_kwh: float | np.ndarray | None = None,
+    price_per_kwh: float | np.ndarray | None = None,
+    years: float | np.ndarray = 20,
+    panel_degradation: float | np.ndarray = PANEL_DEGRADATION,
+    utility_inflation: float | np.ndarray = UTILITY_INFLATION,
+    discount_rate: float | np.ndarray = DISCOUNT_RATE,
+) -> np.ndarray:
+    """Savings discounted at discount_rate minus net cost: the same geometric series
+    with ratio q / (1 + discount_rate)."""
+    production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
+    rate = price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE
+    q_minus_one, _ = _savings_ratio(panel_degradation, utility_inflation)
+    ratio_minus_one = (q_minus_one - discount_rate) / (1 + np.asarray(discount_rate, dtype=np.float64))
+    first_year = np.asarray(production, dtype=np.float64) * rate
+    return first_year * _geometric_sum(
+        ratio_minus_one, np.log1p(ratio_minus_one), np.asarray(years, dtype=np.float64),
+    ) - net_cost
+
+
+def calculate_carbon_offset_closed_form(
+    solar_production_kwh: float | np.ndarray | None = None,
+    years: float | np.ndarray = 20,
+    panel_degradation: float | np.ndarray = PANEL_DEGRADATION,
+    zip_code: str | None = None,
+    co2_lbs_per_kwh: float | np.ndarray | None = None,
+) -> np.ndarray:
+    """calculate_carbon_offset without variability: a grid_carbon weight-table lookup
+    per first-year kWh, or the geometric sum of degraded production when a static
+    co2_lbs_per_kwh is given."""
+    production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
+    if co2_lbs_per_kwh is None:
+        weight = cumulative_carbon_weight(zip_code, panel_degradation, years)
+        return _round_cents(np.asarray(production, dtype=np.float64) * weight / 2000)
+    ratio_minus_one = -np.asarray(panel_degradation, dtype=np.float64)
+    total_kwh = np.asarray(production, dtype=np.float64) * _geometric_sum(
+        ratio_minus_one, np.log1p(ratio_minus_one), np.asarray(years, dtype=np.float64),
+    )
+    return _round_cents(total_kwh * co2_lbs_per_kwh / 2000)
+
+
+def calculate_exact_payback(
+    net_cost: float | np.ndarray,
+    solar_production_kwh: float | np.ndarray | None = None,
+    price_per_kwh: float | np.ndarray | None = None,
+    panel_degradation: float | np.ndarray = PANEL_DEGRADATION,
+    utility_inflation: float | np.ndarray = UTILITY_INFLATION,
+) -> np.ndarray:
+    """Fractional year at which the closed-form cumulative savings curve crosses zero.
+
+    Unlike calculate_payback (net cost over first-year savings) this accounts for
+    degradation and inflation. Setting the partial sum equal to net cost gives
+    q^t = 1 + net * (q - 1) / (first_year * q), solved for t with log1p; 0 when
+    nothing is owed and inf when the curve levels off below the net cost."""
+    production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
+    rate = price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE
+    net = np.asarray(net_cost, dtype=np.float64)
+    ratio_minus_one, log_ratio = _savings_ratio(panel_degradation, utility_inflation)
+    first_year = np.asarray(production, dtype=np.float64) * rate
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = net * ratio_minus_one / (first_year * (1 + ratio_minus_one))
+        years = np.where(ratio_minus_one == 0, net / first_year, np.log1p(growth) / log_ratio)
+    never = (first_year <= 0) | (growth <= -1) | np.isnan(years)
+    return np.where(net <= 0, 0.0, np.where(never, np.inf, years))
+
+
+# Scalar API: thin wrappers over the array versions
 
 def calculate_gross_cost(
     system_size_kw: float,
@@ -18,7 +289,7 @@ def calculate_gross_cost(
     permit_cost: float = PERMIT_COST,
 ) -> float:
     """System size * cost per watt + permit"""
-    return system_size_kw * 1000 * cost_per_watt + permit_cost
+    return float(calculate_gross_cost_array(system_size_kw, cost_per_watt, permit_cost))
 
 
 def calculate_net_cost(
@@ -32,18 +303,7 @@ def calculate_net_cost(
     2. Apply federal ITC to reduced cost basis
     3. Apply state ITCs (pct credits with optional caps) to reduced cost basis
     """
-    cost_basis = max(gross_cost - flat_rebates, 0)
-    federal_credit = cost_basis * federal_itc
-
-    state_credit = 0.0
-    if state_itc_entries:
-        for entry in state_itc_entries:
-            credit = cost_basis * entry["pct"]
-            if entry.get("cap") is not None:
-                credit = min(credit, entry["cap"])
-            state_credit += credit
-
-    return cost_basis - federal_credit - state_credit
+    return float(calculate_net_cost_array(gross_cost, flat_rebates, federal_itc, state_itc_entries))
 
 
 def calculate_payback(
@@ -52,12 +312,7 @@ def calculate_payback(
     price_per_kwh: float | None = None,
 ) -> float:
     """Net cost divided by first-year savings from solar production"""
-    production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
-    rate = price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE
-    annual_savings = production * rate
-    if annual_savings == 0:
-        return float('inf')
-    return net_cost / annual_savings
+    return float(calculate_payback_array(net_cost, solar_production_kwh, price_per_kwh))
 
 
 def calculate_savings_over_time(
@@ -68,23 +323,27 @@ def calculate_savings_over_time(
     panel_degradation: float = PANEL_DEGRADATION,
     utility_inflation: float = UTILITY_INFLATION,
     production_multipliers: list[float] | None = None,
+    hourly_savings: float | None = None,
 ) -> list[dict]:
-    """Year-by-year savings from solar production with inflation, degradation, and optional variability"""
-    base_production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
-    rate = price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE
-    cumulative_savings = -net_cost
-    results = []
+    """Year-by-year savings from solar production with inflation, degradation, and optional variability.
+    hourly_savings (first-year $ from utils.hourly) replaces production x flat rate when given.
 
-    for year in range(1, years + 1):
-        production = base_production * (1 - panel_degradation) ** year
-        if production_multipliers is not None:
-            production *= production_multipliers[year - 1]
-        effective_rate = rate * (1 + utility_inflation) ** year
-        annual_savings = production * effective_rate
-        cumulative_savings += annual_savings
-        results.append({"year": year, "annual_savings": annual_savings, "cumulative_savings": cumulative_savings})
+    Row-per-year legacy shape; new code should use the columns of
+    calculate_savings_over_time_array."""
+    columns = calculate_savings_over_time_array(
+        net_cost, solar_production_kwh, price_per_kwh, years,
+        panel_degradation, utility_inflation,
+        np.asarray(production_multipliers, dtype=np.float64) if production_multipliers is not None else None,
+        hourly_savings,
+    )
+    return to_rows(columns)
 
-    return results
+
+def get_co2_lbs_per_kwh(zip_code: str | None = None) -> float:
+    """First-year grid emissions factor for a zip in lbs CO2 per kWh, national average
+    if unknown. Later years follow grid_carbon.emission_trajectory."""
+    lbs_per_mwh = get_co2_emissions_lbs_mwh(zip_code) if zip_code else None
+    return lbs_per_mwh / 1000 if lbs_per_mwh is not None else CO2_LBS_PER_KWH
 
 
 def calculate_carbon_offset(
@@ -95,18 +354,11 @@ def calculate_carbon_offset(
     zip_code: str | None = None,
 ) -> float:
     """Solar kWh production converted to CO2 tons offset.
-    Uses zip-specific grid emissions factor when zip_code is provided,
-    otherwise falls back to the national average (CO2_LBS_PER_KWH).
+    Uses the zip's eGRID region emission trajectory when zip_code is provided,
+    otherwise the national one starting at CO2_LBS_PER_KWH; both decline yearly.
     """
-    base_production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
-
-    lbs_per_mwh = get_co2_emissions_lbs_mwh(zip_code) if zip_code else None
-    co2_lbs_per_kwh = lbs_per_mwh / 1000 if lbs_per_mwh is not None else CO2_LBS_PER_KWH
-
-    total_kwh = 0.0
-    for year in range(1, years + 1):
-        production = base_production * (1 - panel_degradation) ** year
-        if production_multipliers is not None:
-            production *= production_multipliers[year - 1]
-        total_kwh += production
-    return round(total_kwh * co2_lbs_per_kwh / 2000, 2)
+    return float(calculate_carbon_offset_array(
+        solar_production_kwh, years, panel_degradation,
+        np.asarray(production_multipliers, dtype=np.float64) if production_multipliers is not None else None,
+        zip_code,
+    ))
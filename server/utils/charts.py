@@ -14,7 +14,7 @@ def plot_savings_fan_chart(report: dict) -> str:
 
     years = list(range(1, sim["years"] + 1))
     pcts = sim["savings_by_year"]["percentiles"]
-    det_savings = [s["cumulative_savings"] for s in det["savings_by_year"]]
+    det_savings = det["savings_by_year"]["cumulative_savings"]
 
     sns.set_theme(style="darkgrid")
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -103,7 +103,7 @@ if __name__ == "__main__":
         calculate_gross_cost,
         calculate_net_cost,
         calculate_payback,
-        calculate_savings_over_time,
+        calculate_savings_over_time_array,
         calculate_carbon_offset,
     )
     from server.utils.monte_carlo import run_simulation
@@ -113,7 +113,7 @@ if __name__ == "__main__":
     gross = calculate_gross_cost(system_size_kw)
     net = calculate_net_cost(gross)
     payback = calculate_payback(net, solar_production_kwh)
-    savings = calculate_savings_over_time(net, solar_production_kwh)
+    savings = calculate_savings_over_time_array(net, solar_production_kwh)
     carbon = calculate_carbon_offset(solar_production_kwh)
     simulation = run_simulation(system_size_kw=system_size_kw, solar_production_kwh=solar_production_kwh, seed=42)
 
@@ -0,0 +1,65 @@
+"""Columnar results and the one place they become JSON.
+
+Calculation and simulation results carry per-year series as numpy arrays (one array
+per column, e.g. {"year": [...], "cumulative_savings": [...]}) instead of lists of
+per-year dicts or Python float lists. Routers hand those results to ColumnarResponse,
+which serializes the whole payload once, with orjson when it is installed, and skips
+FastAPI's jsonable_encoder walk. to_rows rebuilds the legacy row-per-year shape for
+clients that still expect it.
+"""
+import json
+import math
+
+import numpy as np
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib path produces the same document
+    orjson = None
+
+
+def to_rows(columns: dict) -> list[dict]:
+    """Legacy row-oriented form of equal-length 1-d columns: one dict per index."""
+    keys = list(columns)
+    values = [np.asarray(columns[key]).tolist() for key in keys]
+    return [dict(zip(keys, row)) for row in zip(*values)]
+
+
+def _finite(obj):
+    """Payload with non-finite Python floats (np.float64 included) as None; the stdlib
+    encoder never passes floats to a default hook. Other numpy values go to _default."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "f" and not np.isfinite(obj).all():
+            return np.where(np.isfinite(obj), obj, None).tolist()  # null, as orjson writes NaN and inf
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return _finite(obj.item())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Compact JSON for a payload that may hold numpy arrays and scalars at any depth."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_finite(content), default=_default, allow_nan=False, separators=(",", ":")).encode()
+
+
+class ColumnarResponse(Response):
+    """JSON response for results holding numpy columns. Return it from an endpoint
+    (rather than the bare dict) so the payload is encoded exactly once."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -7,3 +7,5 @@ PANEL_DEGRADATION = 0.005
 DEFAULT_ANNUAL_USAGE_KWH = 10500
 DEFAULT_SOLAR_PRODUCTION_KWH = 10000
 CO2_LBS_PER_KWH = 0.81
+DISCOUNT_RATE = 0.05
+DEFAULT_PANEL_CAPACITY_WATTS = 250
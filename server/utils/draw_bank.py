@@ -0,0 +1,91 @@
+"""Pre-generated bank of standard-normal draws, shared read-only across workers.
+
+The bank is a flat float64 .npy file built once (python -m utils.draw_bank build) and
+memory-mapped on first use. Every uvicorn worker maps the same file, so the pages live
+once in the OS page cache rather than once per process, and a simulation only pays
+for copying its window out of the map instead of running the RNG.
+"""
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_BANK_PATH = Path(__file__).resolve().parent / "draw_bank.npy"
+DEFAULT_BANK_SIZE = 1 << 24  # 16.7M draws, 128 MiB
+_BUILD_BLOCK = 1 << 20
+
+_bank: np.ndarray | None = None
+_bank_path: Path | None = None
+_fingerprints: dict[tuple[str, int, int], str] = {}
+
+
+def bank_path() -> Path:
+    return Path(os.getenv("SIMULATION_DRAW_BANK", DEFAULT_BANK_PATH))
+
+
+def build_draw_bank(path: str | Path | None = None, size: int = DEFAULT_BANK_SIZE, seed: int = 0) -> Path:
+    """Write `size` standard normals to a .npy file in blocks, without holding them all."""
+    path = Path(path) if path is not None else bank_path()
+    rng = np.random.default_rng(seed)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(size,))
+    for start in range(0, size, _BUILD_BLOCK):
+        stop = min(start + _BUILD_BLOCK, size)
+        out[start:stop] = rng.standard_normal(stop - start)
+    out.flush()
+    del out
+    return path
+
+
+def load_draw_bank(path: str | Path | None = None) -> np.ndarray | None:
+    """Memory-map the bank read-only, once per process. None if it has not been built."""
+    global _bank, _bank_path
+    path = Path(path) if path is not None else bank_path()
+    if _bank is not None and _bank_path == path:
+        return _bank
+    if not path.exists():
+        return None
+    _bank = np.load(path, mmap_mode="r")
+    _bank_path = path
+    return _bank
+
+
+def bank_fingerprint(path: str | Path | None = None) -> str | None:
+    """Path, size and content checksum of the bank file, so results drawn from a rebuilt
+    bank are told apart. The checksum is computed once per (path, size, mtime)."""
+    path = Path(path) if path is not None else bank_path()
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    version = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if version not in _fingerprints:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 22), b""):
+                digest.update(block)
+        _fingerprints[version] = f"{version[0]}:{stat.st_size}:{digest.hexdigest()[:16]}"
+    return _fingerprints[version]
+
+
+def take_window(bank: np.ndarray, start: int, count: int) -> np.ndarray:
+    """Copy `count` consecutive draws starting at `start`, wrapping at the end of the bank.
+    Callers track how many draws they have taken; past bank.size they would repeat."""
+    start %= bank.size
+    if count > bank.size:
+        raise ValueError(f"Requested {count} draws but the bank only holds {bank.size}")
+    stop = start + count
+    if stop <= bank.size:
+        return np.array(bank[start:stop])
+    return np.concatenate([bank[start:], bank[:stop - bank.size]])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python -m utils.draw_bank build [SIZE] [PATH]")
+        sys.exit(1)
+
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BANK_SIZE
+    target = build_draw_bank(sys.argv[3] if len(sys.argv) > 3 else None, size=size)
+    print(f"Wrote {size:,} draws to {target}")
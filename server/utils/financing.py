@@ -0,0 +1,205 @@
+"""Cash, loan, lease and PPA financing priced against Monte Carlo savings paths.
+
+Every option is turned into a monthly outflow per (option, path, year), plus what is
+paid at signing and any loan balance still owed when the horizon ends. Savings accrue
+evenly across the months of a year, so a month is cash-flow positive when a twelfth of
+that year's savings beats the payment. All options are stacked into (options, paths,
+years) arrays and reduced together, so adding financing products costs a few more rows
+of one array pass rather than another simulation.
+
+Loan principal is the path's net cost, as if incentives are applied at signing (how
+the report presents net cost). Lease and PPA customers keep the bill savings but not
+the incentives, so they have nothing to pay up front.
+"""
+from typing import Literal
+
+import numpy as np
+
+from utils.constants import DISCOUNT_RATE
+from utils.monte_carlo import DEFAULT_N, _summarize_many, simulate_cash_flows
+
+LOAN_TERMS = [10, 15, 20, 25]
+CREDIT_TIERS = [
+    {"min_score": 750, "label": "Excellent", "apr_pct": [4.99, 6.99]},
+    {"min_score": 700, "label": "Good", "apr_pct": [7.49, 10.99]},
+    {"min_score": 650, "label": "Fair", "apr_pct": [11.99, 16.99]},
+    {"min_score": 600, "label": "Subprime", "apr_pct": [17.99, 23.99]},
+    {"min_score": 0, "label": "May not qualify", "apr_pct": [24.99, 35.99]},
+]
+LEASE_PAYMENT_PER_KW = 15.0  # first-year $/month per kW installed
+PPA_RATE = 0.12  # first-year $/kWh
+THIRD_PARTY_ESCALATOR = 0.029  # yearly lease / PPA price increase
+THIRD_PARTY_TERM = 20
+
+FinancingType = Literal["cash", "loan", "lease", "ppa"]
+
+
+def credit_tier(score: int) -> dict:
+    return next(tier for tier in CREDIT_TIERS if score >= tier["min_score"])
+
+
+def default_loan_aprs() -> list[float]:
+    """Midpoint APR of every credit tier."""
+    return [round(sum(tier["apr_pct"]) / 2, 2) for tier in CREDIT_TIERS]
+
+
+def _check_loan(term_years: float, apr_pct: float) -> None:
+    if not term_years > 0:
+        raise ValueError(f"Loan term_years must be positive, got {term_years}")
+    if not apr_pct >= 0:
+        raise ValueError(f"Loan apr_pct must not be negative, got {apr_pct}")
+
+
+def financing_options(
+    system_size_kw: float,
+    loan_terms: list[int] | None = None,
+    loan_aprs: list[float] | None = None,
+    lease_monthly_payment: float | None = None,
+    ppa_rate: float | None = None,
+    escalator: float = THIRD_PARTY_ESCALATOR,
+    third_party_term: int = THIRD_PARTY_TERM,
+) -> list[dict]:
+    """Cash, every loan term x APR pair, one lease and one PPA."""
+    options = [{"type": "cash"}]
+    options += [
+        {"type": "loan", "term_years": term, "apr_pct": apr}
+        for term in (loan_terms or LOAN_TERMS)
+        for apr in (loan_aprs or default_loan_aprs())
+    ]
+    for opt in options[1:]:
+        _check_loan(opt["term_years"], opt["apr_pct"])
+    lease = lease_monthly_payment if lease_monthly_payment is not None else LEASE_PAYMENT_PER_KW * system_size_kw
+    options.append({"type": "lease", "monthly_payment": round(lease, 2), "escalator": escalator, "term_years": third_party_term})
+    options.append({
+        "type": "ppa",
+        "rate_per_kwh": ppa_rate if ppa_rate is not None else PPA_RATE,
+        "escalator": escalator,
+        "term_years": third_party_term,
+    })
+    return options
+
+
+def _of_type(options: list[dict], kind: str, key: str) -> np.ndarray:
+    return np.array([opt[key] for opt in options if opt["type"] == kind], dtype=np.float64)
+
+
+def _loan_flows(net: np.ndarray, terms: np.ndarray, aprs: np.ndarray, years: int) -> tuple[np.ndarray, ...]:
+    """Level monthly payments on the net cost for (loans,) terms and APRs: the
+    (loans, n, years) monthly outflow, the (loans, n) cash due at signing (only rebates
+    exceeding the cost, as a negative) and the balance still owed after `years`."""
+    principal = np.maximum(net, 0)
+    r = (aprs / 1200)[:, None]
+    months = (terms * 12)[:, None]
+    paid = np.minimum(months, years * 12)
+    growth = (1 + r) ** months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.where(r > 0, r * growth / (growth - 1), 1 / months)
+        remaining = np.where(r > 0, (growth - (1 + r) ** paid) / (growth - 1), (months - paid) / months)
+    payment = factor * principal
+    active = np.arange(years) < terms[:, None, None]
+    return payment[..., None] * active, np.broadcast_to(net - principal, payment.shape), remaining * principal
+
+
+def _escalation(escalator: np.ndarray, terms: np.ndarray, years: int) -> np.ndarray:
+    """(options, years) price multiplier of an escalating contract, zero after its term."""
+    year = np.arange(years)
+    return (1 + escalator[:, None]) ** year * (year < terms[:, None])
+
+
+def evaluate_financing(
+    net_cost: np.ndarray,
+    yearly_production_kwh: np.ndarray,
+    annual_savings: np.ndarray,
+    options: list[dict],
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict[str, np.ndarray]:
+    """(options, n) arrays of first-year monthly payment, cash-flow-positive months over
+    the horizon, lifetime net benefit (savings minus everything paid) and its NPV, for
+    options in the order given. Inputs are the per-path simulate_cash_flows arrays."""
+    for opt in options:
+        if opt["type"] not in ("cash", "loan", "lease", "ppa"):
+            raise ValueError(f"Unknown financing type {opt['type']!r}")
+        if opt["type"] == "loan":
+            _check_loan(opt["term_years"], opt["apr_pct"])
+    n, years = annual_savings.shape
+    order = [[i for i, opt in enumerate(options) if opt["type"] == kind] for kind in ("cash", "loan", "lease", "ppa")]
+    cash, loans, leases, ppas = ([options[i] for i in idx] for idx in order)
+
+    outflow, upfront, residual = [], [], []
+    if cash:
+        outflow.append(np.zeros((len(cash), n, years)))
+        upfront.append(np.broadcast_to(net_cost, (len(cash), n)))
+        residual.append(np.zeros((len(cash), n)))
+    if loans:
+        flows = _loan_flows(net_cost, _of_type(loans, "loan", "term_years"), _of_type(loans, "loan", "apr_pct"), years)
+        for group, values in zip((outflow, upfront, residual), flows):
+            group.append(values)
+    if leases:
+        scale = _escalation(_of_type(leases, "lease", "escalator"), _of_type(leases, "lease", "term_years"), years)
+        monthly = _of_type(leases, "lease", "monthly_payment")[:, None] * scale
+        outflow.append(np.broadcast_to(monthly[:, None, :], (len(leases), n, years)))
+    if ppas:
+        scale = _escalation(_of_type(ppas, "ppa", "escalator"), _of_type(ppas, "ppa", "term_years"), years)
+        rate = _of_type(ppas, "ppa", "rate_per_kwh")[:, None, None]
+        outflow.append(rate * (yearly_production_kwh / 12) * scale[:, None, :])
+    third_party = len(leases) + len(ppas)
+    if third_party:
+        upfront.append(np.zeros((third_party, n)))
+        residual.append(np.zeros((third_party, n)))
+
+    outflow = np.concatenate(outflow)
+    upfront = np.concatenate(upfront)
+    residual = np.concatenate(residual)
+
+    monthly_net = annual_savings / 12 - outflow
+    yearly_net = 12 * monthly_net
+    discount = (1 + discount_rate) ** -np.arange(1, years + 1, dtype=np.float64)
+    # back to the caller's option order
+    inverse = np.argsort(np.concatenate(order))
+    return {
+        "monthly_payment": outflow[..., 0][inverse],
+        "cash_flow_positive_months": 12 * np.count_nonzero(monthly_net > 0, axis=-1)[inverse],
+        "net_benefit": (yearly_net.sum(axis=-1) - upfront - residual)[inverse],
+        "npv": (yearly_net @ discount - upfront - residual * discount[-1])[inverse],
+    }
+
+
+def run_financing(
+    system_size_kw: float,
+    solar_production_kwh: float | None = None,
+    price_per_kwh: float | None = None,
+    flat_rebates: float = 0,
+    state_itc_entries: list[dict] | None = None,
+    years: int = 20,
+    n: int = DEFAULT_N,
+    seed: int | None = None,
+    options: list[dict] | None = None,
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict:
+    """Distributions of each financing option's outcomes over the Monte Carlo paths.
+    options defaults to financing_options(system_size_kw)."""
+    if options is None:
+        options = financing_options(system_size_kw)
+    if not options:
+        raise ValueError("At least one financing option is required")
+    paths = simulate_cash_flows(
+        system_size_kw, solar_production_kwh, price_per_kwh, flat_rebates, state_itc_entries, years, n, seed,
+    )
+    metrics = evaluate_financing(
+        paths["net_cost"], paths["yearly_production_kwh"], paths["annual_savings"], options, discount_rate,
+    )
+    summaries = {key: _summarize_many(values) for key, values in metrics.items()}
+    prob_positive = np.mean(metrics["net_benefit"] > 0, axis=-1).round(4).tolist()
+    return {
+        "n_simulations": n,
+        "years": years,
+        "discount_rate": discount_rate,
+        "options": [
+            {
+                **opt,
+                **{key: rows[i] for key, rows in summaries.items()},
+                "prob_positive_benefit": prob_positive[i],
+            }
+            for i, opt in enumerate(options)
+        ],
+    }
@@ -0,0 +1,215 @@
+"""Offline ZIP gazetteer: zip -> centroid and lat/lon -> nearest zip, state and region.
+
+The gazetteer is a table of ZIP centroids compiled from a local copy of the Census ZCTA
+Gazetteer file (or any delimited file with zip, latitude and longitude columns, plus
+optional state and county) with `python -m utils.gazetteer build SOURCE`. It is written
+to gazetteer.npz next to this module (or GAZETTEER_PATH) and loaded lazily. Nearest-zip
+queries go through a KD-tree over 3-d unit vectors, so "nearest" is nearest on the
+sphere rather than in degrees, and answer in microseconds with no network.
+
+States missing from the source come from the USPS 3-digit prefix allocation, which
+state_for_zip also answers without any gazetteer. Regions come from utils.zip_region.
+"""
+import csv
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from utils.zip_region import get_regions
+
+DEFAULT_GAZETTEER_PATH = Path(__file__).resolve().parent / "gazetteer.npz"
+EARTH_RADIUS_KM = 6371.0088
+# farthest a point may be from its nearest zip centroid and still resolve to it; points
+# beyond (Mexico, Canada, offshore) have no zip
+MAX_MATCH_DISTANCE_KM = 50.0
+
+# Header names accepted for each column (matched case-insensitively)
+SOURCE_COLUMNS = {
+    "zip": ("zip", "zip_code", "zcta", "zcta5", "geoid"),
+    "lat": ("lat", "latitude", "intptlat"),
+    "lon": ("lon", "lng", "longitude", "intptlong"),
+    "state": ("state", "state_abbrev", "stusps", "usps"),
+    "county": ("county", "county_name"),
+}
+
+# USPS 3-digit zip prefix ranges (inclusive) -> state; military and unassigned
+# prefixes are left out
+ZIP_PREFIX_STATES = [
+    (5, 5, "NY"), (6, 7, "PR"), (8, 8, "VI"), (9, 9, "PR"),
+    (10, 27, "MA"), (28, 29, "RI"), (30, 38, "NH"), (39, 49, "ME"),
+    (50, 54, "VT"), (55, 55, "MA"), (56, 59, "VT"), (60, 69, "CT"),
+    (70, 89, "NJ"), (100, 149, "NY"), (150, 196, "PA"), (197, 199, "DE"),
+    (200, 200, "DC"), (201, 201, "VA"), (202, 205, "DC"), (206, 219, "MD"),
+    (220, 246, "VA"), (247, 268, "WV"), (270, 289, "NC"), (290, 299, "SC"),
+    (300, 319, "GA"), (320, 339, "FL"), (341, 349, "FL"), (350, 369, "AL"),
+    (370, 385, "TN"), (386, 397, "MS"), (398, 399, "GA"), (400, 427, "KY"),
+    (430, 459, "OH"), (460, 479, "IN"), (480, 499, "MI"), (500, 528, "IA"),
+    (530, 549, "WI"), (550, 567, "MN"), (569, 569, "DC"), (570, 577, "SD"),
+    (580, 588, "ND"), (590, 599, "MT"), (600, 629, "IL"), (630, 658, "MO"),
+    (660, 679, "KS"), (680, 693, "NE"), (700, 714, "LA"), (716, 729, "AR"),
+    (730, 732, "OK"), (733, 733, "TX"), (734, 749, "OK"), (750, 799, "TX"),
+    (800, 816, "CO"), (820, 831, "WY"), (832, 838, "ID"), (840, 847, "UT"),
+    (850, 865, "AZ"), (870, 884, "NM"), (885, 885, "TX"), (889, 898, "NV"),
+    (900, 961, "CA"), (967, 968, "HI"), (969, 969, "GU"), (970, 979, "OR"),
+    (980, 994, "WA"), (995, 999, "AK"),
+]
+
+_PREFIX_STATE = np.full(1000, "", dtype="U2")
+for _lo, _hi, _state in ZIP_PREFIX_STATES:
+    _PREFIX_STATE[_lo:_hi + 1] = _state
+
+_gazetteer: "Gazetteer | None" = None
+_gazetteer_path: Path | None = None
+
+
+def gazetteer_path() -> Path:
+    return Path(os.getenv("GAZETTEER_PATH", DEFAULT_GAZETTEER_PATH))
+
+
+def _zip_str(zip_code) -> str | None:
+    zip_str = str(zip_code).strip().zfill(5)
+    return zip_str if len(zip_str) == 5 and zip_str.isascii() and zip_str.isdigit() else None
+
+
+def state_for_zip(zip_code: str) -> str | None:
+    """State abbreviation from the zip's USPS prefix, None for unassigned prefixes."""
+    zip_str = _zip_str(zip_code)
+    return (_PREFIX_STATE[int(zip_str[:3])] or None) if zip_str else None
+
+
+def _unit_vectors(lat, lon) -> np.ndarray:
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    lam = np.radians(np.asarray(lon, dtype=np.float64))
+    return np.stack([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)], axis=-1)
+
+
+class Gazetteer:
+    """ZIP centroids with a KD-tree for nearest-zip queries."""
+
+    def __init__(self, zips: np.ndarray, lat: np.ndarray, lon: np.ndarray, state: np.ndarray, county: np.ndarray):
+        from scipy.spatial import cKDTree
+
+        order = np.argsort(zips)
+        self.zips = np.asarray(zips, dtype="U5")[order]
+        self.lat = np.asarray(lat, dtype=np.float64)[order]
+        self.lon = np.asarray(lon, dtype=np.float64)[order]
+        self.state = np.asarray(state, dtype="U2")[order]
+        self.county = np.asarray(county, dtype=str)[order]
+        self.region = get_regions(self.zips)
+        self._tree = cKDTree(_unit_vectors(self.lat, self.lon))
+
+    def _entry(self, i: int, distance_km: float | None = None) -> dict:
+        entry = {
+            "zip": str(self.zips[i]),
+            "state_abbrev": str(self.state[i]) or None,
+            "county": str(self.county[i]) or None,
+            "region": self.region[i],
+            "lat": float(self.lat[i]),
+            "lon": float(self.lon[i]),
+        }
+        if distance_km is not None:
+            entry["distance_km"] = round(distance_km, 3)
+        return entry
+
+    def nearest_many(self, lat, lon) -> tuple[np.ndarray, np.ndarray]:
+        """Row index of the nearest centroid and great-circle distance in km for arrays
+        of coordinates."""
+        chord, index = self._tree.query(_unit_vectors(lat, lon))
+        return index, 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+
+    def nearest(self, lat: float, lon: float, max_distance_km: float | None = None) -> dict | None:
+        """Nearest zip centroid with its distance, or None if it is farther than
+        max_distance_km."""
+        index, distance = self.nearest_many(lat, lon)
+        if max_distance_km is not None and distance > max_distance_km:
+            return None
+        return self._entry(int(index), float(distance))
+
+    def centroid(self, zip_code: str) -> dict | None:
+        zip_str = _zip_str(zip_code)
+        if zip_str is None:
+            return None
+        i = int(np.searchsorted(self.zips, zip_str))
+        if i == len(self.zips) or self.zips[i] != zip_str:
+            return None
+        return self._entry(i)
+
+    def save(self, path: str | Path) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, zips=self.zips, lat=self.lat, lon=self.lon, state=self.state, county=self.county)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Gazetteer":
+        with np.load(path) as data:
+            return cls(data["zips"], data["lat"], data["lon"], data["state"], data["county"])
+
+
+def read_source(path: str | Path) -> Gazetteer:
+    """Gazetteer from a delimited source file (tab or comma) with a header row naming
+    at least the SOURCE_COLUMNS zip, lat and lon columns."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        delimiter = "\t" if "\t" in f.readline() else ","
+        f.seek(0)
+        reader = csv.reader(f, delimiter=delimiter)
+        names = [name.strip().lower() for name in next(reader)]
+        columns = {
+            key: next((names.index(alias) for alias in aliases if alias in names), None)
+            for key, aliases in SOURCE_COLUMNS.items()
+        }
+        missing = [key for key in ("zip", "lat", "lon") if columns[key] is None]
+        if missing:
+            raise ValueError(f"Gazetteer source {path} has no {', '.join(missing)} column")
+        rows = [[field.strip() for field in row] for row in reader if row]
+
+    def column(key: str) -> list[str]:
+        return [row[columns[key]] for row in rows] if columns[key] is not None else [""] * len(rows)
+
+    keep = [(zip_str, i) for i, zip_str in enumerate(map(_zip_str, column("zip"))) if zip_str is not None]
+    zips = [zip_str for zip_str, _ in keep]
+    lat, lon, state, county = (column(key) for key in ("lat", "lon", "state", "county"))
+    return Gazetteer(
+        np.array(zips),
+        np.array([float(lat[i]) for _, i in keep]),
+        np.array([float(lon[i]) for _, i in keep]),
+        np.array([state[i].upper() or state_for_zip(zip_str) or "" for zip_str, i in keep]),
+        np.array([county[i] for _, i in keep]),
+    )
+
+
+def load_gazetteer(path: str | Path | None = None) -> Gazetteer | None:
+    """The compiled gazetteer, loaded once per process. None if it has not been built."""
+    global _gazetteer, _gazetteer_path
+    path = Path(path) if path is not None else gazetteer_path()
+    if _gazetteer is not None and _gazetteer_path == path:
+        return _gazetteer
+    if not path.exists():
+        return None
+    _gazetteer, _gazetteer_path = Gazetteer.load(path), path
+    return _gazetteer
+
+
+def reverse_geocode(lat: float, lon: float, max_distance_km: float | None = MAX_MATCH_DISTANCE_KM) -> dict | None:
+    """Nearest zip centroid to a point, or None without a gazetteer or when the nearest
+    is farther than max_distance_km."""
+    gazetteer = load_gazetteer()
+    return gazetteer.nearest(lat, lon, max_distance_km) if gazetteer is not None else None
+
+
+def zip_centroid(zip_code: str) -> dict | None:
+    """Centroid, state, county and region of a zip, or None if it is unknown or there
+    is no gazetteer."""
+    gazetteer = load_gazetteer()
+    return gazetteer.centroid(zip_code) if gazetteer is not None else None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "build":
+        print("Usage: python -m utils.gazetteer build SOURCE [PATH]")
+        sys.exit(1)
+
+    target = Path(sys.argv[3]) if len(sys.argv) > 3 else gazetteer_path()
+    gazetteer = read_source(sys.argv[2])
+    gazetteer.save(target)
+    print(f"Wrote {len(gazetteer.zips):,} zip centroids to {target}")
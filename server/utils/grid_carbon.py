@@ -0,0 +1,116 @@
+"""Grid emission-factor trajectories per eGRID region, and carbon weight tables.
+
+A region's factor starts at its eGRID REGION_CO2_LBS_PER_MWH value in year 1 and then
+falls by REGION_DECARBONIZATION_RATE every year, as retiring fossil capacity is replaced.
+The rates are planning assumptions in the range of mid-case grid projections, not
+measured data. Zips outside the map use the national CO2_LBS_PER_KWH with
+DEFAULT_DECARBONIZATION_RATE.
+
+Carbon from a first-year kWh is the sum over years of degraded production times that
+year's factor. CARBON_WEIGHTS precomputes the running sum for every region x panel
+degradation bucket x horizon, so closed-form carbon is one table lookup (interpolated
+between degradation buckets). Callers that already hold yearly production (the Monte
+Carlo paths) take one dot product with the region's trajectory instead.
+"""
+import numpy as np
+
+from utils.constants import CO2_LBS_PER_KWH
+from utils.zip_region import REGION_CO2_LBS_PER_MWH, get_region
+
+NATIONAL = "US"
+DEFAULT_DECARBONIZATION_RATE = 0.035
+
+REGION_DECARBONIZATION_RATE = {
+    "AKGD": 0.015,
+    "AKMS": 0.010,
+    "AZNM": 0.035,
+    "CAMX": 0.040,
+    "ERCT": 0.040,
+    "FRCC": 0.030,
+    "HIMS": 0.040,
+    "HIOA": 0.035,
+    "MROE": 0.035,
+    "MROW": 0.045,
+    "NEWE": 0.030,
+    "NWPP": 0.030,
+    "NYCW": 0.035,
+    "NYLI": 0.035,
+    "NYUP": 0.020,
+    "PRMS": 0.020,
+    "RFCE": 0.035,
+    "RFCM": 0.035,
+    "RFCW": 0.035,
+    "RMPA": 0.045,
+    "SPNO": 0.045,
+    "SPSO": 0.040,
+    "SRMV": 0.030,
+    "SRMW": 0.035,
+    "SRSO": 0.035,
+    "SRTV": 0.030,
+    "SRVC": 0.035,
+}
+
+# Row order of the tables; the national fallback is the last row
+REGIONS = [*REGION_CO2_LBS_PER_MWH, NATIONAL]
+DEGRADATION_STEP = 0.0005
+DEGRADATION_BUCKETS = np.arange(61) * DEGRADATION_STEP  # 0 to 3% per year
+MAX_TABLE_YEARS = 50
+
+_base = np.array([REGION_CO2_LBS_PER_MWH[r] / 1000 for r in REGIONS[:-1]] + [CO2_LBS_PER_KWH])
+_rate = np.array([REGION_DECARBONIZATION_RATE.get(r, DEFAULT_DECARBONIZATION_RATE) for r in REGIONS])
+
+# (regions, years) lbs CO2 per kWh in years 1..MAX_TABLE_YEARS
+EMISSION_FACTORS = _base[:, None] * (1 - _rate[:, None]) ** np.arange(MAX_TABLE_YEARS)
+EMISSION_FACTORS.flags.writeable = False
+
+# (regions, buckets, 0..MAX_TABLE_YEARS) cumulative lbs per first-year kWh
+_production = (1 - DEGRADATION_BUCKETS[:, None]) ** np.arange(1, MAX_TABLE_YEARS + 1)
+CARBON_WEIGHTS = np.zeros((len(REGIONS), len(DEGRADATION_BUCKETS), MAX_TABLE_YEARS + 1))
+CARBON_WEIGHTS[..., 1:] = np.cumsum(EMISSION_FACTORS[:, None, :] * _production[None], axis=-1)
+CARBON_WEIGHTS.flags.writeable = False
+
+
+def carbon_region(zip_code: str | None) -> str:
+    """eGRID region of a zip, or NATIONAL when it is unknown or unmapped."""
+    region = get_region(zip_code) if zip_code else None
+    return region if region in REGION_CO2_LBS_PER_MWH else NATIONAL
+
+
+def emission_trajectory(zip_code: str | None, years: int) -> np.ndarray:
+    """(years,) lbs CO2 per kWh for years 1..years."""
+    i = REGIONS.index(carbon_region(zip_code))
+    if years <= MAX_TABLE_YEARS:
+        return EMISSION_FACTORS[i, :years]
+    return _base[i] * (1 - _rate[i]) ** np.arange(years)
+
+
+def cumulative_carbon_weight(
+    zip_code: str | None,
+    panel_degradation: float | np.ndarray,
+    years: float | np.ndarray,
+) -> np.ndarray:
+    """Lifetime lbs CO2 avoided per first-year kWh: a CARBON_WEIGHTS lookup, linear
+    between degradation buckets. Entries outside the table (fractional or very long
+    horizons, degradation above the last bucket) use the geometric series directly."""
+    i = REGIONS.index(carbon_region(zip_code))
+    d = np.asarray(panel_degradation, dtype=np.float64)
+    y = np.asarray(years, dtype=np.float64)
+    d, y = np.broadcast_arrays(d, y)
+
+    position = d / DEGRADATION_STEP
+    bucket = np.clip(np.floor(position).astype(np.int64), 0, len(DEGRADATION_BUCKETS) - 2)
+    t = position - bucket
+    in_table = (d >= 0) & (d <= DEGRADATION_BUCKETS[-1]) & (y == np.round(y)) & (y >= 0) & (y <= MAX_TABLE_YEARS)
+    year = np.where(in_table, y, 0).astype(np.int64)
+    lo = CARBON_WEIGHTS[i, bucket, year]
+    hi = CARBON_WEIGHTS[i, bucket + 1, year]
+    looked_up = lo + t * (hi - lo)
+    if in_table.all():
+        return looked_up
+
+    # sum_{y=1..Y} (1-d)^y * base * k^(y-1) = base / k * sum (q)^y with q = (1-d) k
+    k = 1 - _rate[i]
+    q = (1 - d) * k
+    with np.errstate(divide="ignore", invalid="ignore"):
+        direct = _base[i] / k * np.where(q == 1, y, q * np.expm1(y * np.log(q)) / (q - 1))
+    return np.where(in_table, looked_up, direct)
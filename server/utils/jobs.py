@@ -0,0 +1,281 @@
+"""Background simulation jobs with a persistent on-disk store.
+
+Runs too large for a synchronous request (tens of millions of paths, long horizons,
+sensitivity sweeps) are submitted as jobs. Each job is one JSON record in the store
+directory (SIMULATION_JOB_STORE, default utils/jobs/), written atomically, so any
+process can read it and finished results survive restarts. A JobManager executes jobs
+on a local process pool; workers write progress and, for simulations, the running
+StreamingSummary as partial percentiles (with their error bounds) while the run
+converges. Cancellation drops a marker file next to the record that the worker checks
+after every chunk.
+
+Records of jobs still queued or running when the process that owns the pool exits are
+reported as "interrupted"; resubmit them. A record names its owner by PID, a per-process
+token and the process start time, so a restarted server that gets the old PID again
+(PID 1 in a container) or an unrelated process reusing it does not keep the job alive.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Literal
+
+from utils.columnar import dumps
+from utils.monte_carlo import DEFAULT_CHUNK_SIZE, StreamingSummary, run_simulation
+from utils.sensitivity import sobol_indices, tornado
+
+DEFAULT_STORE_PATH = Path(__file__).resolve().parent / "jobs"
+DEFAULT_JOB_WORKERS = 2
+PROGRESS_INTERVAL = 1.0  # seconds between partial-result writes
+
+JobKind = Literal["simulation", "sensitivity"]
+ACTIVE_STATUSES = ("queued", "running")
+
+# owner_pid, owner_token and owner_started of this process, set on first use
+_owner: dict | None = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def store_path() -> Path:
+    return Path(os.getenv("SIMULATION_JOB_STORE", DEFAULT_STORE_PATH))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_started(pid: int) -> int | None:
+    """Start time of a process in clock ticks since boot (Linux /proc), or None where
+    it cannot be read."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    return int(stat.rsplit(")", 1)[1].split()[19])
+
+
+def _owner_fields() -> dict:
+    """This process's identity for the records it owns, created once per process."""
+    global _owner
+    if _owner is None or _owner["owner_pid"] != os.getpid():
+        _owner = {
+            "owner_pid": os.getpid(),
+            "owner_token": uuid.uuid4().hex,
+            "owner_started": _process_started(os.getpid()),
+        }
+    return _owner
+
+
+def _owner_alive(record: dict) -> bool:
+    """Whether the process that owns a record is still the one running under its PID."""
+    pid = record["owner_pid"]
+    if pid == os.getpid():
+        return record.get("owner_token") == _owner_fields()["owner_token"]
+    if not _pid_alive(pid):
+        return False
+    started = record.get("owner_started")
+    return started is None or _process_started(pid) in (None, started)
+
+
+class JobStore:
+    """One <job_id>.json record per job plus a <job_id>.cancel marker when requested."""
+
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root) if root is not None else store_path()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _record_path(self, job_id: str) -> Path:
+        if not job_id or not all(c.isalnum() or c == "-" for c in job_id):
+            raise KeyError(job_id)
+        return self.root / f"{job_id}.json"
+
+    def write(self, record: dict) -> None:
+        path = self._record_path(record["id"])
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(dumps(record))
+        os.replace(tmp, path)
+
+    def read(self, job_id: str) -> dict:
+        """The stored record; KeyError if there is none. Active jobs whose owning
+        process has exited read as "interrupted"."""
+        path = self._record_path(job_id)
+        try:
+            record = json.loads(path.read_bytes())
+        except FileNotFoundError:
+            raise KeyError(job_id) from None
+        if record["status"] in ACTIVE_STATUSES and not _owner_alive(record):
+            record["status"] = "interrupted"
+        return record
+
+    def update(self, job_id: str, **fields) -> dict:
+        record = json.loads(self._record_path(job_id).read_bytes())
+        record.update(fields, updated_at=time.time())
+        self.write(record)
+        return record
+
+    def list(self) -> list[dict]:
+        """Every record without its partial or final result, newest first."""
+        records = []
+        for path in self.root.glob("*.json"):
+            try:
+                record = self.read(path.stem)
+            except (KeyError, ValueError):
+                continue
+            records.append({key: value for key, value in record.items() if key not in ("partial", "result")})
+        return sorted(records, key=lambda record: record["created_at"], reverse=True)
+
+    def request_cancel(self, job_id: str) -> None:
+        self._record_path(job_id).with_suffix(".cancel").touch()
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return self._record_path(job_id).with_suffix(".cancel").exists()
+
+
+class _Progress:
+    """run_simulation progress callback: checks for cancellation after every chunk and
+    publishes the running summary at most every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, store: JobStore, job_id: str, n: int):
+        self.store = store
+        self.job_id = job_id
+        self.n = n
+        self.last_write = 0.0
+
+    def __call__(self, summary: StreamingSummary) -> None:
+        if self.store.cancel_requested(self.job_id):
+            raise JobCancelled
+        now = time.monotonic()
+        if now - self.last_write >= PROGRESS_INTERVAL or summary.count == self.n:
+            self.store.update(
+                self.job_id,
+                progress=round(summary.count / self.n, 4),
+                paths_done=summary.count,
+                partial=summary.to_dict(),
+            )
+            self.last_write = now
+
+
+def _run(store: JobStore, record: dict) -> dict:
+    params = dict(record["params"])
+    if record["kind"] == "simulation":
+        chunk_size = params.pop("chunk_size", DEFAULT_CHUNK_SIZE)
+        return run_simulation(
+            **params, chunk_size=chunk_size, progress=_Progress(store, record["id"], params["n"]),
+        )
+    method = params.pop("method", "sobol")
+    if method == "tornado":
+        params.pop("n_base", None)
+        params.pop("seed", None)
+        return tornado(**params)
+    return sobol_indices(**params)
+
+
+def execute_job(root: str, job_id: str) -> str:
+    """Run one stored job to completion and record the outcome. Runs in a pool worker,
+    so everything it needs comes from the store. Returns the final status."""
+    store = JobStore(root)
+    record = store.read(job_id)
+    if store.cancel_requested(job_id):
+        store.update(job_id, status="cancelled")
+        return "cancelled"
+    store.update(job_id, status="running", started_at=time.time())
+    try:
+        result = _run(store, record)
+    except JobCancelled:
+        store.update(job_id, status="cancelled")
+        return "cancelled"
+    except Exception as exc:
+        store.update(job_id, status="failed", error=f"{type(exc).__name__}: {exc}")
+        return "failed"
+    store.update(job_id, status="succeeded", progress=1.0, partial=None, result=result, finished_at=time.time())
+    return "succeeded"
+
+
+class JobManager:
+    """Submits jobs to a local worker pool (a process pool of DEFAULT_JOB_WORKERS, or
+    SIMULATION_JOB_WORKERS, unless an executor is given) and tracks their futures."""
+
+    def __init__(self, store: JobStore | None = None, executor: Executor | None = None):
+        self.store = store if store is not None else JobStore()
+        self._executor = executor
+        self._futures: dict[str, Future] = {}
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            workers = int(os.getenv("SIMULATION_JOB_WORKERS", DEFAULT_JOB_WORKERS))
+            self._executor = ProcessPoolExecutor(max_workers=max(1, workers))
+        return self._executor
+
+    def submit(self, kind: JobKind, params: dict) -> dict:
+        now = time.time()
+        record = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "params": params,
+            "progress": 0.0,
+            "paths_done": 0,
+            "created_at": now,
+            "updated_at": now,
+            **_owner_fields(),
+            "partial": None,
+            "result": None,
+            "error": None,
+        }
+        self.store.write(record)
+        future = self.executor.submit(execute_job, str(self.store.root), record["id"])
+        future.add_done_callback(lambda f, job_id=record["id"]: self._finished(job_id, f))
+        self._futures[record["id"]] = future
+        return record
+
+    def _finished(self, job_id: str, future: Future) -> None:
+        """Record jobs that never reported an outcome themselves (dropped from the queue,
+        or a worker process that died)."""
+        self._futures.pop(job_id, None)
+        if future.cancelled():
+            self.store.update(job_id, status="cancelled")
+        elif future.exception() is not None:
+            self.store.update(job_id, status="failed", error=f"Worker failed: {future.exception()}")
+
+    def cancel(self, job_id: str) -> dict:
+        """Cancel a queued or running job. Queued jobs are dropped at once; running ones
+        stop after their current chunk. KeyError for unknown jobs."""
+        record = self.store.read(job_id)
+        if record["status"] not in ACTIVE_STATUSES:
+            return record
+        self.store.request_cancel(job_id)
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            return self.store.read(job_id)
+        return {**record, "cancel_requested": True}
+
+    def wait(self, job_id: str, timeout: float | None = None) -> dict:
+        """Block until a job submitted by this manager finishes; returns its record."""
+        future = self._futures.get(job_id)
+        if future is not None:
+            wait([future], timeout)
+        return self.store.read(job_id)
+
+
+_manager: JobManager | None = None
+
+
+def job_manager() -> JobManager:
+    """The process-wide JobManager over the default store, created on first use."""
+    global _manager
+    if _manager is None:
+        _manager = JobManager()
+    return _manager
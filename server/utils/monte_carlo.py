@@ -1,14 +1,33 @@
+import contextlib
+import math
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Literal, get_args
+
 import numpy as np
 
 from utils.calculations import (
+    _cumulative_savings,
+    _power_table,
+    _round_cents,
+    _yearly_production,
     calculate_gross_cost,
-    calculate_net_cost,
-    calculate_savings_over_time,
-    calculate_carbon_offset,
+    calculate_net_cost_array,
 )
-from utils.constants import DEFAULT_UTILITY_RATE, DEFAULT_SOLAR_PRODUCTION_KWH
+from utils.constants import DEFAULT_UTILITY_RATE, DEFAULT_SOLAR_PRODUCTION_KWH, DISCOUNT_RATE
+from utils.draw_bank import load_draw_bank, take_window
+from utils.grid_carbon import emission_trajectory
+from utils.sketches import QuantileSketch, RunningMoments
 
 DEFAULT_N = 1000
+DEFAULT_CHUNK_SIZE = 10_000
+SHARD_SIZE = 25_000
+DEFAULT_BATCH_SIZE = 256
+IRR_BRACKET = (-0.99, 10.0)
+IRR_BLOCK = 8192  # paths per Newton pass; keeps the per-year temporaries in cache
+
+SamplingMethod = Literal["pseudo", "antithetic", "lhs", "sobol", "bank"]
+SAMPLING_METHODS = get_args(SamplingMethod)
 
 DISTRIBUTIONS = {
     "utility_inflation":      {"mean": 0.025, "std": 0.01,  "clip_min": 0.0},
@@ -17,6 +36,9 @@ DISTRIBUTIONS = {
     "production_variability": {"mean": 1.0,   "std": 0.07,  "clip_min": 0.5},
 }
 
+PERCENTILES = [5, 25, 50, 75, 95]
+PERCENTILE_KEYS = [str(p) for p in PERCENTILES]
+
 
 def _sample(rng: np.random.Generator, dist: dict, shape: tuple) -> np.ndarray:
     values = rng.normal(dist["mean"], dist["std"], shape)
@@ -25,15 +47,654 @@ def _sample(rng: np.random.Generator, dist: dict, shape: tuple) -> np.ndarray:
     return values
 
 
+def _draw_samples(rng: np.random.Generator, n: int, years: int) -> dict[str, np.ndarray]:
+    """One draw per path for the scalar distributions, one per path-year for production."""
+    return {
+        "utility_inflation": _sample(rng, DISTRIBUTIONS["utility_inflation"], (n,)),
+        "panel_degradation": _sample(rng, DISTRIBUTIONS["panel_degradation"], (n,)),
+        "cost_overrun_pct": _sample(rng, DISTRIBUTIONS["cost_overrun_pct"], (n,)),
+        "production_variability": _sample(rng, DISTRIBUTIONS["production_variability"], (n, years)),
+    }
+
+
+def _apply_distribution(dist: dict, z: np.ndarray) -> np.ndarray:
+    """Scale standard normals to a DISTRIBUTIONS entry, same arithmetic as rng.normal."""
+    values = dist["mean"] + dist["std"] * z
+    if "clip_min" in dist:
+        np.clip(values, dist["clip_min"], None, out=values)
+    return values
+
+
+def _samples_from_normals(z: np.ndarray, years: int) -> dict[str, np.ndarray]:
+    """Map an (n, 3 + years) block of standard normals onto the four distributions."""
+    return {
+        "utility_inflation": _apply_distribution(DISTRIBUTIONS["utility_inflation"], z[:, 0]),
+        "panel_degradation": _apply_distribution(DISTRIBUTIONS["panel_degradation"], z[:, 1]),
+        "cost_overrun_pct": _apply_distribution(DISTRIBUTIONS["cost_overrun_pct"], z[:, 2]),
+        "production_variability": _apply_distribution(DISTRIBUTIONS["production_variability"], z[:, 3:3 + years]),
+    }
+
+
+def _uniform_to_normal(u: np.ndarray) -> np.ndarray:
+    from scipy.special import ndtri
+
+    eps = np.finfo(np.float64).eps
+    return ndtri(np.clip(u, eps, 1 - eps))
+
+
+def _require_bank(draws: int) -> np.ndarray:
+    """The draw bank, if it is built and holds at least `draws` draws."""
+    bank = load_draw_bank()
+    if bank is None:
+        raise ValueError("No draw bank found; build one with `python -m utils.draw_bank build`")
+    if draws > bank.size:
+        raise ValueError(
+            f"Bank sampling needs {draws:,} draws but the draw bank holds {bank.size:,}; build a larger "
+            "one with `python -m utils.draw_bank build SIZE` or use another sampling method"
+        )
+    return bank
+
+
+class _Sampler:
+    """Draws successive batches of samples with one of SAMPLING_METHODS.
+
+    pseudo      plain rng.normal, identical to _draw_samples
+    antithetic  each normal vector z is paired with -z
+    lhs         Latin hypercube per batch, mapped through the normal inverse CDF
+    sobol       scrambled Sobol sequence, continued across batches
+    bank        consecutive windows of the memory-mapped draw bank, starting at a
+                seed-determined offset (or bank_offset); a sampler never takes more
+                draws than the bank holds, so no draw is reused (see utils.draw_bank)
+    """
+
+    def __init__(
+        self,
+        rng: np.random.Generator,
+        years: int,
+        sampling: str = "pseudo",
+        dims: int | None = None,
+        bank_offset: int | None = None,
+    ):
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"Unknown sampling method {sampling!r}, expected one of {SAMPLING_METHODS}")
+        self.rng = rng
+        self.years = years
+        self.sampling = sampling
+        self.dims = dims if dims is not None else 3 + years
+        self._sobol = None
+        self._bank_offset = bank_offset
+        self._bank_drawn = 0
+
+    def normals(self, n: int) -> np.ndarray:
+        """(n, dims) block of standard normals."""
+        if self.sampling == "pseudo":
+            return self.rng.standard_normal((n, self.dims))
+        if self.sampling == "antithetic":
+            half = self.rng.standard_normal((-(-n // 2), self.dims))
+            return np.concatenate([half, -half])[:n]
+        if self.sampling == "bank":
+            bank = _require_bank(self._bank_drawn + n * self.dims)
+            if self._bank_offset is None:
+                self._bank_offset = int(self.rng.integers(bank.size))
+            z = take_window(bank, self._bank_offset, n * self.dims).reshape(n, self.dims)
+            self._bank_offset += n * self.dims
+            self._bank_drawn += n * self.dims
+            return z
+
+        from scipy.stats import qmc
+
+        if self.sampling == "lhs":
+            return _uniform_to_normal(qmc.LatinHypercube(d=self.dims, seed=self.rng).random(n))
+        if self._sobol is None:
+            self._sobol = qmc.Sobol(d=self.dims, scramble=True, seed=self.rng)
+        with warnings.catch_warnings():
+            # balance is best at powers of two, but any n is still a valid low-discrepancy prefix
+            warnings.simplefilter("ignore", UserWarning)
+            return _uniform_to_normal(self._sobol.random(n))
+
+    def draw(self, n: int) -> dict[str, np.ndarray]:
+        if self.sampling == "pseudo":
+            return _draw_samples(self.rng, n, self.years)
+        return _samples_from_normals(self.normals(n), self.years)
+
+
+def _path_factors(samples: dict[str, np.ndarray], years: int) -> dict[str, np.ndarray]:
+    """Per-path (n, years) compounding factors; depend only on the draws, so they can be
+    shared by every configuration evaluated against the same samples."""
+    return {
+        "degradation": _power_table(1 - samples["panel_degradation"], years),
+        "inflation": _power_table(1 + samples["utility_inflation"], years),
+    }
+
+
+def _solve_irr(net: np.ndarray, annual_savings: np.ndarray, tol: float = 1e-10, max_iter: int = 60) -> np.ndarray:
+    """Rate at which each path's discounted savings repay its net cost, for net of shape
+    (..., n) and annual_savings of shape (..., n, years).
+
+    NPV is strictly decreasing in the rate when every year's savings are positive, so the
+    root is unique inside IRR_BRACKET. Safeguarded Newton: each iteration tightens the
+    per-path bracket, and a step that leaves it is replaced by bisection. The present
+    value and its derivative are evaluated by Horner's rule in v = 1 / (1 + rate), one
+    vector operation per year. Paths that cost nothing pin to the top of the bracket.
+
+    Leading configuration axes are flattened into the path axis and solved IRR_BLOCK
+    paths at a time, so stacking configurations does not push the Horner temporaries
+    out of cache; within a block, paths leave the working set as they converge."""
+    flat_net = net.ravel()
+    flows = annual_savings.reshape(-1, annual_savings.shape[-1])
+    out = np.empty(flat_net.shape)
+    for start in range(0, flat_net.size, IRR_BLOCK):
+        block = slice(start, start + IRR_BLOCK)
+        out[block] = _solve_irr_block(flat_net[block], flows[block], tol, max_iter)
+    return out.reshape(net.shape)
+
+
+def _solve_irr_block(net: np.ndarray, annual_savings: np.ndarray, tol: float, max_iter: int) -> np.ndarray:
+    """_solve_irr for a 1-d block of paths."""
+    out = np.full(net.shape, IRR_BRACKET[1])
+    index = np.flatnonzero(net > 0)
+    cost = net[index]
+    flows = annual_savings[index, ::-1].T.copy()
+    lo = np.full(index.shape, IRR_BRACKET[0])
+    hi = np.full(index.shape, IRR_BRACKET[1])
+    rate = np.full(index.shape, 0.1)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(max_iter):
+            if not index.size:
+                break
+            v = 1 / (1 + rate)
+            # q = sum s_t v^(t-1), dq = dq/dv; present value = v * q
+            q = np.zeros(index.shape)
+            dq = np.zeros(index.shape)
+            for savings in flows:
+                dq = dq * v + q
+                q = q * v + savings
+            npv = v * q - cost
+            slope = -v * v * (q + v * dq)
+            below = npv > 0
+            lo = np.where(below, rate, lo)
+            hi = np.where(below, hi, rate)
+            step = rate - npv / slope
+            step = np.where((step > lo) & (step < hi), step, 0.5 * (lo + hi))
+            moving = ~(np.abs(step - rate) < tol)
+            rate = step
+            if not moving.all():
+                out[index[~moving]] = rate[~moving]
+                index, cost, flows = index[moving], cost[moving], flows[:, moving]
+                lo, hi, rate = lo[moving], hi[moving], rate[moving]
+    out[index] = rate
+    return out
+
+
+def _annual_paths(
+    production_variability: np.ndarray,
+    factors: dict[str, np.ndarray],
+    production: float | np.ndarray,
+    rate: float | np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per-path (..., n, years) yearly production and undiscounted yearly savings."""
+    yearly_production = _yearly_production(production, factors["degradation"], production_variability)
+    return yearly_production, yearly_production * (rate * factors["inflation"])
+
+
+def _evaluate_paths(
+    net: np.ndarray,
+    production_variability: np.ndarray,
+    factors: dict[str, np.ndarray],
+    production: float | np.ndarray,
+    rate: float | np.ndarray,
+    years: int,
+    co2_by_year: np.ndarray,
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict[str, np.ndarray]:
+    """Savings, payback, carbon and discounted metrics for net costs of shape (..., n).
+    production and rate are scalars or arrays shaped (..., 1, 1) so leading
+    configuration axes broadcast."""
+    yearly_production, annual_savings = _annual_paths(production_variability, factors, production, rate)
+    return _flow_metrics(net, yearly_production, annual_savings, years, co2_by_year, discount_rate)
+
+
+def _payback(net: np.ndarray, annual_savings: np.ndarray, cumulative: np.ndarray, years: int) -> np.ndarray:
+    """Fractional payback: interpolated linearly within the first year the balance turns
+    non-negative; paths that never pay back report years + 1."""
+    paid_back = cumulative >= 0
+    ever = paid_back.any(axis=-1)
+    year = paid_back.argmax(axis=-1)
+    previous = np.take_along_axis(cumulative, np.maximum(year - 1, 0)[..., None], axis=-1)[..., 0]
+    before = np.where(year == 0, -net, previous)
+    during = np.take_along_axis(annual_savings, year[..., None], axis=-1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ever, np.maximum(year + -before / during, 0.0), years + 1)
+
+
+def _flow_metrics(
+    net: np.ndarray,
+    yearly_production: np.ndarray,
+    annual_savings: np.ndarray,
+    years: int,
+    co2_by_year: np.ndarray,
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict[str, np.ndarray]:
+    """_evaluate_paths from explicit (..., n, years) generation and savings flows, for
+    callers (e.g. technology portfolios) that build the flows themselves."""
+    terms = _flow_terms(yearly_production, annual_savings, years, co2_by_year, discount_rate)
+    return _net_metrics(net, annual_savings, terms, years)
+
+
+def _flow_terms(
+    yearly_production: np.ndarray,
+    annual_savings: np.ndarray,
+    years: int,
+    co2_by_year: np.ndarray,
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict[str, np.ndarray]:
+    """The per-path metrics that do not involve net cost: carbon offset and the present
+    values of production and savings. Configurations with the same flows share them."""
+    discount = (1 + discount_rate) ** -np.arange(1, years + 1, dtype=np.float64)
+    return {
+        "carbon_offset_tons": _round_cents(yearly_production @ co2_by_year / 2000),
+        "savings_pv": annual_savings @ discount,
+        "production_pv": yearly_production @ discount,
+    }
+
+
+def _net_metrics(
+    net: np.ndarray, annual_savings: np.ndarray, terms: dict[str, np.ndarray], years: int,
+) -> dict[str, np.ndarray]:
+    """_flow_metrics given the flows' _flow_terms: everything that depends on net cost."""
+    cumulative = _cumulative_savings(net, annual_savings)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lcoe = 100 * net / terms["production_pv"]
+
+    return {
+        "net_cost": net,
+        "payback_years": _payback(net, annual_savings, cumulative, years),
+        "carbon_offset_tons": terms["carbon_offset_tons"],
+        "npv": terms["savings_pv"] - net,
+        "irr_pct": 100 * _solve_irr(net, annual_savings),
+        "lcoe_cents_per_kwh": lcoe,
+        "cumulative_savings": cumulative,
+    }
+
+
+def _simulate_paths(
+    samples: dict[str, np.ndarray],
+    gross_cost: float,
+    production: float,
+    rate: float,
+    flat_rebates: float,
+    state_itc_entries: list[dict] | None,
+    years: int,
+    co2_by_year: np.ndarray,
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict[str, np.ndarray]:
+    """Evaluate every path at once. Returns per-path net cost, payback, carbon, NPV, IRR,
+    LCOE and the (n, years) cumulative savings matrix."""
+    net = calculate_net_cost_array(
+        gross_cost * (1 + samples["cost_overrun_pct"]), flat_rebates, state_itc_entries=state_itc_entries,
+    )
+    return _evaluate_paths(
+        net, samples["production_variability"], _path_factors(samples, years),
+        production, rate, years, co2_by_year, discount_rate,
+    )
+
+
+def simulate_cash_flows(
+    system_size_kw: float,
+    solar_production_kwh: float | None = None,
+    price_per_kwh: float | None = None,
+    flat_rebates: float = 0,
+    state_itc_entries: list[dict] | None = None,
+    years: int = 20,
+    n: int = DEFAULT_N,
+    seed: int | None = None,
+    sampling: str = "pseudo",
+) -> dict[str, np.ndarray]:
+    """Raw per-path cash flows for consumers that price them differently (financing):
+    net_cost (n,), and yearly_production_kwh and annual_savings (n, years). Uses the
+    same draws as run_simulation for a given seed and sampling."""
+    params = _simulation_params(
+        system_size_kw, solar_production_kwh, price_per_kwh, flat_rebates, state_itc_entries, years, None,
+    )
+    samples = _Sampler(np.random.default_rng(seed), years, sampling).draw(n)
+    net = calculate_net_cost_array(
+        params["gross_cost"] * (1 + samples["cost_overrun_pct"]), flat_rebates, state_itc_entries=state_itc_entries,
+    )
+    yearly_production, annual_savings = _annual_paths(
+        samples["production_variability"], _path_factors(samples, years), params["production"], params["rate"],
+    )
+    return {"net_cost": net, "yearly_production_kwh": yearly_production, "annual_savings": annual_savings}
+
+
+def _percentiles(arr: np.ndarray, axis: int = -1) -> np.ndarray:
+    """np.percentile(arr, PERCENTILES, axis) (linear interpolation, same bits) from one
+    sort. numpy partitions around every bracketing index instead, which is several
+    times slower for the five percentiles reported; a row with NaN gives NaN."""
+    ordered = np.sort(np.moveaxis(arr, axis, -1), axis=-1)
+    position = np.asarray(PERCENTILES) / 100 * (ordered.shape[-1] - 1)
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, ordered.shape[-1] - 1)
+    weight = position - below
+    low, high = ordered[..., below], ordered[..., above]
+    step = high - low
+    # numpy's lerp: from the nearer end, so a weight of 1 returns high exactly
+    values = np.where(weight >= 0.5, high - step * (1 - weight), low + step * weight)
+    values = np.where(np.isnan(ordered[..., -1:]), np.nan, values)
+    return np.moveaxis(values, -1, 0)
+
+
+def _summarize_many(arr: np.ndarray) -> list[dict]:
+    """Mean, std and percentiles for each row of a (c, n) array, in one pass."""
+    means = _round_cents(np.mean(arr, axis=-1)).tolist()
+    stds = _round_cents(np.std(arr, axis=-1)).tolist()
+    values = _round_cents(_percentiles(arr)).T.tolist()
+    return [
+        {"mean": mean, "std": std, "percentiles": dict(zip(PERCENTILE_KEYS, row))}
+        for mean, std, row in zip(means, stds, values)
+    ]
+
+
 def _summarize(arr: np.ndarray) -> dict:
-    pcts = [5, 25, 50, 75, 95]
+    return _summarize_many(arr[None])[0]
+
+
+def _summarize_paths_many(paths: dict[str, np.ndarray], n: int, years: int) -> list[dict]:
+    """_summarize_paths for path arrays with a leading configuration axis."""
+    cumulative = paths["cumulative_savings"]
+    scalars = {
+        "net_cost": _summarize_many(paths["net_cost"]),
+        "payback_years": _summarize_many(paths["payback_years"]),
+        "total_savings_20yr": _summarize_many(cumulative[..., -1]),
+        "carbon_offset_tons": _summarize_many(paths["carbon_offset_tons"]),
+        "npv": _summarize_many(paths["npv"]),
+        "irr_pct": _summarize_many(paths["irr_pct"]),
+        "lcoe_cents_per_kwh": _summarize_many(paths["lcoe_cents_per_kwh"]),
+    }
+    # per-year bands stay numpy columns (one contiguous row per percentile)
+    by_year = np.ascontiguousarray(_round_cents(_percentiles(cumulative, axis=-2)).swapaxes(0, 1))
+    mean_by_year = _round_cents(np.mean(cumulative, axis=-2))
+    return [
+        {
+            "n_simulations": n,
+            "years": years,
+            **{key: summaries[i] for key, summaries in scalars.items()},
+            "savings_by_year": {
+                "percentiles": dict(zip(PERCENTILE_KEYS, by_year[i])),
+                "mean": mean_by_year[i],
+            },
+        }
+        for i in range(cumulative.shape[0])
+    ]
+
+
+def _summarize_paths(paths: dict[str, np.ndarray], n: int, years: int) -> dict:
+    return _summarize_paths_many({key: arr[None] for key, arr in paths.items()}, n, years)[0]
+
+
+class StreamingSummary:
+    """Running moments and quantile sketches for every reported metric.
+    Paths are folded in chunk by chunk and then discarded, so memory stays flat in n."""
+
+    SCALAR_METRICS = [
+        "net_cost", "payback_years", "total_savings_20yr", "carbon_offset_tons",
+        "npv", "irr_pct", "lcoe_cents_per_kwh",
+    ]
+
+    def __init__(self, years: int):
+        self.years = years
+        self.moments = {key: RunningMoments() for key in self.SCALAR_METRICS}
+        self.sketches = {key: QuantileSketch() for key in self.SCALAR_METRICS}
+        self.moments["savings_by_year"] = RunningMoments(years)
+        self.sketches["savings_by_year"] = QuantileSketch(years)
+
+    @property
+    def count(self) -> int:
+        return self.moments["net_cost"].count
+
+    def add(self, paths: dict[str, np.ndarray]) -> None:
+        cumulative = paths["cumulative_savings"]
+        values = {
+            "net_cost": paths["net_cost"],
+            "payback_years": paths["payback_years"],
+            "total_savings_20yr": cumulative[:, -1],
+            "carbon_offset_tons": paths["carbon_offset_tons"],
+            "npv": paths["npv"],
+            "irr_pct": paths["irr_pct"],
+            "lcoe_cents_per_kwh": paths["lcoe_cents_per_kwh"],
+            "savings_by_year": cumulative,
+        }
+        for key, arr in values.items():
+            self.moments[key].add(arr)
+            self.sketches[key].add(arr)
+
+    def merge(self, other: "StreamingSummary") -> None:
+        for key in self.moments:
+            self.moments[key].merge(other.moments[key])
+            self.sketches[key].merge(other.sketches[key])
+
+    def _metric(self, key: str) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        sketch = self.sketches[key]
+        estimates = sketch.quantiles(PERCENTILES)
+        return self.moments[key].mean, self.moments[key].std, estimates, sketch.error_bounds(estimates)
+
+    def to_dict(self) -> dict:
+        result = {"n_simulations": self.count, "years": self.years}
+        for key in self.SCALAR_METRICS:
+            mean, std, estimates, errors = self._metric(key)
+            result[key] = {
+                "mean": round(float(mean[0]), 2),
+                "std": round(float(std[0]), 2),
+                "percentiles": {str(p): round(float(v), 2) for p, v in zip(PERCENTILES, estimates[:, 0])},
+                "percentile_error": {str(p): round(float(e), 2) for p, e in zip(PERCENTILES, errors[:, 0])},
+            }
+        mean, _, estimates, errors = self._metric("savings_by_year")
+        result["savings_by_year"] = {
+            "percentiles": dict(zip(PERCENTILE_KEYS, _round_cents(estimates))),
+            "percentile_error": dict(zip(PERCENTILE_KEYS, _round_cents(errors))),
+            "mean": _round_cents(mean),
+        }
+        return result
+
+
+def _simulation_params(
+    system_size_kw: float,
+    solar_production_kwh: float | None,
+    price_per_kwh: float | None,
+    flat_rebates: float,
+    state_itc_entries: list[dict] | None,
+    years: int,
+    zip_code: str | None,
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict:
+    """Resolve defaults into the keyword arguments of _simulate_paths."""
     return {
-        "mean": round(float(np.mean(arr)), 2),
-        "std": round(float(np.std(arr)), 2),
-        "percentiles": {
-            str(p): round(float(np.percentile(arr, p)), 2) for p in pcts
-        },
+        "gross_cost": calculate_gross_cost(system_size_kw),
+        "production": solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH,
+        "rate": price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE,
+        "flat_rebates": flat_rebates,
+        "state_itc_entries": state_itc_entries,
+        "years": years,
+        "co2_by_year": emission_trajectory(zip_code, years),
+        "discount_rate": discount_rate,
+    }
+
+
+def _shard_sizes(n: int) -> list[int]:
+    """Split n into shards of at most SHARD_SIZE. Depends only on n, never on the
+    worker count, so a seed maps to the same shard streams however they are scheduled."""
+    n_shards = max(1, math.ceil(n / SHARD_SIZE))
+    return [len(part) for part in np.array_split(np.arange(n), n_shards)]
+
+
+def _run_shard(
+    seed: np.random.SeedSequence | int | None,
+    size: int,
+    params: dict,
+    chunk_size: int | None,
+    sampling: str = "pseudo",
+    progress: Callable[[StreamingSummary], None] | None = None,
+    bank_offset: int | None = None,
+) -> dict[str, np.ndarray] | StreamingSummary:
+    """Simulate `size` paths from one RNG stream: raw path arrays, or a StreamingSummary
+    when chunk_size is set (passed to progress after every chunk)."""
+    sampler = _Sampler(np.random.default_rng(seed), params["years"], sampling, bank_offset=bank_offset)
+    if chunk_size is None:
+        return _simulate_paths(sampler.draw(size), **params)
+    summary = StreamingSummary(params["years"])
+    for start in range(0, size, chunk_size):
+        summary.add(_simulate_paths(sampler.draw(min(chunk_size, size - start)), **params))
+        if progress is not None:
+            progress(summary)
+    return summary
+
+
+def _shard_seeds(seed: int | None, k: int) -> list:
+    """Shard 0 draws from default_rng(seed), the stream the unsharded consumers
+    (simulation_paths, run_batch_simulation, portfolios) use for the same seed; later
+    shards draw from SeedSequence(seed).spawn children, which are independent of it."""
+    return [seed, *np.random.SeedSequence(seed).spawn(k)[1:]]
+
+
+class _ShardProgress:
+    """Progress across shards run in sequence: each call reports the completed shards
+    together with the running shard's partial summary. done is the caller's running
+    accumulator, shared rather than copied."""
+
+    def __init__(self, progress: Callable[[StreamingSummary], None]):
+        self.progress = progress
+        self.done: StreamingSummary | None = None
+
+    def __call__(self, partial: StreamingSummary) -> None:
+        self.progress(partial if self.done is None else _CombinedSummary(self.done, partial))
+
+
+class _CombinedSummary:
+    """Read-only view of two StreamingSummary parts for progress callbacks. count is
+    free; to_dict merges into a fresh summary only when a caller publishes one."""
+
+    def __init__(self, first: StreamingSummary, second: StreamingSummary):
+        self.parts = (first, second)
+        self.years = first.years
+
+    @property
+    def count(self) -> int:
+        return sum(part.count for part in self.parts)
+
+    def to_dict(self) -> dict:
+        merged = StreamingSummary(self.years)
+        for part in self.parts:
+            merged.merge(part)
+        return merged.to_dict()
+
+
+def _run_sharded(
+    n: int,
+    seed: int | None,
+    params: dict,
+    chunk_size: int | None,
+    workers: int,
+    sampling: str = "pseudo",
+    progress: Callable[[StreamingSummary], None] | None = None,
+) -> dict[str, np.ndarray] | StreamingSummary:
+    """Run shards in-process or on a process pool and merge them in shard order.
+    Summaries are folded into one running accumulator as each shard arrives, so
+    streaming memory does not grow with the shard count. progress is only supported
+    in-process."""
+    sizes = _shard_sizes(n)
+    seeds = _shard_seeds(seed, len(sizes))
+    k = len(sizes)
+    offsets = [None] * k
+    if sampling == "bank":
+        # shards take consecutive, non-overlapping windows from shard 0's offset
+        dims = 3 + params["years"]
+        bank = _require_bank(n * dims)
+        start = int(np.random.default_rng(seed).integers(bank.size))
+        offsets = [start + int(before) * dims for before in np.cumsum([0, *sizes[:-1]])]
+
+    tracker = _ShardProgress(progress) if progress is not None else None
+    pooled = workers > 1 and k > 1
+    with ProcessPoolExecutor(max_workers=min(workers, k)) if pooled else contextlib.nullcontext() as pool:
+        if pooled:
+            args = (seeds, sizes, [params] * k, [chunk_size] * k, [sampling] * k, [None] * k, offsets)
+            shards = pool.map(_run_shard, *args)  # yields in shard order
+        else:
+            shards = (
+                _run_shard(shard_seed, size, params, chunk_size, sampling, tracker, offset)
+                for shard_seed, size, offset in zip(seeds, sizes, offsets)
+            )
+        parts = []
+        merged = None
+        for shard in shards:
+            if chunk_size is None:
+                parts.append(shard)
+            elif merged is None:
+                merged = shard
+            else:
+                merged.merge(shard)
+            if tracker is not None:
+                tracker.done = merged
+
+    return _concat_paths(parts) if chunk_size is None else merged
+
+
+def _concat_paths(parts: list[dict[str, np.ndarray]]) -> dict[str, np.ndarray]:
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def _median_ci(values: np.ndarray) -> tuple[float, float, float]:
+    """Median with a distribution-free 95% confidence interval from order statistics."""
+    ordered = np.sort(values)
+    n = ordered.size
+    half_width = 1.96 * math.sqrt(n) / 2
+    lo = max(math.floor(n / 2 - half_width), 0)
+    hi = min(math.ceil(n / 2 + half_width), n - 1)
+    return float(np.median(ordered)), float(ordered[lo]), float(ordered[hi])
+
+
+def _run_adaptive(
+    sampler: _Sampler,
+    params: dict,
+    budget: int,
+    target_ci_width: float,
+    batch_size: int,
+) -> tuple[dict[str, np.ndarray], dict]:
+    """Add batches until the median payback and 20-year savings confidence intervals are
+    both narrower than target_ci_width (relative to the median), or budget paths are used."""
+    batches = []
+    history = []
+    converged = False
+    drawn = 0
+    while drawn < budget and not converged:
+        size = min(batch_size, budget - drawn)
+        batches.append(_simulate_paths(sampler.draw(size), **params))
+        drawn += size
+        paths = _concat_paths(batches)
+
+        row = {"n": drawn}
+        widths = []
+        for key, values in (
+            ("payback_years", paths["payback_years"]),
+            ("total_savings_20yr", paths["cumulative_savings"][:, -1]),
+        ):
+            median, lo, hi = _median_ci(values)
+            width = (hi - lo) / max(abs(median), 1.0)
+            row[key] = {
+                "median": round(median, 2),
+                "ci": [round(lo, 2), round(hi, 2)],
+                "relative_width": round(width, 4),
+            }
+            widths.append(width)
+        history.append(row)
+        converged = max(widths) <= target_ci_width
+
+    diagnostics = {
+        "target_ci_width": target_ci_width,
+        "converged": converged,
+        "path_budget": budget,
+        "batch_size": batch_size,
+        "history": history,
     }
+    return paths, diagnostics
 
 
 def run_simulation(
@@ -46,69 +707,152 @@ def run_simulation(
     n: int = DEFAULT_N,
     seed: int | None = None,
     zip_code: str | None = None,
+    chunk_size: int | None = None,
+    workers: int | None = None,
+    sampling: str = "pseudo",
+    target_ci_width: float | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    discount_rate: float = DISCOUNT_RATE,
+    progress: Callable[[StreamingSummary], None] | None = None,
 ) -> dict:
-    rng = np.random.default_rng(seed)
-    production = solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
-    rate = price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE
+    """Monte Carlo over DISTRIBUTIONS. Besides net cost, payback (fractional, interpolated
+    within the crossing year), savings and carbon, every path reports NPV and LCOE at
+    discount_rate and its IRR. With chunk_size set, paths are generated and
+    folded into a StreamingSummary chunk by chunk; percentiles then come from quantile
+    sketches and carry a "percentile_error" bound. progress, if given, is called with
+    the running StreamingSummary after every chunk (e.g. to publish partial percentiles
+    or to abort by raising).
 
-    inflation_samples = _sample(rng, DISTRIBUTIONS["utility_inflation"], (n,))
-    degradation_samples = _sample(rng, DISTRIBUTIONS["panel_degradation"], (n,))
-    overrun_samples = _sample(rng, DISTRIBUTIONS["cost_overrun_pct"], (n,))
-    prod_mult_samples = _sample(rng, DISTRIBUTIONS["production_variability"], (n, years))
+    n is split into shards of at most SHARD_SIZE paths, each with its own RNG stream
+    (see _shard_seeds); with workers set, shards run on up to `workers` processes.
+    Results for a seed are identical whether workers is omitted or any count.
 
-    gross = calculate_gross_cost(system_size_kw)
+    sampling selects one of SAMPLING_METHODS. With target_ci_width set, n becomes a path
+    budget: batches of batch_size are added until the median payback and 20-year savings
+    confidence intervals converge, and the result includes "convergence" diagnostics."""
+    params = _simulation_params(
+        system_size_kw, solar_production_kwh, price_per_kwh, flat_rebates, state_itc_entries, years, zip_code,
+        discount_rate,
+    )
 
-    all_net_costs = np.empty(n)
-    all_payback = np.empty(n)
-    all_carbon = np.empty(n)
-    all_cumulative = np.empty((n, years))
+    if progress is not None and (chunk_size is None or workers is not None or target_ci_width is not None):
+        raise ValueError("progress needs streaming on one process; set chunk_size and drop workers")
 
-    for i in range(n):
-        gross_with_overrun = gross * (1 + float(overrun_samples[i]))
-        net = calculate_net_cost(gross_with_overrun, flat_rebates, state_itc_entries=state_itc_entries)
+    if target_ci_width is not None:
+        if chunk_size is not None or workers is not None:
+            raise ValueError("target_ci_width runs in-memory on one process; drop chunk_size and workers")
+        sampler = _Sampler(np.random.default_rng(seed), years, sampling)
+        paths, diagnostics = _run_adaptive(sampler, params, n, target_ci_width, batch_size)
+        result = _summarize_paths(paths, len(paths["net_cost"]), years)
+        result["convergence"] = diagnostics
+    else:
+        merged = _run_sharded(n, seed, params, chunk_size, workers or 1, sampling, progress)
 
-        prod_mults = prod_mult_samples[i].tolist()
+        if chunk_size is None:
+            result = _summarize_paths(merged, n, years)
+        else:
+            result = merged.to_dict()
+            result["streaming"] = {
+                "chunk_size": chunk_size,
+                "relative_accuracy": merged.sketches["net_cost"].relative_accuracy,
+            }
 
-        savings = calculate_savings_over_time(
-            net, production, rate, years,
-            panel_degradation=float(degradation_samples[i]),
-            utility_inflation=float(inflation_samples[i]),
-            production_multipliers=prod_mults,
-        )
+    if sampling != "pseudo":
+        result["sampling"] = sampling
+    return result
 
-        carbon = calculate_carbon_offset(
-            production, years,
-            panel_degradation=float(degradation_samples[i]),
-            production_multipliers=prod_mults,
-            zip_code=zip_code,
-        )
 
-        all_net_costs[i] = net
-        all_carbon[i] = carbon
+def _summarize_differences(paths: dict[str, np.ndarray], baseline: int) -> list[dict]:
+    """Paired (same-draw) differences of every configuration against the baseline."""
+    values = {
+        "net_cost": paths["net_cost"],
+        "payback_years": paths["payback_years"],
+        "total_savings_20yr": paths["cumulative_savings"][..., -1],
+        "carbon_offset_tons": paths["carbon_offset_tons"],
+    }
+    diffs = {key: arr - arr[baseline] for key, arr in values.items()}
+    summaries = {key: _summarize_many(diff) for key, diff in diffs.items()}
+    prob_higher = np.mean(diffs["total_savings_20yr"] > 0, axis=-1).round(4).tolist()
+    return [
+        {**{key: rows[i] for key, rows in summaries.items()}, "prob_higher_savings": prob_higher[i]}
+        for i in range(len(prob_higher))
+    ]
 
-        for j, s in enumerate(savings):
-            all_cumulative[i, j] = s['cumulative_savings']
 
-        payback = next(
-            (s['year'] for s in savings if s['cumulative_savings'] >= 0),
-            years + 1,
+def run_batch_simulation(
+    configs: list[dict],
+    years: int = 20,
+    n: int = DEFAULT_N,
+    seed: int | None = None,
+    zip_code: str | None = None,
+    sampling: str = "pseudo",
+    baseline: int = 0,
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict:
+    """Evaluate many configurations against one shared set of draws (common random numbers).
+
+    Each config takes the run_simulation inputs: system_size_kw, solar_production_kwh,
+    price_per_kwh, flat_rebates and state_itc_entries. Draws and compounding factors are
+    computed once, and the yearly flows, carbon and discounted production and savings
+    once per distinct (production, rate); configurations are then priced as one
+    broadcast array pass. Paired differences against configs[baseline] cancel the shared
+    sampling noise.
+
+    What depends on net cost stays per configuration: the running balance, payback, the
+    IRR solve (about half the time) and the summaries. 50 configurations at one site
+    cost about 20x a single run_simulation, or 25-30x when each has its own production."""
+    if not configs:
+        raise ValueError("At least one configuration is required")
+    if not 0 <= baseline < len(configs):
+        raise ValueError(f"baseline index {baseline} out of range for {len(configs)} configurations")
+
+    samples = _Sampler(np.random.default_rng(seed), years, sampling).draw(n)
+    factors = _path_factors(samples, years)
+    overrun = 1 + samples["cost_overrun_pct"]
+
+    net = np.stack([
+        calculate_net_cost_array(
+            calculate_gross_cost(cfg["system_size_kw"]) * overrun,
+            cfg.get("flat_rebates") or 0,
+            state_itc_entries=cfg.get("state_itc_entries"),
+        )
+        for cfg in configs
+    ])
+    # the yearly flows and the terms built from them depend only on the draws, production
+    # and rate: evaluate them once per distinct (production, rate) and share them
+    flow_index: dict[tuple[float, float], int] = {}
+    group = []
+    for cfg in configs:
+        production = cfg.get("solar_production_kwh")
+        rate = cfg.get("price_per_kwh")
+        key = (
+            production if production is not None else DEFAULT_SOLAR_PRODUCTION_KWH,
+            rate if rate is not None else DEFAULT_UTILITY_RATE,
         )
-        all_payback[i] = payback
+        group.append(flow_index.setdefault(key, len(flow_index)))
+    production, rate = np.array(list(flow_index), dtype=np.float64).T[:, :, None, None]
 
-    pcts = [5, 25, 50, 75, 95]
+    yearly_production, annual_savings = _annual_paths(samples["production_variability"], factors, production, rate)
+    terms = _flow_terms(yearly_production, annual_savings, years, emission_trajectory(zip_code, years), discount_rate)
+    del yearly_production
+    if len(flow_index) < len(configs):
+        annual_savings = annual_savings[group]
+        terms = {key: value[group] for key, value in terms.items()}
+    paths = _net_metrics(net, annual_savings, terms, years)
+
+    summaries = _summarize_paths_many(paths, n, years)
+    differences = _summarize_differences(paths, baseline)
+    results = []
+    for i, cfg in enumerate(configs):
+        entry = {"config": cfg, "simulation": summaries[i]}
+        if i != baseline:
+            entry["paired_difference"] = differences[i]
+        results.append(entry)
 
     return {
         "n_simulations": n,
         "years": years,
-        "net_cost": _summarize(all_net_costs),
-        "payback_years": _summarize(all_payback),
-        "total_savings_20yr": _summarize(all_cumulative[:, -1]),
-        "carbon_offset_tons": _summarize(all_carbon),
-        "savings_by_year": {
-            "percentiles": {
-                str(p): [round(float(v), 2) for v in np.percentile(all_cumulative, p, axis=0)]
-                for p in pcts
-            },
-            "mean": [round(float(v), 2) for v in np.mean(all_cumulative, axis=0)],
-        },
+        "baseline": baseline,
+        "sampling": sampling,
+        "configurations": results,
     }
@@ -0,0 +1,105 @@
+"""Score every Google solarPanelConfigs entry at once and pick the best ones.
+
+Each config is a panel count plus its modelled yearly DC energy. All configs are
+evaluated as arrays with the closed-form calculations, then reduced to the Pareto
+frontier over (net cost, savings, carbon) and the NPV-optimal panel count.
+"""
+import numpy as np
+
+from utils.calculations import (
+    _round_cents,
+    calculate_carbon_offset_closed_form,
+    calculate_cumulative_savings_closed_form,
+    calculate_exact_payback,
+    calculate_gross_cost_array,
+    calculate_net_cost_array,
+    calculate_npv_closed_form,
+)
+from utils.constants import DEFAULT_PANEL_CAPACITY_WATTS, DISCOUNT_RATE
+
+
+def _config_arrays(configs: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    """Panel counts and yearly kWh, accepting Google's camelCase or snake_case keys."""
+    panels = np.array([c.get("panelsCount", c.get("panels_count")) or 0 for c in configs], dtype=np.float64)
+    energy = np.array(
+        [c.get("yearlyEnergyDcKwh", c.get("yearly_energy_dc_kwh")) or 0 for c in configs], dtype=np.float64,
+    )
+    return panels, energy
+
+
+def pareto_frontier(net_cost: np.ndarray, savings: np.ndarray, carbon: np.ndarray) -> np.ndarray:
+    """Mask of configs no other config beats on every objective (lower net cost, higher
+    savings, higher carbon offset) while strictly beating on one. Row i, column j of each
+    (k, k) matrix compares config i against config j."""
+    objectives = [(-net_cost)[:, None], savings[:, None], carbon[:, None]]
+    at_least = np.ones((len(net_cost), len(net_cost)), dtype=bool)
+    better = np.zeros_like(at_least)
+    for column in objectives:
+        at_least &= column >= column.T
+        better |= column > column.T
+    return ~(at_least & better).any(axis=0)
+
+
+def score_panel_configs(
+    configs: list[dict],
+    panel_capacity_watts: float | None = None,
+    price_per_kwh: float | None = None,
+    flat_rebates: float = 0,
+    state_itc_entries: list[dict] | None = None,
+    years: int = 20,
+    zip_code: str | None = None,
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict:
+    """Net cost, savings over `years`, carbon, exact payback and NPV for every config,
+    plus the Pareto frontier and the NPV-optimal config."""
+    if not configs:
+        raise ValueError("At least one panel configuration is required")
+
+    panels, energy = _config_arrays(configs)
+    capacity = panel_capacity_watts or DEFAULT_PANEL_CAPACITY_WATTS
+    size_kw = panels * capacity / 1000
+
+    gross = calculate_gross_cost_array(size_kw)
+    net = calculate_net_cost_array(gross, flat_rebates, state_itc_entries=state_itc_entries)
+    savings = calculate_cumulative_savings_closed_form(net, energy, price_per_kwh, years)
+    carbon = calculate_carbon_offset_closed_form(energy, years, zip_code=zip_code)
+    payback = calculate_exact_payback(net, energy, price_per_kwh)
+    npv = calculate_npv_closed_form(net, energy, price_per_kwh, years, discount_rate=discount_rate)
+    frontier = pareto_frontier(net, savings, carbon)
+
+    payback_out = np.where(np.isfinite(payback), np.round(payback, 1), np.nan)
+    rows = [
+        {
+            "panel_count": int(count),
+            "system_size_kw": size,
+            "yearly_energy_kwh": kwh,
+            "gross_cost": g,
+            "net_cost": n,
+            "total_savings": s,
+            "carbon_offset_tons": c,
+            "payback_years": p if p == p else None,
+            "npv": v,
+            "pareto": bool(on_frontier),
+        }
+        for count, size, kwh, g, n, s, c, p, v, on_frontier in zip(
+            panels.tolist(),
+            np.round(size_kw, 2).tolist(),
+            np.round(energy, 1).tolist(),
+            _round_cents(gross).tolist(),
+            _round_cents(net).tolist(),
+            _round_cents(savings).tolist(),
+            carbon.tolist(),
+            payback_out.tolist(),
+            _round_cents(npv).tolist(),
+            frontier.tolist(),
+        )
+    ]
+    best = int(np.argmax(npv))
+    return {
+        "panel_capacity_watts": capacity,
+        "years": years,
+        "discount_rate": discount_rate,
+        "configs": rows,
+        "pareto_frontier": [rows[i]["panel_count"] for i in np.flatnonzero(frontier)],
+        "npv_optimal": rows[best],
+    }
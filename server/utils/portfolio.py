@@ -0,0 +1,193 @@
+"""Joint Monte Carlo over solar, a small wind turbine and a ground-source heat pump.
+
+The solar draws are exactly run_simulation's, so for a given seed and sampling the
+solar-only portfolio reproduces run_simulation. The wind and GSHP uncertainties in
+TECHNOLOGY_DISTRIBUTIONS are drawn from the same stream right after them, and utility
+inflation is shared by every technology. Each technology is reduced to per-path net
+cost and yearly generation and savings flows. Portfolios are 0/1 rows over
+TECHNOLOGIES, so one matrix product combines every portfolio and the whole set goes
+through the solar metric pipeline in a single pass.
+"""
+import numpy as np
+
+from utils.calculations import _power_table, calculate_net_cost_array
+from utils.constants import DISCOUNT_RATE, FEDERAL_ITC
+from utils.monte_carlo import (
+    DEFAULT_N,
+    _Sampler,
+    _annual_paths,
+    _apply_distribution,
+    _flow_metrics,
+    _path_factors,
+    _simulation_params,
+    _summarize_differences,
+    _summarize_paths_many,
+)
+
+TECHNOLOGIES = ("solar", "wind", "gshp")
+DEFAULT_PORTFOLIOS = ["solar", "solar+wind", "solar+gshp", "solar+wind+gshp"]
+
+WIND_TURBINE_KW = 10.0
+WIND_COST_PER_KW = 7000
+WIND_DEGRADATION = 0.01
+WIND_CUT_IN_MS = 3.0
+WIND_RATED_MS = 11.0
+WIND_CUT_OUT_MS = 25.0
+
+GSHP_INSTALLED_COST = 25000
+DEFAULT_HVAC_ANNUAL_COST = 1800
+DEFAULT_GSHP_SAVINGS_PCT = (30, 50)
+
+TECHNOLOGY_DISTRIBUTIONS = {
+    "wind_resource":         {"mean": 1.0, "std": 0.15, "clip_min": 0.3},  # error of the avg-speed estimate
+    "wind_cost_overrun_pct": {"mean": 0.0, "std": 0.10},
+    "gshp_cost_overrun_pct": {"mean": 0.0, "std": 0.15},
+    "wind_variability":      {"mean": 1.0, "std": 0.10, "clip_min": 0.5},  # per path-year
+}
+
+
+def wind_capacity_factor(avg_wind_speed_ms: float) -> float:
+    """Expected capacity factor of a generic small turbine (cubic between cut-in and
+    rated speed, flat to cut-out) under a Rayleigh speed distribution with this mean."""
+    if avg_wind_speed_ms <= 0:
+        return 0.0
+    v = np.linspace(0, 30, 3001)
+    density = np.pi * v / (2 * avg_wind_speed_ms ** 2) * np.exp(-np.pi * v ** 2 / (4 * avg_wind_speed_ms ** 2))
+    power = np.clip((v ** 3 - WIND_CUT_IN_MS ** 3) / (WIND_RATED_MS ** 3 - WIND_CUT_IN_MS ** 3), 0, 1)
+    power[v > WIND_CUT_OUT_MS] = 0
+    return float(np.trapezoid(power * density, v))
+
+
+def _portfolio_mask(portfolios: list[str]) -> np.ndarray:
+    """(portfolios, TECHNOLOGIES) 0/1 matrix from labels like "solar+gshp"."""
+    mask = np.zeros((len(portfolios), len(TECHNOLOGIES)))
+    for i, label in enumerate(portfolios):
+        for tech in label.split("+"):
+            if tech not in TECHNOLOGIES:
+                raise ValueError(f"Unknown technology {tech!r} in portfolio {label!r}, expected {TECHNOLOGIES}")
+            mask[i, TECHNOLOGIES.index(tech)] = 1.0
+    return mask
+
+
+def run_portfolio_simulation(
+    system_size_kw: float,
+    solar_production_kwh: float | None = None,
+    price_per_kwh: float | None = None,
+    flat_rebates: float = 0,
+    state_itc_entries: list[dict] | None = None,
+    years: int = 20,
+    n: int = DEFAULT_N,
+    seed: int | None = None,
+    zip_code: str | None = None,
+    sampling: str = "pseudo",
+    avg_wind_speed_ms: float | None = None,
+    turbine_kw: float = WIND_TURBINE_KW,
+    hvac_savings_pct_low: float | None = None,
+    hvac_savings_pct_high: float | None = None,
+    hvac_annual_cost: float | None = None,
+    gshp_cost: float = GSHP_INSTALLED_COST,
+    portfolios: list[str] | None = None,
+    discount_rate: float = DISCOUNT_RATE,
+) -> dict:
+    """Summaries for every portfolio plus paired differences against solar alone.
+
+    Wind needs avg_wind_speed_ms (e.g. /wind's avg_wind_speed_ms); without it the
+    default portfolios leave wind out. GSHP savings are a share of hvac_annual_cost
+    drawn around the /geothermal hvac_savings_pct range. Wind and GSHP take the
+    federal ITC but not the solar-specific rebates and state credits."""
+    if portfolios is None:
+        portfolios = [p for p in DEFAULT_PORTFOLIOS if avg_wind_speed_ms is not None or "wind" not in p]
+    if not portfolios:
+        raise ValueError("At least one portfolio is required")
+    mask = _portfolio_mask(portfolios)
+    if avg_wind_speed_ms is None and mask[:, TECHNOLOGIES.index("wind")].any():
+        raise ValueError("Portfolios with wind need avg_wind_speed_ms")
+
+    params = _simulation_params(
+        system_size_kw, solar_production_kwh, price_per_kwh, flat_rebates, state_itc_entries, years, zip_code,
+        discount_rate,
+    )
+    rng = np.random.default_rng(seed)
+    samples = _Sampler(rng, years, sampling).draw(n)
+    z = rng.standard_normal((n, 4 + years))
+    extra = {
+        name: _apply_distribution(TECHNOLOGY_DISTRIBUTIONS[name], z[:, i])
+        for i, name in enumerate(["wind_resource", "wind_cost_overrun_pct", "gshp_cost_overrun_pct"])
+    }
+    wind_variability = _apply_distribution(TECHNOLOGY_DISTRIBUTIONS["wind_variability"], z[:, 4:])
+
+    low, high = (
+        hvac_savings_pct_low if hvac_savings_pct_low is not None else DEFAULT_GSHP_SAVINGS_PCT[0],
+        hvac_savings_pct_high if hvac_savings_pct_high is not None else DEFAULT_GSHP_SAVINGS_PCT[1],
+    )
+    # the low-high range is treated as roughly +/- two standard deviations
+    gshp_savings = _apply_distribution({"mean": (low + high) / 200, "std": (high - low) / 400, "clip_min": 0.0}, z[:, 3])
+    gshp_savings = np.minimum(gshp_savings, 1.0)
+
+    factors = _path_factors(samples, years)
+    inflation = factors["inflation"]
+    rate = params["rate"]
+    capacity_factor = wind_capacity_factor(avg_wind_speed_ms) if avg_wind_speed_ms is not None else 0.0
+    hvac = hvac_annual_cost if hvac_annual_cost is not None else DEFAULT_HVAC_ANNUAL_COST
+
+    solar_kwh, solar_savings = _annual_paths(
+        samples["production_variability"], factors, params["production"], rate,
+    )
+    wind_kwh = (
+        turbine_kw * 8760 * capacity_factor * _power_table(np.float64(1 - WIND_DEGRADATION), years)
+        * extra["wind_resource"][:, None] * wind_variability
+    )
+    net = np.stack([
+        calculate_net_cost_array(
+            params["gross_cost"] * (1 + samples["cost_overrun_pct"]), flat_rebates, state_itc_entries=state_itc_entries,
+        ),
+        turbine_kw * WIND_COST_PER_KW * (1 + extra["wind_cost_overrun_pct"]) * (1 - FEDERAL_ITC),
+        gshp_cost * (1 + extra["gshp_cost_overrun_pct"]) * (1 - FEDERAL_ITC),
+    ])
+    generation = np.stack([solar_kwh, wind_kwh, np.zeros_like(solar_kwh)])
+    savings = np.stack([solar_savings, wind_kwh * (rate * inflation), hvac * gshp_savings[:, None] * inflation])
+
+    generates = mask[:, :2].any(axis=1)
+    paths = _flow_metrics(
+        mask @ net,
+        np.tensordot(mask, generation, axes=1),
+        np.tensordot(mask, savings, axes=1),
+        years, params["co2_by_year"], discount_rate,
+    )
+    # LCOE has no meaning for a portfolio that generates nothing (GSHP alone)
+    paths["lcoe_cents_per_kwh"] = np.where(generates[:, None], paths["lcoe_cents_per_kwh"], 0.0)
+
+    summaries = _summarize_paths_many(paths, n, years)
+    baseline = portfolios.index("solar") if "solar" in portfolios else 0
+    differences = _summarize_differences(paths, baseline)
+    results = []
+    for i, label in enumerate(portfolios):
+        summary = summaries[i]
+        if not generates[i]:
+            summary["lcoe_cents_per_kwh"] = None
+        entry = {"portfolio": label, "technologies": label.split("+"), "simulation": summary}
+        if i != baseline:
+            entry["paired_difference"] = differences[i]
+        results.append(entry)
+
+    return {
+        "n_simulations": n,
+        "years": years,
+        "baseline": portfolios[baseline],
+        "sampling": sampling,
+        "technologies": {
+            "wind": {
+                "avg_wind_speed_ms": avg_wind_speed_ms,
+                "turbine_kw": turbine_kw,
+                "capacity_factor": round(capacity_factor, 4),
+                "gross_cost": turbine_kw * WIND_COST_PER_KW,
+            },
+            "gshp": {
+                "hvac_savings_pct_low": low,
+                "hvac_savings_pct_high": high,
+                "hvac_annual_cost": hvac,
+                "gross_cost": gshp_cost,
+            },
+        },
+        "portfolios": results,
+    }
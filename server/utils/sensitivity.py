@@ -0,0 +1,162 @@
+"""Global sensitivity of simulation outputs to each DISTRIBUTIONS entry.
+
+Both analyses evaluate their input rows as batched array passes rather than one
+simulation per factor, and compute only the outputs they report (no IRR, NPV or LCOE).
+The Sobol design is drawn and evaluated SOBOL_CHUNK base rows at a time with its
+estimator sums carried across chunks, so memory stays flat in n_base.
+"""
+import numpy as np
+
+from utils.calculations import _cumulative_savings, calculate_net_cost_array
+from utils.monte_carlo import (
+    DISTRIBUTIONS,
+    _Sampler,
+    _annual_paths,
+    _path_factors,
+    _payback,
+    _samples_from_normals,
+    _simulation_params,
+)
+from utils.sketches import RunningMoments
+
+DEFAULT_N_BASE = 1024
+SOBOL_CHUNK = 8192  # base rows per pass; each pass evaluates (factors + 2) times as many
+
+FACTOR_NAMES = list(DISTRIBUTIONS)
+
+
+def _factor_columns(years: int) -> dict[str, slice]:
+    """Columns of the (n, 3 + years) standard-normal block that drive each factor;
+    production variability is treated as one grouped factor over all years."""
+    return {
+        "utility_inflation": slice(0, 1),
+        "panel_degradation": slice(1, 2),
+        "cost_overrun_pct": slice(2, 3),
+        "production_variability": slice(3, 3 + years),
+    }
+
+
+def _outputs(z: np.ndarray, params: dict) -> dict[str, np.ndarray]:
+    """The reported outputs for an (n, 3 + years) block of standard normals."""
+    years = params["years"]
+    samples = _samples_from_normals(z, years)
+    net = calculate_net_cost_array(
+        params["gross_cost"] * (1 + samples["cost_overrun_pct"]), params["flat_rebates"],
+        state_itc_entries=params["state_itc_entries"],
+    )
+    _, annual_savings = _annual_paths(
+        samples["production_variability"], _path_factors(samples, years), params["production"], params["rate"],
+    )
+    cumulative = _cumulative_savings(net, annual_savings)
+    return {
+        "payback_years": _payback(net, annual_savings, cumulative, years),
+        "total_savings_20yr": cumulative[:, -1],
+        "net_cost": net,
+    }
+
+
+def sobol_indices(
+    system_size_kw: float,
+    solar_production_kwh: float | None = None,
+    price_per_kwh: float | None = None,
+    flat_rebates: float = 0,
+    state_itc_entries: list[dict] | None = None,
+    years: int = 20,
+    n_base: int = DEFAULT_N_BASE,
+    seed: int | None = None,
+    zip_code: str | None = None,
+) -> dict:
+    """First-order and total Sobol indices per factor (Saltelli design; Saltelli 2010
+    first-order and Jansen total-order estimators).
+
+    A and B are n_base rows of a scrambled Sobol sequence in 2 * (3 + years) dimensions.
+    AB_i is A with factor i's columns taken from B. The sequence is continued chunk by
+    chunk, and each chunk's A, B and AB_i rows are evaluated in one pass.
+    """
+    params = _simulation_params(
+        system_size_kw, solar_production_kwh, price_per_kwh, flat_rebates, state_itc_entries, years, zip_code,
+    )
+    dims = 3 + years
+    sampler = _Sampler(np.random.default_rng(seed), years, "sobol", dims=2 * dims)
+    columns = _factor_columns(years)
+    n_blocks = len(FACTOR_NAMES) + 2
+
+    # per output: moments of f over A and B, and sums of f_B (f_ABi - f_A) and (f_A - f_ABi)^2
+    moments = {}
+    first_sums = {}
+    total_sums = {}
+    for start in range(0, n_base, SOBOL_CHUNK):
+        size = min(SOBOL_CHUNK, n_base - start)
+        z = sampler.normals(size)
+        a, b = z[:, :dims], z[:, dims:]
+        blocks = [a, b]
+        for name in FACTOR_NAMES:
+            ab = a.copy()
+            ab[:, columns[name]] = b[:, columns[name]]
+            blocks.append(ab)
+        for output, values in _outputs(np.concatenate(blocks), params).items():
+            f = values.reshape(n_blocks, size)
+            f_a, f_b = f[0], f[1]
+            moments.setdefault(output, RunningMoments()).add(f[:2].ravel())
+            first_sums[output] = first_sums.get(output, 0.0) + (f_b * (f[2:] - f_a)).sum(axis=1)
+            total_sums[output] = total_sums.get(output, 0.0) + ((f_a - f[2:]) ** 2).sum(axis=1)
+
+    results = {}
+    for output, running in moments.items():
+        variance = float(running.m2[0] / running.count)
+        factors = {}
+        for i, name in enumerate(FACTOR_NAMES):
+            if variance == 0:
+                first, total = 0.0, 0.0
+            else:
+                first = float(first_sums[output][i] / n_base / variance)
+                total = float(0.5 * total_sums[output][i] / n_base / variance)
+            factors[name] = {"first_order": round(first, 4), "total": round(total, 4)}
+        results[output] = {"variance": round(variance, 4), "factors": factors}
+
+    return {
+        "method": "sobol",
+        "n_base": n_base,
+        "n_evaluations": n_base * n_blocks,
+        "years": years,
+        "outputs": results,
+    }
+
+
+def tornado(
+    system_size_kw: float,
+    solar_production_kwh: float | None = None,
+    price_per_kwh: float | None = None,
+    flat_rebates: float = 0,
+    state_itc_entries: list[dict] | None = None,
+    years: int = 20,
+    zip_code: str | None = None,
+    z: float = 1.0,
+) -> dict:
+    """One-at-a-time swings: each factor moved to mean -/+ z std with the others held at
+    their means. Factors are listed by descending swing."""
+    params = _simulation_params(
+        system_size_kw, solar_production_kwh, price_per_kwh, flat_rebates, state_itc_entries, years, zip_code,
+    )
+    columns = _factor_columns(years)
+    rows = np.zeros((1 + 2 * len(FACTOR_NAMES), 3 + years))
+    for i, name in enumerate(FACTOR_NAMES):
+        rows[1 + 2 * i, columns[name]] = -z
+        rows[2 + 2 * i, columns[name]] = z
+    outputs = _outputs(rows, params)
+
+    results = {}
+    for output, values in outputs.items():
+        bars = []
+        for i, name in enumerate(FACTOR_NAMES):
+            low, high = float(values[1 + 2 * i]), float(values[2 + 2 * i])
+            bars.append({
+                "factor": name,
+                "low": round(low, 2),
+                "high": round(high, 2),
+                "swing": round(abs(high - low), 2),
+            })
+        bars.sort(key=lambda bar: bar["swing"], reverse=True)
+        results[output] = {"base": round(float(values[0]), 2), "factors": bars}
+
+    return {"method": "tornado", "z": z, "years": years, "outputs": results}
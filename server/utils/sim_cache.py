@@ -0,0 +1,155 @@
+"""Content-keyed LRU cache for run_simulation results."""
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from utils.columnar import dumps
+from utils.constants import DEFAULT_SOLAR_PRODUCTION_KWH, DEFAULT_UTILITY_RATE, DISCOUNT_RATE
+from utils.draw_bank import bank_fingerprint
+from utils.grid_carbon import carbon_region
+from utils.monte_carlo import DEFAULT_N, DISTRIBUTIONS, run_simulation
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Bumps automatically whenever DISTRIBUTIONS changes, so stale results are never served
+DISTRIBUTIONS_VERSION = hashlib.sha256(
+    json.dumps(DISTRIBUTIONS, sort_keys=True).encode()
+).hexdigest()[:12]
+
+
+class SimulationCache:
+    """LRU cache bounded by the JSON size of the stored results. Entries keep the
+    results' numpy columns as they are; only their encoded size is measured."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[dict, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[0])
+
+    def put(self, key: str, value: dict) -> None:
+        size = len(dumps(value))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (copy.deepcopy(value), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+simulation_cache = SimulationCache(int(os.getenv("SIMULATION_CACHE_BYTES", DEFAULT_CACHE_BYTES)))
+
+
+def _normalize_itc_entries(state_itc_entries: list[dict] | None) -> list[list]:
+    entries = [
+        [float(entry["pct"]), float(entry["cap"]) if entry.get("cap") is not None else None]
+        for entry in state_itc_entries or []
+    ]
+    return sorted(entries, key=lambda e: (e[0], e[1] is None, e[1] or 0.0))
+
+
+def simulation_cache_key(
+    system_size_kw: float,
+    solar_production_kwh: float | None = None,
+    price_per_kwh: float | None = None,
+    flat_rebates: float = 0,
+    state_itc_entries: list[dict] | None = None,
+    years: int = 20,
+    n: int = DEFAULT_N,
+    seed: int | None = None,
+    zip_code: str | None = None,
+    **options,
+) -> str:
+    """Canonical hash of everything that determines a simulation result. Defaults are
+    resolved and the zip is reduced to its emissions factor, so equivalent requests share
+    a key. Bank-sampled keys include the bank's fingerprint, so a rebuilt bank misses."""
+    # sharded results depend on the seed only, not on how many processes ran them
+    options.pop("workers", None)
+    if options.get("sampling") == "bank":
+        options["draw_bank"] = bank_fingerprint()
+    discount_rate = options.pop("discount_rate", None)
+    canonical = {
+        "system_size_kw": float(system_size_kw),
+        "solar_production_kwh": float(
+            solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH
+        ),
+        "price_per_kwh": float(price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE),
+        "flat_rebates": float(flat_rebates or 0),
+        "state_itc_entries": _normalize_itc_entries(state_itc_entries),
+        "years": int(years),
+        "n": int(n),
+        "seed": seed,
+        "carbon_region": carbon_region(zip_code),
+        "discount_rate": float(discount_rate if discount_rate is not None else DISCOUNT_RATE),
+        "distributions_version": DISTRIBUTIONS_VERSION,
+        "options": {key: value for key, value in sorted(options.items()) if value is not None},
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+def stable_simulation_seed(**kwargs) -> int:
+    """The seed cached_run_simulation derives for an unseeded stable_seed run of these
+    inputs, for callers that need it before the simulation runs."""
+    return int(simulation_cache_key(**kwargs)[:16], 16)
+
+
+def cached_run_simulation(stable_seed: bool = False, cache: SimulationCache | None = None, **kwargs) -> dict:
+    """run_simulation through the content-keyed cache.
+
+    Unseeded calls are not cacheable unless stable_seed is set, in which case the seed
+    is derived from the input hash and echoed back as "seed" so the run is reproducible.
+    """
+    cache = cache if cache is not None else simulation_cache
+    derived_seed = kwargs.get("seed") is None
+    if derived_seed:
+        if not stable_seed:
+            return run_simulation(**kwargs)
+        kwargs["seed"] = stable_simulation_seed(**kwargs)
+
+    key = simulation_cache_key(**kwargs)
+    result = cache.get(key)
+    if result is None:
+        result = run_simulation(**kwargs)
+        if derived_seed:
+            result["seed"] = kwargs["seed"]
+        cache.put(key, result)
+    return result
@@ -0,0 +1,132 @@
+"""Mergeable running statistics for streaming Monte Carlo.
+
+Both classes track one or more columns at once (e.g. one per simulation year), so a
+chunk of paths is folded in with a handful of array operations. Two instances with
+the same parameters merge exactly, which lets chunks and shards be combined in any
+grouping.
+"""
+import math
+
+import numpy as np
+
+DEFAULT_RELATIVE_ACCURACY = 0.001
+
+
+class RunningMoments:
+    """Count, mean and variance per column (Welford / Chan parallel update)."""
+
+    def __init__(self, width: int = 1):
+        self.width = width
+        self.count = 0
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).reshape(-1, self.width)
+        if values.shape[0] == 0:
+            return
+        batch = RunningMoments(self.width)
+        batch.count = values.shape[0]
+        batch.mean = values.mean(axis=0)
+        batch.m2 = ((values - batch.mean) ** 2).sum(axis=0)
+        self.merge(batch)
+
+    def merge(self, other: "RunningMoments") -> None:
+        if other.width != self.width:
+            raise ValueError("Cannot merge moments of different widths")
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean.copy(), other.m2.copy()
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / total)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.count * other.count / total)
+        self.count = total
+
+    @property
+    def std(self) -> np.ndarray:
+        """Population standard deviation, matching np.std."""
+        if self.count == 0:
+            return np.full(self.width, np.nan)
+        return np.sqrt(self.m2 / self.count)
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch (DDSketch) per column.
+
+    Values are counted in buckets whose bounds grow geometrically by
+    gamma = (1 + alpha) / (1 - alpha), so any quantile is returned within a relative
+    error of alpha. Magnitudes below min_value share a zero bucket; magnitudes
+    above max_value are clamped into the last bucket. Bucket layout depends only on
+    the parameters, so merging is an element-wise sum of counts.
+    """
+
+    def __init__(
+        self,
+        width: int = 1,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        min_value: float = 1e-2,
+        max_value: float = 1e9,
+    ):
+        self.width = width
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._key_offset = math.ceil(math.log(min_value) / self._log_gamma)
+        self.n_keys = math.ceil(math.log(max_value) / self._log_gamma) - self._key_offset + 1
+        self.count = 0
+        self.negative = np.zeros((width, self.n_keys), dtype=np.int64)
+        self.zero = np.zeros(width, dtype=np.int64)
+        self.positive = np.zeros((width, self.n_keys), dtype=np.int64)
+
+    def _params(self) -> tuple:
+        return (self.width, self.relative_accuracy, self.min_value, self.max_value)
+
+    def _bucket_counts(self, magnitudes: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        keys = np.ceil(np.log(magnitudes, where=mask, out=np.ones_like(magnitudes)) / self._log_gamma)
+        keys = np.clip(keys.astype(np.int64) - self._key_offset, 0, self.n_keys - 1)
+        flat = (keys + np.arange(self.width) * self.n_keys)[mask]
+        return np.bincount(flat, minlength=self.width * self.n_keys).reshape(self.width, self.n_keys)
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).reshape(-1, self.width)
+        magnitudes = np.abs(values)
+        large = magnitudes >= self.min_value
+        positive = large & (values > 0)
+        negative = large & (values < 0)
+        self.positive += self._bucket_counts(magnitudes, positive)
+        self.negative += self._bucket_counts(magnitudes, negative)
+        self.zero += (~large).sum(axis=0)
+        self.count += values.shape[0]
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other._params() != self._params():
+            raise ValueError("Cannot merge sketches with different parameters")
+        self.positive += other.positive
+        self.negative += other.negative
+        self.zero += other.zero
+        self.count += other.count
+
+    def quantiles(self, qs: list[float]) -> np.ndarray:
+        """Estimated quantiles (0-100 scale, like np.percentile), shape (len(qs), width)."""
+        if self.count == 0:
+            return np.full((len(qs), self.width), np.nan)
+        keys = np.arange(self.n_keys) + self._key_offset
+        bucket_values = 2 * self.gamma ** keys / (1 + self.gamma)
+        ordered_values = np.concatenate([-bucket_values[::-1], [0.0], bucket_values])
+        ordered_counts = np.concatenate(
+            [self.negative[:, ::-1], self.zero[:, None], self.positive], axis=1,
+        )
+        cumulative = np.cumsum(ordered_counts, axis=1)
+        ranks = np.asarray(qs, dtype=np.float64)[:, None, None] / 100 * (self.count - 1)
+        idx = (cumulative[None, :, :] > ranks).argmax(axis=2)
+        return ordered_values[idx]
+
+    def error_bounds(self, estimates: np.ndarray) -> np.ndarray:
+        """Absolute error bound for each estimate returned by quantiles()."""
+        alpha = self.relative_accuracy
+        return np.where(estimates == 0, self.min_value, np.abs(estimates) * alpha / (1 - alpha))
@@ -0,0 +1,320 @@
+"""Offline-fitted surrogate for run_simulation summaries.
+
+The Monte Carlo summary is a smooth function of five inputs: system size, production,
+utility rate, flat rebates and effective ITC (federal plus uncapped state credits).
+build_surrogate sweeps run_simulation over a grid of those inputs with one fixed seed
+(as a run_batch_simulation pass per chunk, so every grid point shares draws and the
+table is free of sampling jitter between neighbours), then measures the interpolation
+error at random held-out points. At request time, predict() answers with multilinear
+interpolation in microseconds, or returns None outside the fitted domain so the caller
+falls back to the real engine.
+
+Build once with `python -m utils.surrogate build`; the table is written next to this
+module (or to SIMULATION_SURROGATE) and loaded lazily.
+"""
+import itertools
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from utils.constants import DEFAULT_SOLAR_PRODUCTION_KWH, DEFAULT_UTILITY_RATE, FEDERAL_ITC, PANEL_DEGRADATION
+from utils.grid_carbon import cumulative_carbon_weight
+from utils.monte_carlo import DEFAULT_N, run_batch_simulation
+from utils.sim_cache import DISTRIBUTIONS_VERSION
+
+DEFAULT_SURROGATE_PATH = Path(__file__).resolve().parent / "surrogate.npz"
+
+AXES = ["system_size_kw", "solar_production_kwh", "price_per_kwh", "flat_rebates", "itc_pct"]
+
+DEFAULT_GRID = {
+    "system_size_kw": [2, 4, 6, 8, 10, 12, 15, 20],
+    "solar_production_kwh": [2_000, 5_000, 8_000, 11_000, 14_000, 18_000, 24_000, 30_000],
+    "price_per_kwh": [0.08, 0.12, 0.16, 0.20, 0.25, 0.32, 0.40],
+    "flat_rebates": [0, 1_000, 2_500, 5_000, 10_000],
+    "itc_pct": [FEDERAL_ITC, FEDERAL_ITC + 0.1, FEDERAL_ITC + 0.25],
+}
+
+SWEEP_CHUNK = 128
+SKIPPED_KEYS = {"n_simulations", "years"}
+
+_surrogate: "Surrogate | None" = None
+_surrogate_path: Path | None = None
+
+
+def surrogate_path() -> Path:
+    return Path(os.getenv("SIMULATION_SURROGATE", DEFAULT_SURROGATE_PATH))
+
+
+def _layout(result: dict, prefix: tuple = ()) -> list[tuple[tuple, int | None]]:
+    """Numeric leaves of a simulation summary as (key path, list length or None)."""
+    leaves = []
+    for key, value in result.items():
+        if not prefix and key in SKIPPED_KEYS:
+            continue
+        if isinstance(value, dict):
+            leaves.extend(_layout(value, prefix + (key,)))
+        else:
+            leaves.append((prefix + (key,), len(value) if isinstance(value, (list, np.ndarray)) else None))
+    return leaves
+
+
+def _flatten(result: dict, layout: list[tuple[tuple, int | None]]) -> list[float]:
+    values = []
+    for path, size in layout:
+        leaf = result
+        for key in path:
+            leaf = leaf[key]
+        values.extend(leaf if size is not None else [leaf])
+    return values
+
+
+def _unflatten(values: np.ndarray, layout: list[tuple[tuple, int | None]]) -> dict:
+    """Inverse of _flatten; list leaves come back as array slices of values."""
+    result: dict = {}
+    i = 0
+    for path, size in layout:
+        node = result
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        if size is None:
+            node[path[-1]] = float(values[i])
+            i += 1
+        else:
+            node[path[-1]] = values[i:i + size]
+            i += size
+    return result
+
+
+def _sweep_config(point: tuple) -> dict:
+    size, production, rate, rebates, itc = point
+    state_pct = itc - FEDERAL_ITC
+    return {
+        "system_size_kw": float(size),
+        "solar_production_kwh": float(production),
+        "price_per_kwh": float(rate),
+        "flat_rebates": float(rebates),
+        "state_itc_entries": [{"pct": float(state_pct)}] if state_pct > 1e-12 else None,
+    }
+
+
+def _sweep(points: list[tuple], years: int, n: int, seed: int) -> list[dict]:
+    """run_simulation at every point, as batched passes over common draws."""
+    results = []
+    for start in range(0, len(points), SWEEP_CHUNK):
+        configs = [_sweep_config(point) for point in points[start:start + SWEEP_CHUNK]]
+        batch = run_batch_simulation(configs, years=years, n=n, seed=seed)
+        results.extend(entry["simulation"] for entry in batch["configurations"])
+    return results
+
+
+class Surrogate:
+    """Multilinear interpolation table over AXES for one (years, n, seed) setting."""
+
+    def __init__(
+        self,
+        axes: dict[str, np.ndarray],
+        values: np.ndarray,
+        layout: list[tuple[tuple, int | None]],
+        years: int,
+        n: int,
+        seed: int,
+        carbon_weight: float | None,
+        error_bound: dict[str, float],
+        distributions_version: str = DISTRIBUTIONS_VERSION,
+    ):
+        self.axes = {name: np.asarray(axes[name], dtype=np.float64) for name in AXES}
+        self.values = values
+        self.layout = layout
+        self.years = years
+        self.n = n
+        self.seed = seed
+        self.carbon_weight = carbon_weight
+        self.error_bound = error_bound
+        self.distributions_version = distributions_version
+        self._carbon = np.array([
+            path[0] == "carbon_offset_tons"
+            for path, size in layout
+            for _ in range(size if size is not None else 1)
+        ])
+
+    def _point(
+        self,
+        system_size_kw: float,
+        solar_production_kwh: float | None,
+        price_per_kwh: float | None,
+        flat_rebates: float,
+        state_itc_entries: list[dict] | None,
+    ) -> list[float] | None:
+        if any(entry.get("cap") is not None for entry in state_itc_entries or []):
+            return None  # capped credits are not a fixed percentage of cost
+        point = [
+            system_size_kw,
+            solar_production_kwh if solar_production_kwh is not None else DEFAULT_SOLAR_PRODUCTION_KWH,
+            price_per_kwh if price_per_kwh is not None else DEFAULT_UTILITY_RATE,
+            flat_rebates or 0,
+            FEDERAL_ITC + sum(entry["pct"] for entry in state_itc_entries or []),
+        ]
+        for name, x in zip(AXES, point):
+            axis = self.axes[name]
+            if not axis[0] - 1e-9 <= x <= axis[-1] + 1e-9:
+                return None
+        return point
+
+    def interpolate(self, point: list[float]) -> np.ndarray:
+        """Flat output vector at an in-domain point: contract the enclosing 2^d cell one
+        axis at a time."""
+        index, weights = [], []
+        for name, x in zip(AXES, point):
+            axis = self.axes[name]
+            i = int(np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2))
+            index.append(slice(i, i + 2))
+            weights.append(min(max((x - axis[i]) / (axis[i + 1] - axis[i]), 0.0), 1.0))
+        cell = self.values[tuple(index)]
+        for t in weights:
+            cell = cell[0] + t * (cell[1] - cell[0])
+        return cell
+
+    def predict(
+        self,
+        system_size_kw: float,
+        solar_production_kwh: float | None = None,
+        price_per_kwh: float | None = None,
+        flat_rebates: float = 0,
+        state_itc_entries: list[dict] | None = None,
+        years: int = 20,
+        zip_code: str | None = None,
+    ) -> dict | None:
+        """Interpolated run_simulation summary, or None if the inputs are outside the
+        fitted domain."""
+        if years != self.years:
+            return None
+        point = self._point(system_size_kw, solar_production_kwh, price_per_kwh, flat_rebates, state_itc_entries)
+        if point is None:
+            return None
+
+        flat = self.interpolate(point)
+        # the table is fitted on the national trajectory; a zip rescales carbon by its
+        # region's lifetime weight at mean degradation
+        scale = float(cumulative_carbon_weight(zip_code, PANEL_DEGRADATION, years)) / self.carbon_weight
+        flat = np.where(self._carbon, flat * scale, flat)
+        result = {
+            "n_simulations": self.n,
+            "years": self.years,
+            **_unflatten(np.round(flat, 2), self.layout),
+        }
+        result["surrogate"] = {"error_bound": self.error_bound}
+        return result
+
+    def save(self, path: str | Path) -> None:
+        meta = {
+            "layout": [[list(p), size] for p, size in self.layout],
+            "years": self.years,
+            "n": self.n,
+            "seed": self.seed,
+            "carbon_weight": self.carbon_weight,
+            "error_bound": self.error_bound,
+            "distributions_version": self.distributions_version,
+        }
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                values=self.values,
+                meta=np.array(json.dumps(meta)),
+                **{f"axis_{name}": axis for name, axis in self.axes.items()},
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Surrogate":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            axes = {name: data[f"axis_{name}"] for name in AXES}
+            values = data["values"]
+        return cls(
+            axes=axes,
+            values=values,
+            layout=[(tuple(p), size) for p, size in meta["layout"]],
+            years=meta["years"],
+            n=meta["n"],
+            seed=meta["seed"],
+            carbon_weight=meta.get("carbon_weight"),  # absent in tables fitted on static factors
+            error_bound=meta["error_bound"],
+            distributions_version=meta["distributions_version"],
+        )
+
+
+def build_surrogate(
+    grid: dict[str, list[float]] | None = None,
+    years: int = 20,
+    n: int = DEFAULT_N,
+    seed: int = 0,
+    n_validation: int = 64,
+) -> Surrogate:
+    """Sweep run_simulation over the grid and fit the interpolation table.
+
+    error_bound is the largest absolute gap between surrogate and engine (same seed) per
+    top-level metric over n_validation uniformly random in-domain points. It measures
+    interpolation error only; Monte Carlo sampling error at n paths comes on top."""
+    grid = grid or DEFAULT_GRID
+    axes = {name: np.array(sorted(grid[name]), dtype=np.float64) for name in AXES}
+    points = list(itertools.product(*(axes[name] for name in AXES)))
+    results = _sweep(points, years, n, seed)
+
+    layout = _layout(results[0])
+    values = np.array([_flatten(result, layout) for result in results])
+    values = values.reshape(*(len(axes[name]) for name in AXES), -1)
+
+    weight = float(cumulative_carbon_weight(None, PANEL_DEGRADATION, years))
+    surrogate = Surrogate(axes, values, layout, years, n, seed, weight, {})
+
+    rng = np.random.default_rng(seed)
+    held_out = [
+        tuple(rng.uniform(axes[name][0], axes[name][-1]) for name in AXES)
+        for _ in range(n_validation)
+    ]
+    error = {}
+    for point, actual in zip(held_out, _sweep(held_out, years, n, seed)):
+        gap = np.abs(surrogate.interpolate(list(point)) - _flatten(actual, layout))
+        offset = 0
+        for path, size in layout:
+            width = size if size is not None else 1
+            metric = path[0]
+            error[metric] = max(error.get(metric, 0.0), float(gap[offset:offset + width].max()))
+            offset += width
+    surrogate.error_bound = {metric: round(bound, 2) for metric, bound in error.items()}
+    return surrogate
+
+
+def load_surrogate(path: str | Path | None = None) -> Surrogate | None:
+    """The fitted surrogate, loaded once per process. None if it has not been built or
+    was fitted against different DISTRIBUTIONS or static emission factors."""
+    global _surrogate, _surrogate_path
+    path = Path(path) if path is not None else surrogate_path()
+    if _surrogate is not None and _surrogate_path == path:
+        return _surrogate
+    if not path.exists():
+        return None
+    surrogate = Surrogate.load(path)
+    if surrogate.distributions_version != DISTRIBUTIONS_VERSION or surrogate.carbon_weight is None:
+        return None
+    _surrogate, _surrogate_path = surrogate, path
+    return _surrogate
+
+
+def predict_simulation(**kwargs) -> dict | None:
+    """Surrogate answer for run_simulation-style inputs, or None to use the engine."""
+    surrogate = load_surrogate()
+    return surrogate.predict(**kwargs) if surrogate is not None else None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python -m utils.surrogate build [PATH]")
+        sys.exit(1)
+
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else surrogate_path()
+    fitted = build_surrogate()
+    fitted.save(target)
+    print(f"Wrote {fitted.values.shape[:-1]} grid to {target}; error bound {fitted.error_bound}")
@@ -0,0 +1,258 @@
+"""Offline grid of annual mean wind speed at hub height over CONUS.
+
+`python -m utils.wind_grid build SRW_DIR` reads a local directory of NREL Wind Toolkit
+SRW files (the format /api/wind downloads), reduces each to its annual mean speed and a
+method-of-moments Weibull fit, and snaps it onto a regular lat/lon grid. The grid is
+written to wind_grid.bin next to this module (or WIND_GRID_PATH) as a small header and
+a float32 (LAYERS, rows, cols) block that is memory-mapped on first use, so a lookup
+reads four cells and interpolates bilinearly with no network.
+
+Cells without a source file are NaN. A point that needs an uncovered cell for its
+interpolation has no local answer and callers fall back to the live NREL download.
+"""
+import csv
+import math
+import os
+import re
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_WIND_GRID_PATH = Path(__file__).resolve().parent / "wind_grid.bin"
+
+# CONUS bounds (degrees) and default cell size for built grids
+CONUS_LAT = (24.0, 50.0)
+CONUS_LON = (-125.0, -66.0)
+DEFAULT_RESOLUTION = 0.1
+
+LAYERS = ("avg_wind_speed_ms", "weibull_k", "weibull_c")
+
+# artifact layout: magic, then lat0, lon0, step (float64), rows, cols, layers
+# (uint32), then the float32 layers row-major
+_MAGIC = b"WINDGRD1"
+_HEADER = struct.Struct("<8s3d3I")
+
+_SRW_COORDINATE = re.compile(r"(-?\d+(?:\.\d+)?)[_,](-?\d+(?:\.\d+)?)")
+
+_grid: "WindGrid | None" = None
+_grid_path: Path | None = None
+
+
+def wind_grid_path() -> Path:
+    return Path(os.getenv("WIND_GRID_PATH", DEFAULT_WIND_GRID_PATH))
+
+
+def parse_srw_speeds(text: str) -> np.ndarray:
+    """Hourly wind speeds (m/s) from NREL SRW text: the rows after the header naming a
+    speed column and its units row. Unparseable rows are skipped."""
+    lines = text.strip().splitlines()
+
+    # The header row contains "windspeed", "wind speed" or "speed"
+    header_idx = next((i for i, line in enumerate(lines[:6]) if "speed" in line.lower()), None)
+    if header_idx is None:
+        raise ValueError("Could not locate wind speed column header in SRW response")
+
+    headers = [h.strip().lower() for h in lines[header_idx].split(",")]
+    speed_col = next((i for i, h in enumerate(headers) if "speed" in h), None)
+    if speed_col is None:
+        raise ValueError(f"No speed column found in header: {headers}")
+
+    speeds = []
+    for row in lines[header_idx + 2:]:  # +2 to skip header and units row
+        cols = row.split(",")
+        if len(cols) > speed_col:
+            try:
+                speeds.append(float(cols[speed_col]))
+            except ValueError:
+                continue
+
+    if not speeds:
+        raise ValueError("No wind speed data rows parsed from SRW file")
+    return np.array(speeds)
+
+
+def weibull_fit(speeds: np.ndarray) -> tuple[float, float]:
+    """Weibull shape k and scale c (m/s) by the method of moments (Justus 1978)."""
+    mean = float(np.mean(speeds))
+    std = float(np.std(speeds))
+    if mean <= 0 or std <= 0:
+        return math.nan, math.nan
+    k = (std / mean) ** -1.086
+    return k, mean / math.gamma(1 + 1 / k)
+
+
+def srw_location(text: str, name: str = "") -> tuple[float, float]:
+    """(lat, lon) of an SRW file: labeled latitude/longitude fields in the metadata
+    rows (a names row over a values row, or inline name, value pairs), else a
+    "<lat>_<lon>" pair in the file name."""
+    rows = list(csv.reader(text.splitlines()[:2]))
+    found = {}
+    for r, row in enumerate(rows):
+        for i, field in enumerate(row):
+            key = field.strip().lower()
+            if key not in ("lat", "latitude", "lon", "long", "longitude"):
+                continue
+            candidates = [row[i + 1]] if i + 1 < len(row) else []
+            if r + 1 < len(rows) and i < len(rows[r + 1]):
+                candidates.append(rows[r + 1][i])
+            for candidate in candidates:
+                try:
+                    found.setdefault(key[:3], float(candidate))
+                    break
+                except ValueError:
+                    continue
+    if "lat" in found and "lon" in found:
+        return found["lat"], found["lon"]
+    match = _SRW_COORDINATE.search(name)
+    if match is None:
+        raise ValueError(f"No latitude/longitude in SRW metadata or file name {name!r}")
+    return float(match.group(1)), float(match.group(2))
+
+
+class WindGrid:
+    """Regular lat/lon grid (at least 2x2 cells) of LAYERS with NaN for uncovered cells."""
+
+    def __init__(self, lat0: float, lon0: float, step: float, values: np.ndarray):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.step = step
+        self.values = values  # (len(LAYERS), rows, cols) float32
+
+    def interpolate_many(self, lat, lon) -> np.ndarray:
+        """(len(LAYERS), n) bilinear values at arrays of points; NaN where a cell with
+        nonzero weight is uncovered or the point is off the grid."""
+        _, rows, cols = self.values.shape
+        y = (np.asarray(lat, dtype=np.float64).ravel() - self.lat0) / self.step
+        x = (np.asarray(lon, dtype=np.float64).ravel() - self.lon0) / self.step
+        inside = (y >= 0) & (y <= rows - 1) & (x >= 0) & (x <= cols - 1)
+        i = np.clip(np.floor(y), 0, rows - 2).astype(np.int64)
+        j = np.clip(np.floor(x), 0, cols - 2).astype(np.int64)
+        i1, j1 = i + 1, j + 1
+        fy, fx = y - i, x - j
+        out = np.zeros((self.values.shape[0], y.size))
+        for row, col, weight in (
+            (i, j, (1 - fy) * (1 - fx)), (i, j1, (1 - fy) * fx), (i1, j, fy * (1 - fx)), (i1, j1, fy * fx),
+        ):
+            # a corner with no weight (the point is on the cell's edge) may be uncovered
+            out += np.where(weight > 0, self.values[:, row, col] * weight, 0.0)
+        return np.where(inside[None], out, np.nan)
+
+    def lookup(self, lat: float, lon: float) -> dict | None:
+        """Interpolated mean speed (and Weibull k, c when the grid has them) at a
+        point, or None where the grid does not cover it."""
+        # scalar path of interpolate_many: one 2x2 slice read, arithmetic in Python
+        _, rows, cols = self.values.shape
+        y = (lat - self.lat0) / self.step
+        x = (lon - self.lon0) / self.step
+        if not (0 <= y <= rows - 1 and 0 <= x <= cols - 1):
+            return None
+        i, j = min(int(y), rows - 2), min(int(x), cols - 2)
+        fy, fx = y - i, x - j
+        weights = ((1 - fy) * (1 - fx), (1 - fy) * fx, fy * (1 - fx), fy * fx)
+        speed, k, c = (
+            sum(w * v for w, v in zip(weights, (*corner[0], *corner[1])) if w > 0)
+            for corner in self.values[:, i:i + 2, j:j + 2].tolist()
+        )
+        if math.isnan(speed):
+            return None
+        result = {"avg_wind_speed_ms": speed}
+        if not (math.isnan(k) or math.isnan(c)):
+            result["weibull_k"] = k
+            result["weibull_c"] = c
+        return result
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        _, rows, cols = self.values.shape
+        header = _HEADER.pack(_MAGIC, self.lat0, self.lon0, self.step, rows, cols, len(LAYERS))
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(header + np.ascontiguousarray(self.values, dtype="<f4").tobytes())
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "WindGrid | None":
+        """Memory-mapped grid, or None if the file is missing or malformed."""
+        path = Path(path)
+        if not path.exists() or path.stat().st_size < _HEADER.size:
+            return None
+        with open(path, "rb") as f:
+            magic, lat0, lon0, step, rows, cols, layers = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or layers != len(LAYERS):
+            return None
+        if path.stat().st_size != _HEADER.size + 4 * layers * rows * cols:
+            return None
+        values = np.memmap(path, dtype="<f4", mode="r", offset=_HEADER.size, shape=(layers, rows, cols))
+        return cls(lat0, lon0, step, values)
+
+
+def build_wind_grid(
+    srw_dir: str | Path,
+    resolution: float = DEFAULT_RESOLUTION,
+    lat_range: tuple[float, float] = CONUS_LAT,
+    lon_range: tuple[float, float] = CONUS_LON,
+) -> tuple[WindGrid, int]:
+    """Grid from every *.srw / *.csv file in srw_dir, each snapped to its nearest cell
+    (cells hit by several files average them). Also returns how many files were
+    skipped as unreadable or outside the bounds."""
+    rows = int(round((lat_range[1] - lat_range[0]) / resolution)) + 1
+    cols = int(round((lon_range[1] - lon_range[0]) / resolution)) + 1
+    sums = np.zeros((len(LAYERS), rows, cols))
+    counts = np.zeros((len(LAYERS), rows, cols))
+    skipped = 0
+    for path in sorted(Path(srw_dir).iterdir()):
+        if path.suffix.lower() not in (".srw", ".csv"):
+            continue
+        try:
+            text = path.read_text(encoding="utf-8", errors="replace")
+            lat, lon = srw_location(text, path.name)
+            speeds = parse_srw_speeds(text)
+        except ValueError:
+            skipped += 1
+            continue
+        i = int(round((lat - lat_range[0]) / resolution))
+        j = int(round((lon - lon_range[0]) / resolution))
+        if not (0 <= i < rows and 0 <= j < cols):
+            skipped += 1
+            continue
+        cell = np.array([float(np.mean(speeds)), *weibull_fit(speeds)])
+        fitted = ~np.isnan(cell)
+        sums[fitted, i, j] += cell[fitted]
+        counts[fitted, i, j] += 1
+    with np.errstate(invalid="ignore"):
+        values = (sums / counts).astype(np.float32)
+    return WindGrid(lat_range[0], lon_range[0], resolution, values), skipped
+
+
+def load_wind_grid(path: str | Path | None = None) -> WindGrid | None:
+    """The compiled grid, memory-mapped once per process. None if it has not been built."""
+    global _grid, _grid_path
+    path = Path(path) if path is not None else wind_grid_path()
+    if _grid is not None and _grid_path == path:
+        return _grid
+    grid = WindGrid.load(path)
+    if grid is not None:
+        _grid, _grid_path = grid, path
+    return grid
+
+
+def local_wind(lat: float, lon: float) -> dict | None:
+    """Mean wind speed (and Weibull parameters) at a point from the local grid, or None
+    without a grid or where it has no coverage."""
+    grid = load_wind_grid()
+    return grid.lookup(lat, lon) if grid is not None else None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "build":
+        print("Usage: python -m utils.wind_grid build SRW_DIR [PATH] [RESOLUTION]")
+        sys.exit(1)
+
+    target = Path(sys.argv[3]) if len(sys.argv) > 3 else wind_grid_path()
+    resolution = float(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_RESOLUTION
+    grid, skipped = build_wind_grid(sys.argv[2], resolution)
+    grid.save(target)
+    covered = int(np.isfinite(grid.values[0]).sum())
+    print(f"Wrote {covered:,} covered cells to {target} ({skipped} files skipped)")
@@ -1,7 +1,22 @@
-"""Load zip-to-region mapping from CSV using numpy."""
-import numpy as np
+"""Zip-to-eGRID-region lookups.
+
+The mapping is a dense array of ZIP_SLOTS uint8 region codes addressed by the integer
+zip, so a lookup is one array read and a batch of zips is one fancy-indexing pass.
+Code 0 means the zip is not in zipToRegion.csv.
+
+`python -m utils.zip_region build` compiles the CSV into a small binary artifact
+(zip_region.bin next to this module, or ZIP_REGION_INDEX) holding the CSV's SHA-256,
+the region names and the dense index. Nothing is loaded at import: the first lookup
+memory-maps the artifact, so every worker shares the same page-cache copy, or parses
+the CSV when the artifact is missing or was built from a different CSV.
+"""
+import hashlib
+import os
+import sys
 from pathlib import Path
 
+import numpy as np
+
 REGION_CO2_LBS_PER_MWH = {
     "AKGD": 899.633,
     "AKMS": 520.483,
@@ -32,26 +47,151 @@ REGION_CO2_LBS_PER_MWH = {
     "SRVC": 593.419,
 }
 
+ZIP_SLOTS = 100_000
+
 _CSV_PATH = Path(__file__).resolve().parent / "zipToRegion.csv"
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent / "zip_region.bin"
+
+# artifact layout: magic, CSV SHA-256, region count, names (_NAME_BYTES each, NUL
+# padded), then the ZIP_SLOTS uint8 codes
+_MAGIC = b"ZIPRGN01"
+_NAME_BYTES = 8
+_HEADER = len(_MAGIC) + 32 + 1
+
+# (names by region code with None for code 0, dense uint8 zip index), loaded on first use
+_index: tuple[np.ndarray, np.ndarray] | None = None
+_csv_columns: tuple[np.ndarray, np.ndarray] | None = None
+
 
-_zip_region_array = np.loadtxt(
-    _CSV_PATH,
-    delimiter=",",
-    dtype=str,
-    skiprows=1,
-)
+def index_path() -> Path:
+    return Path(os.getenv("ZIP_REGION_INDEX", DEFAULT_INDEX_PATH))
 
-zips = _zip_region_array[:, 0]
-regions = _zip_region_array[:, 1]
+
+def _csv_digest(csv_path: Path) -> bytes:
+    return hashlib.sha256(csv_path.read_bytes()).digest()
+
+
+def _index_from_csv(csv_path: Path) -> tuple[np.ndarray, np.ndarray]:
+    table = load_zip_to_region(csv_path)
+    zip_column, region_column = table[:, 0], table[:, 1]
+    names = np.array([None, *sorted(set(region_column.tolist()) | set(REGION_CO2_LBS_PER_MWH))], dtype=object)
+    index = np.zeros(ZIP_SLOTS, dtype=np.uint8)
+    index[zip_column.astype(np.int64)] = np.searchsorted(names[1:].astype(str), region_column) + 1
+    index.flags.writeable = False
+    return names, index
+
+
+def build_zip_index(path: str | Path | None = None, csv_path: str | Path | None = None) -> Path:
+    """Compile the zip-to-region CSV into the binary artifact."""
+    path = Path(path) if path is not None else index_path()
+    csv_path = Path(csv_path) if csv_path is not None else _CSV_PATH
+    names, index = _index_from_csv(csv_path)
+    header = _MAGIC + _csv_digest(csv_path) + bytes([len(names) - 1])
+    header += b"".join(name.encode().ljust(_NAME_BYTES, b"\0") for name in names[1:])
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(header + index.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+def _load_artifact(path: Path, csv_path: Path) -> tuple[np.ndarray, np.ndarray] | None:
+    """Names and a read-only memory map of the index, or None if the artifact is
+    missing, malformed or stale (built from a CSV with a different checksum)."""
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        header = f.read(_HEADER)
+        if len(header) < _HEADER or header[:len(_MAGIC)] != _MAGIC:
+            return None
+        if header[len(_MAGIC):-1] != _csv_digest(csv_path):
+            return None
+        count = header[-1]
+        raw_names = f.read(count * _NAME_BYTES)
+    offset = _HEADER + count * _NAME_BYTES
+    if path.stat().st_size != offset + ZIP_SLOTS:
+        return None
+    names = [raw_names[i:i + _NAME_BYTES].rstrip(b"\0").decode() for i in range(0, len(raw_names), _NAME_BYTES)]
+    index = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(ZIP_SLOTS,))
+    return np.array([None, *names], dtype=object), index
+
+
+def _zip_index() -> tuple[np.ndarray, np.ndarray]:
+    global _index
+    if _index is None:
+        _index = _load_artifact(index_path(), _CSV_PATH) or _index_from_csv(_CSV_PATH)
+    return _index
+
+
+def __getattr__(name: str):
+    """zips and regions (the raw CSV columns) are parsed only when first accessed."""
+    global _csv_columns
+    if name in ("zips", "regions"):
+        if _csv_columns is None:
+            table = load_zip_to_region()
+            _csv_columns = (table[:, 0], table[:, 1])
+        return _csv_columns[name == "regions"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def parse_zips(zip_codes) -> tuple[np.ndarray, np.ndarray]:
+    """Integer zips and a validity mask for an array of zip strings or integers.
+    Strings follow get_region: 1 to 5 ASCII digits, left-padded with zeros."""
+    arr = np.asarray(zip_codes)
+    if arr.dtype.kind in "iu":
+        numbers = arr.astype(np.int64)
+        valid = (numbers >= 0) & (numbers < ZIP_SLOTS)
+        return np.where(valid, numbers, 0), valid
+    arr = arr.astype(str).ravel()
+    # fixed-width unicode is an (n, width) block of uint32 code points, NUL-padded;
+    # parse it one character position at a time (Horner) instead of string by string
+    columns = np.ascontiguousarray(arr.view(np.uint32).reshape(arr.size, arr.dtype.itemsize // 4).T)
+    numbers = np.zeros(arr.size, dtype=np.uint32)
+    valid = np.full(arr.size, columns.shape[0] <= 5)
+    if columns.shape[0] and columns[-1].all():  # every string is full width, e.g. "02139"
+        for column in columns:
+            digit = column - np.uint32(ord("0"))  # wraps above 9 for anything but 0-9
+            valid &= digit <= 9
+            numbers *= np.uint32(10)
+            numbers += digit
+    else:
+        length = np.zeros(arr.size, dtype=np.int64)
+        valid[:] = True
+        for column in columns:
+            present = column != 0
+            digit = column - np.uint32(ord("0"))
+            valid &= ~present | (digit <= 9)
+            numbers = np.where(present, numbers * np.uint32(10) + digit, numbers)
+            length += present
+        valid &= (length >= 1) & (length <= 5)
+    shape = np.shape(zip_codes)
+    numbers = np.where(valid, numbers, 0).astype(np.int64).reshape(shape)
+    return numbers, valid.reshape(shape)
+
+
+def _region_codes(zip_codes) -> np.ndarray:
+    numbers, valid = parse_zips(zip_codes)
+    return np.where(valid, _zip_index()[1][numbers], 0)
+
+
+def get_region_codes(zip_codes) -> tuple[np.ndarray, np.ndarray]:
+    """Region codes (0 where not found) for an array of zips, and the names by code
+    (None for 0), for callers that group or format by region without per-zip objects."""
+    return _region_codes(zip_codes), _zip_index()[0]
 
 
 def get_region(zip_code: str) -> str | None:
     """Return eGRID region for a given zip code, or None if not found."""
     zip_str = str(zip_code).zfill(5)
-    idx = np.where(zips == zip_str)[0]
-    if idx.size == 0:
+    if len(zip_str) != 5 or not (zip_str.isascii() and zip_str.isdigit()):
         return None
-    return regions[idx[0]]
+    names, index = _zip_index()
+    return names[index[int(zip_str)]]
+
+
+def get_regions(zip_codes) -> np.ndarray:
+    """get_region for an array of zips (strings or integers): an object array of
+    region names, None where not found."""
+    return _zip_index()[0][_region_codes(zip_codes)]
 
 
 def get_co2_emissions_lbs_mwh(zip_code: str) -> float | None:
@@ -62,7 +202,23 @@ def get_co2_emissions_lbs_mwh(zip_code: str) -> float | None:
     return REGION_CO2_LBS_PER_MWH.get(region)
 
 
+def get_co2_emissions_lbs_mwh_many(zip_codes) -> np.ndarray:
+    """get_co2_emissions_lbs_mwh for an array of zips: float64, NaN where not found."""
+    names = _zip_index()[0]
+    co2 = np.array([np.nan] + [REGION_CO2_LBS_PER_MWH.get(name, np.nan) for name in names[1:]])
+    return co2[_region_codes(zip_codes)]
+
+
 def load_zip_to_region(path: str | Path | None = None) -> np.ndarray:
     """Load zipToRegion CSV as a string array (N, 2). Optional custom path."""
     p = path if path is not None else _CSV_PATH
     return np.loadtxt(p, delimiter=",", dtype=str, skiprows=1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python -m utils.zip_region build [PATH]")
+        sys.exit(1)
+
+    target = build_zip_index(sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"Wrote zip region index to {target}")